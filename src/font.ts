@@ -91,10 +91,7 @@ export class FontCache {
 					//from rename
 				}
 				// return load(file, null, {isUrl: false});
-				return fsp
-					.open(file, 'r')
-					.then((fh) => fh.readFile().finally(() => fh.close()))
-					.then((buf) => import('opentype.js').then((mod) => mod.parse(buf.buffer)));
+				return loadFontBuffer(file).then(parseFont);
 			}));
 	}
 
@@ -113,6 +110,31 @@ export class FontCache {
 	}
 }
 
+// The font file in a SharedArrayBuffer, which workers get without a copy
+// when posted, and can each parse
+export async function loadFontBuffer(file: string): Promise<SharedArrayBuffer> {
+	const fh = await fsp.open(file, 'r');
+	try {
+		const { size } = await fh.stat();
+		const buffer = new SharedArrayBuffer(size);
+		const view = new Uint8Array(buffer);
+		for (let pos = 0; pos < size; ) {
+			const { bytesRead } = await fh.read(view, pos, size - pos, pos);
+			if (bytesRead <= 0) {
+				throw new Error(`Unexpected end of '${file}' at ${pos}`);
+			}
+			pos += bytesRead;
+		}
+		return buffer;
+	} finally {
+		await fh.close();
+	}
+}
+
+export async function parseFont(buffer: ArrayBufferLike): Promise<Font> {
+	return import('opentype.js').then((mod) => mod.parse(buffer));
+}
+
 // export async function loadFont(which: string): Promise<Font> {
 // 	return await FontCache.getInstance().getFont(which);
 // }
@@ -3,10 +3,33 @@ export * from './ray.js';
 export * from './bbox.js';
 export * from './matrix.js';
 export * from './svgtransform.js';
+export { Probe } from './probe.js';
+export type { OpStats, ProbeSnapshot } from './probe.js';
 import { PathLC } from './path/pathlc.js';
 import { BaseLC } from "./path/command.js";
 export { PathLC as PathLS, BaseLC as SegmentLS }
 export { PathLC } from './path/pathlc.js';
+export type { NearestOutput } from './path/pathlc.js';
+export { PathBuffer } from './path/pathbuffer.js';
+export { LazyPath } from './path/lazypath.js';
+export { PathParser, parse_stream } from './path/parser.js';
+export type { PathSink } from './path/parser.js';
+export { PathWriter } from './path/writer.js';
+export type { WriteParams, PathOutput } from './path/writer.js';
+export { SegmentTree } from './path/segtree.js';
+export type { SegmentEntry, SegmentHit } from './path/segtree.js';
+export { Polyline } from './path/polyline.js';
+export type { PolylineOutput } from './path/polyline.js';
+export { GlyphCache } from './path/glyphs.js';
+export type { GlyphOutline, TextOptions } from './path/glyphs.js';
+export { PathBatch } from './path/batch.js';
+export type { PackedPaths, PathStats, BatchOptions } from './path/batch.js';
 export async function loadFont(which: string) {
 	return import('./font.js').then(mod => mod.FontCache.getInstance().getFont(which));
 }
+export async function loadFontBuffer(file: string) {
+	return import('./font.js').then(mod => mod.loadFontBuffer(file));
+}
+export async function parseFont(buffer: ArrayBufferLike) {
+	return import('./font.js').then(mod => mod.parseFont(buffer));
+}
@@ -38,6 +38,143 @@ const _inv = function (m: Matrix) {
 
 	return [na, nb, nc, nd, ne, nf];
 };
+// A transform attribute as read: its functions in order, and their product
+export interface CompiledTransform {
+	readonly ops: ReadonlyArray<readonly [string, ReadonlyArray<number>]>;
+	readonly hexad: ReadonlyArray<number>;
+}
+
+// the hexad of rotate(deg, x, y), as Matrix.rotate makes it
+const rotation = function (deg: number, x: number, y: number): [number, number, number, number, number, number] {
+	const θ = ((deg % 360) * PI) / 180;
+	const cosθ = cos(θ);
+	const sinθ = sin(θ);
+	return [
+		cosθ,
+		sinθ,
+		-sinθ,
+		cosθ,
+		x ? -cosθ * x + sinθ * y + x : 0,
+		y ? -sinθ * x - cosθ * y + y : 0,
+	];
+};
+// the hexad of each transform function, from its arguments
+const TRANSFORMS = new Map<string, (v: number[]) => number[]>([
+	['matrix', (v) => v],
+	['translate', ([x = 0, y = 0]) => [1, 0, 0, 1, x, y]],
+	['translateX', ([x = 0]) => [1, 0, 0, 1, x, 0]],
+	['translateY', ([y = 0]) => [1, 0, 0, 1, 0, y]],
+	['scale', ([x = 1, y = x]) => [x, 0, 0, y, 0, 0]],
+	['rotate', ([deg, x = 0, y = 0]) => rotation(deg, x, y)],
+	['skewX', ([deg]) => [1, 0, tan(radians(deg)), 1, 0, 0]],
+	['skewY', ([deg]) => [1, tan(radians(deg)), 0, 1, 0, 0]],
+]);
+const NUMBER = /[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?/y;
+const SEPARATOR = /[\s,]*/y;
+// m times n into m, as _cat
+const _cat_hexad = function (m: number[], [A = 1, B = 0, C = 0, D = 1, E = 0, F = 0]: number[]) {
+	const [a, b, c, d, e, f] = m;
+	m[0] = a * A + c * B + e * 0;
+	m[1] = b * A + d * B + f * 0;
+	m[2] = a * C + c * D + e * 0;
+	m[3] = b * C + d * D + f * 0;
+	m[4] = a * E + c * F + e * 1;
+	m[5] = b * E + d * F + f * 1;
+};
+const _compile = function (d: string): CompiledTransform {
+	const ops: (readonly [string, ReadonlyArray<number>])[] = [];
+	const m = [1, 0, 0, 1, 0, 0];
+	for (let i = 0, close; (close = d.indexOf(')', i)) >= 0; i = close + 1) {
+		const open = d.indexOf('(', i);
+		const name = d.slice(i, open >= i && open < close ? open : close).replace(/^[\s,]+|\s+$/g, '');
+		const make = TRANSFORMS.get(name);
+		if (!make || open < i || open > close) {
+			throw new Error(`Unexpected transform '${name}'`);
+		}
+		const args: number[] = [];
+		for (let k = open + 1; ; k = NUMBER.lastIndex) {
+			SEPARATOR.lastIndex = k;
+			SEPARATOR.exec(d);
+			if ((k = SEPARATOR.lastIndex) >= close) {
+				break;
+			}
+			NUMBER.lastIndex = k;
+			if (!NUMBER.test(d)) {
+				throw new TypeError(`Unexpected '${d[k]}' in transform '${d}'`);
+			}
+			args.push(parseFloat(d.slice(k, NUMBER.lastIndex)));
+		}
+		_cat_hexad(m, make(args));
+		ops.push(Object.freeze([name, Object.freeze(args)] as const));
+	}
+	if (!m.every(isFinite)) {
+		throw new TypeError(`Invalid transform '${d}'`);
+	}
+	return Object.freeze({ ops: Object.freeze(ops), hexad: Object.freeze(m) });
+};
+// compiled transforms by their text, most recently used last
+const _compiled = new Map<string, CompiledTransform>();
+
+// Keyframes as rows of six: hexads, or when decomposed
+// translateX, translateY, rotate, skewX, scaleX, scaleY with rotations unwrapped
+const _keyframes = function (keys: Matrix[], decompose: boolean) {
+	const H = new Float64Array(keys.length * 6);
+	keys.forEach((M, i) => {
+		if (decompose) {
+			const { translateX, translateY, rotate, skewX, scaleX, scaleY } = M.decompose();
+			let r = rotate;
+			if (i > 0) {
+				const q = H[i * 6 - 4];
+				while (r - q > 180) r -= 360;
+				while (q - r > 180) r += 360;
+			}
+			H.set([translateX, translateY, r, skewX, scaleX, scaleY], i * 6);
+		} else {
+			H.set(M.dump_hexad(), i * 6);
+		}
+	});
+	return H;
+};
+// the frame at t, from segment j on, into out at o; returns the segment it fell in
+const _frame_at = function (
+	H: Float64Array,
+	offsets: ArrayLike<number>,
+	decompose: boolean,
+	t: number,
+	j: number,
+	out: Float64Array | number[],
+	o: number
+) {
+	const n = offsets.length;
+	if (n < 2) {
+		for (let i = 0; i < 6; ++i) out[o + i] = H[i];
+	} else {
+		if (t < offsets[j]) j = 0;
+		while (j < n - 2 && t > offsets[j + 1]) ++j;
+		const t0 = offsets[j];
+		const t1 = offsets[j + 1];
+		const u = t1 > t0 ? (t - t0) / (t1 - t0) : 1;
+		for (let i = 0, p = j * 6; i < 6; ++i, ++p) {
+			const a = H[p];
+			const b = H[p + 6];
+			out[o + i] = a === b ? b : a * (1 - u) + b * u;
+		}
+	}
+	if (decompose) {
+		// translate(tx ty) rotate(r) skewX(k) scale(sx sy)
+		const [tx, ty, r, k, sx, sy] = [out[o], out[o + 1], out[o + 2], out[o + 3], out[o + 4], out[o + 5]];
+		const θ = (r * PI) / 180;
+		const [cosθ, sinθ, tanK] = [cos(θ), sin(θ), tan((k * PI) / 180)];
+		out[o] = sx * cosθ;
+		out[o + 1] = sx * sinθ;
+		out[o + 2] = sy * (cosθ * tanK - sinθ);
+		out[o + 3] = sy * (sinθ * tanK + cosθ);
+		out[o + 4] = tx;
+		out[o + 5] = ty;
+	}
+	return j;
+};
+
 export class Matrix {
 	// [ a, c, e ] [ sx*cosψ, -sy*sinψ, tx ]
 	// [ b, d, f ] [ sx*sinψ,  sy*cosψ, ty ]
@@ -316,44 +453,32 @@ export class Matrix {
 	}
 
 	public static parse(d: string) {
-		let m = new this();
-		if (d)
-			for (const str of d.split(/\)\s*,?\s*/).slice(0, -1)) {
-				const kv = str.trim().split('(');
-				const name = kv[0].trim();
-				const args = kv[1].split(/[\s,]+/).map(function (str) {
-					return parseFloat(str.trim());
-				});
-				switch (name) {
-					case 'matrix':
-						m._cat_self(this.fromArray(args));
-						break;
-					case 'translate':
-						m._cat_self(this.translate(args[0], args[1]));
-						break;
-					case 'translateX':
-						m._cat_self(this.translateX(args[0]));
-						break;
-					case 'translateY':
-						m._cat_self(this.translateY(args[0]));
-						break;
-					case 'scale':
-						m._cat_self(this.scale(args[0], args[1]));
-						break;
-					case 'rotate':
-						m._cat_self(this.rotate(args[0], args[1], args[2]));
-						break;
-					case 'skewX':
-						m._cat_self(this.skewX(args[0]));
-						break;
-					case 'skewY':
-						m._cat_self(this.skewY(args[0]));
-						break;
-					default:
-						throw new Error(`Unexpected transform '${name}'`);
-				}
+		return new this(this.compile(d).hexad);
+	}
+
+	// the hexad of d into out at offset i, nothing allocated once d is cached
+	public static parse_into(d: string, out: number[] | Float64Array, i = 0) {
+		const { hexad } = this.compile(d);
+		for (let k = 0; k < 6; ++k) out[i + k] = hexad[k];
+		return out;
+	}
+
+	static cache_limit = 1024;
+
+	// d read once, then kept frozen in a cache of the cache_limit most recently used
+	public static compile(d: string): CompiledTransform {
+		d = d || '';
+		let c = _compiled.get(d);
+		if (c) {
+			_compiled.delete(d);
+		} else {
+			c = _compile(d);
+			while (_compiled.size > 0 && _compiled.size >= Matrix.cache_limit) {
+				_compiled.delete(_compiled.keys().next().value!);
 			}
-		return m;
+		}
+		_compiled.set(d, c);
+		return c;
 	}
 
 	[shot: string]: any;
@@ -391,23 +516,47 @@ export class Matrix {
 		}
 	}
 
+	// opt.decompose: through the decompose() parts, so rotations stay rotations
 	static interpolate(
 		A: number[] | string | Matrix | ElementLike,
 		B: number[] | string | Matrix | ElementLike,
 		opt?: any
 	) {
-		const a = this.new(A).dump_hexad();
-		const b = this.new(B).dump_hexad();
-		const n = a.length;
+		const decompose = !!opt?.decompose;
+		const H = _keyframes([this.new(A), this.new(B)], decompose);
+		const offsets = [0, 1];
+		const c = new Float64Array(6);
 		const klass = this;
-		// console.warn("interpolate T", A, B, a, b);
 		return function (t: number) {
-			let c = [0, 0, 0, 0, 0, 0];
-			for (let i = 0; i < n; ++i) c[i] = a[i] === b[i] ? b[i] : a[i] * (1 - t) + b[i] * t;
-			// console.warn("compose", c);
-			return klass.fromArray(c);
+			_frame_at(H, offsets, decompose, t, 0, c, 0);
+			return klass.hexad(c[0], c[1], c[2], c[3], c[4], c[5]);
 		};
 	}
+
+	// The hexads of keys interpolated at each of times, six apiece into one array.
+	// keys sit at offsets, evenly over [0, 1] by default; times outside hold the end keys
+	static sample(
+		keys: Array<number[] | string | Matrix | ElementLike>,
+		times: ArrayLike<number>,
+		opt: { offsets?: ArrayLike<number>; decompose?: boolean } = {},
+		out = new Float64Array(times.length * 6)
+	) {
+		const n = keys.length;
+		const { offsets = keys.map((_, i) => (n > 1 ? i / (n - 1) : 0)), decompose = false } = opt;
+		if (n < 1 || offsets.length != n) {
+			throw new Error(`Unexpected ${n} keys at ${offsets.length} offsets`);
+		}
+		const H = _keyframes(
+			keys.map((K) => this.new(K)),
+			decompose
+		);
+		const [lo, hi] = [offsets[0], offsets[n - 1]];
+		for (let s = 0, j = 0; s < times.length; ++s) {
+			const t = times[s];
+			j = _frame_at(H, offsets, decompose, t < lo ? lo : t > hi ? hi : t, j, out, s * 6);
+		}
+		return out;
+	}
 	static translate(x = 0, y = 0) {
 		return this.matrix(1, 0, 0, 1, x, y);
 	}
@@ -427,17 +576,7 @@ export class Matrix {
 		return this.skew(0, y);
 	}
 	static rotate(deg: number, x: number = 0, y: number = 0) {
-		const θ = ((deg % 360) * PI) / 180;
-		const cosθ = cos(θ);
-		const sinθ = sin(θ);
-		return this.matrix(
-			cosθ,
-			sinθ,
-			-sinθ,
-			cosθ,
-			x ? -cosθ * x + sinθ * y + x : 0,
-			y ? -sinθ * x - cosθ * y + y : 0
-		);
+		return this.matrix(...rotation(deg, x, y));
 	}
 
 	static scale(scaleX: number, scaleY?: number) {
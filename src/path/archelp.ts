@@ -1,7 +1,10 @@
 import { BoundingBox } from "../bbox.js";
 import { Vector } from "../vector.js";
+import { gl_length, gl_t_at_length, SpeedFn } from "./lengthhelp.js";
+import { tCheck } from "./index.js";
+import { probe } from "../probe.js";
 
-const { abs, tan, cos, sin, sqrt, acos, PI, ceil, min, max, atan } = Math;
+const { abs, tan, cos, sin, sqrt, acos, PI, ceil, min, max, atan, atan2, hypot } = Math;
 const TAU = PI * 2;
 
 function cossin(θ: number) {
@@ -84,6 +87,7 @@ export function segment_length(
 ): number {
 	const mid = (start + end) / 2;
 	const mid_point = curve.point_at(mid);
+	probe && probe.step('length', depth);
 	const length = end_point.subtract(start_point).abs();
 	const first_half = mid_point.subtract(start_point).abs();
 	const second_half = end_point.subtract(mid_point).abs();
@@ -326,7 +330,7 @@ export function arc_point_at(arc: IArc, t: number) {
 }
 
 export function arc_bbox(arc: IArc) {
-	const { rx, ry, cosφ, sinφ, from, to, rdelta, rtheta, phi } = arc;
+	const { rx, ry, cosφ, sinφ, from, to, rdelta, rtheta } = arc;
 	let atan_x, atan_y;
 	if (cosφ == 0) {
 		atan_x = PI / 2;
@@ -335,7 +339,7 @@ export function arc_bbox(arc: IArc) {
 		atan_x = 0;
 		atan_y = PI / 2;
 	} else {
-		const tanφ = tan(phi);
+		const tanφ = sinφ / cosφ;
 		atan_x = atan(-(ry / rx) * tanφ);
 		atan_y = atan(ry / rx / tanφ);
 	}
@@ -353,10 +357,55 @@ export function arc_bbox(arc: IArc) {
 	return BoundingBox.extrema([min(...xtrema), max(...xtrema)], [min(...ytrema), max(...ytrema)]);
 }
 
-export function arc_length(arc: IArc) {
-	const { from, to } = arc;
+// arc_bbox of the arc transformed by M: the image of the ellipse is the centre plus u⋅cosθ + v⋅sinθ
+export function arc_bbox_under(arc: IArc, M: any) {
+	const { rx, ry, cosφ, sinφ, from, to, rdelta, rtheta, cx, cy } = arc;
+	const { a, b, c, d, e, f } = M;
+	const [ux, vx] = [rx * (a * cosφ + c * sinφ), ry * (c * cosφ - a * sinφ)];
+	const [uy, vy] = [rx * (b * cosφ + d * sinφ), ry * (d * cosφ - b * sinφ)];
+	const [X, Y] = [a * cx + c * cy + e, b * cx + d * cy + f];
+	const xtrema = [a * from.x + c * from.y + e, a * to.x + c * to.y + e];
+	const ytrema = [b * from.x + d * from.y + f, b * to.x + d * to.y + f];
+	if (!from.equals(to)) {
+		const atan_x = atan2(vx, ux);
+		const atan_y = atan2(vy, uy);
+		for (let k = -4; k < 5; ++k) {
+			const tx = (atan_x + PI * k - rtheta) / rdelta;
+			const ty = (atan_y + PI * k - rtheta) / rdelta;
+			if (0 < tx && tx < 1) {
+				const θ = rtheta + rdelta * tx;
+				xtrema.push(X + ux * cos(θ) + vx * sin(θ));
+			}
+			if (0 < ty && ty < 1) {
+				const θ = rtheta + rdelta * ty;
+				ytrema.push(Y + uy * cos(θ) + vy * sin(θ));
+			}
+		}
+	}
+	return BoundingBox.extrema([min(...xtrema), max(...xtrema)], [min(...ytrema), max(...ytrema)]);
+}
+
+export function arc_speed(arc: IArc): SpeedFn {
+	const { rx, ry, rdelta, rtheta } = arc;
+	const k = abs(rdelta);
+	return (t: number) => {
+		const θ = rtheta + t * rdelta;
+		return k * hypot(rx * sin(θ), ry * cos(θ));
+	};
+}
+
+export function arc_length(arc: IArc, t0 = 0, t1 = 1, tolerance?: number) {
+	const { from, to, rx, ry, rdelta } = arc;
+	if (from.equals(to)) return 0;
+	if (rx == ry) return abs(rdelta) * rx * (t1 - t0);
+	return gl_length(arc_speed(arc), t0, t1, tolerance);
+}
+
+export function arc_t_at_length(arc: IArc, s: number, tolerance?: number) {
+	const { from, to, rx, ry, rdelta } = arc;
 	if (from.equals(to)) return 0;
-	return segment_length(arc, 0, 1, from, to);
+	if (rx == ry) return tCheck(s / (abs(rdelta) * rx));
+	return gl_t_at_length(arc_speed(arc), s, undefined, tolerance);
 }
 
 export function arc_slope_at(arc: IArc, t: number): Vector {
@@ -371,12 +420,66 @@ export function arc_slope_at(arc: IArc, t: number): Vector {
 	);
 }
 
-export function arc_transform(self: IArc, matrix: any) {
+// t on the arc for the angle θ, if the arc reaches it
+export function arc_t_at_angle(arc: IArc, θ: number, ts: number[]) {
+	const { rtheta, rdelta } = arc;
+	for (let k = -2; k <= 2; ++k) {
+		const t = (θ + TAU * k - rtheta) / rdelta;
+		0 <= t && t <= 1 && ts.push(t);
+	}
+	return ts;
+}
+
+// t where the arc may be closest to (x, y): the ends and where (E(θ) - p)⋅E'(θ) = 0,
+// the angle of p itself on a circle, bracketed by steps then bisected on an ellipse
+export function arc_nearest_ts(arc: IArc, x: number, y: number) {
+	const ts = [0, 1];
+	const { from, to, rx, ry, cosφ, sinφ, cx, cy, rtheta, rdelta } = arc;
+	if (from.equals(to)) {
+		return ts;
+	}
+	const [dx, dy] = [x - cx, y - cy];
+	if (rx == ry) {
+		(dx || dy) && arc_t_at_angle(arc, atan2(-dx * sinφ + dy * cosφ, dx * cosφ + dy * sinφ), ts);
+		return ts;
+	}
+	const [ux, uy, vx, vy] = [rx * cosφ, rx * sinφ, -ry * sinφ, ry * cosφ];
+	const h = (θ: number) => {
+		const [c, s] = [cos(θ), sin(θ)];
+		return (ux * c + vx * s - dx) * (vx * c - ux * s) + (uy * c + vy * s - dy) * (vy * c - uy * s);
+	};
+	const steps = 32;
+	let [a, fa] = [rtheta, h(rtheta)];
+	for (let i = 1; i <= steps; ++i) {
+		const b = rtheta + (rdelta * i) / steps;
+		const fb = h(b);
+		if (fa == 0) {
+			arc_t_at_angle(arc, a, ts);
+		} else if (fb != 0 && fa < 0 != fb < 0) {
+			let [lo, hi, fl] = [a, b, fa];
+			for (let k = 0; k < 60; ++k) {
+				const m = (lo + hi) / 2;
+				const fm = h(m);
+				if (fm < 0 == fl < 0) {
+					[lo, fl] = [m, fm];
+				} else {
+					hi = m;
+				}
+			}
+			ts.push(min(1, max(0, ((lo + hi) / 2 - rtheta) / rdelta)));
+		}
+		[a, fa] = [b, fb];
+	}
+	return ts;
+}
+
+// parts: matrix.decompose(), passed in when one matrix goes over many arcs
+export function arc_transform(self: IArc, matrix: any, parts = matrix.decompose()) {
 	// const { arc, to, from } = self;
 	let { rx, ry, sweep, phi } = self;
 	// const p1ˈ = from.transform(matrix);
 	// const p2_ = to.transform(matrix);
-	const { rotate, scaleX, scaleY, skewX } = matrix.decompose();
+	const { rotate, scaleX, scaleY, skewX } = parts;
 	if (scaleX == scaleY && scaleX != 1) {
 		rx = rx * scaleX;
 		ry = ry * scaleX;
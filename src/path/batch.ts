@@ -0,0 +1,327 @@
+import { PathBuffer } from './pathbuffer.js';
+const { max, min, ceil } = Math;
+
+// fields of a result row
+const LENGTH = 0;
+const MIN_X = 1;
+const MIN_Y = 2;
+const MAX_X = 3;
+const MAX_Y = 4;
+// commands that draw, moves not counted, as PathLC counts segments
+const SEGMENTS = 5;
+const START_X = 6;
+const START_Y = 7;
+const END_X = 8;
+const END_Y = 9;
+const FIELDS = 10;
+
+// Path data end to end, as UTF-8, ends[i] the byte offset past the i-th
+export interface PackedPaths {
+    data: Uint8Array;
+    ends: Uint32Array;
+}
+
+export interface PathStats {
+    length: number;
+    bbox: [number, number, number, number];
+    segments: number;
+    start: [number, number];
+    end: [number, number];
+}
+
+export interface BatchOptions {
+    // workers in the pool, in thread if less than 2
+    threads?: number;
+    // total bytes under which the batch runs in thread
+    inline_below?: number;
+    // pieces per worker, smaller ones spread uneven paths better
+    chunks?: number;
+}
+
+function shared_bytes(n: number) {
+    return new Uint8Array(new SharedArrayBuffer(n));
+}
+
+function shared_copy<A extends Uint8Array | Uint32Array>(a: A): A {
+    if (a.buffer instanceof SharedArrayBuffer) {
+        return a;
+    }
+    const b = new (a.constructor as any)(new SharedArrayBuffer(a.byteLength));
+    b.set(a);
+    return b;
+}
+
+// PackedPaths in shared memory, copied there once if need be, as workers would get
+// a copy of anything else with every piece
+function packed_of(paths: Iterable<string> | PackedPaths): PackedPaths {
+    if (typeof paths != 'object' || !paths) {
+        throw new TypeError(`Expected path data strings or PackedPaths, not ${typeof paths}`);
+    } else if (!('ends' in paths)) {
+        return PathBatch.pack(paths);
+    }
+    const { data, ends } = paths;
+    if (!(data instanceof Uint8Array && ends instanceof Uint32Array)) {
+        throw new TypeError(`Expected PackedPaths of a Uint8Array and a Uint32Array`);
+    }
+    return { data: shared_copy(data), ends: shared_copy(ends) };
+}
+
+const decoder = new TextDecoder();
+
+// measures paths from up to to into their rows of results; a row of NaN if the path fails
+export function measure_range(data: Uint8Array, ends: Uint32Array, results: Float64Array, from: number, to: number) {
+    for (let i = from; i < to; ++i) {
+        const k = i * FIELDS;
+        try {
+            const p = PathBuffer.parse(decoder.decode(data.subarray(i > 0 ? ends[i - 1] : 0, ends[i])));
+            const { codes, coords } = p;
+            const b = p.bbox();
+            const n = coords.length;
+            let segments = 0;
+            for (let j = 0; j < codes.length; ++j) {
+                codes[j] == PathBuffer.MOVE || ++segments;
+            }
+            results[k + LENGTH] = p.length;
+            results[k + MIN_X] = b.min_x;
+            results[k + MIN_Y] = b.min_y;
+            results[k + MAX_X] = b.max_x;
+            results[k + MAX_Y] = b.max_y;
+            results[k + SEGMENTS] = segments;
+            results[k + START_X] = coords[0];
+            results[k + START_Y] = coords[1];
+            results[k + END_X] = coords[n - 2];
+            results[k + END_Y] = coords[n - 1];
+        } catch (err) {
+            results.fill(NaN, k, k + FIELDS);
+        }
+    }
+}
+
+interface Job {
+    message: any;
+    resolve: () => void;
+    reject: (err: any) => void;
+}
+
+// Workers idle between batches are unref'd, so they do not keep the process alive
+class Pool {
+    workers: any[] = [];
+    idle: any[] = [];
+    queue: Job[] = [];
+    busy = new Map<any, Job>();
+    // workers wanted, the ones past it go as soon as they are idle
+    size = 0;
+    make: () => any;
+    constructor(make: () => any) {
+        this.make = make;
+    }
+    static async start() {
+        const { Worker } = await import('worker_threads');
+        const url = new URL('./batchworker.js', import.meta.url);
+        return new Pool(() => new Worker(url));
+    }
+    resize(threads: number) {
+        this.size = threads;
+        while (this.workers.length < threads) {
+            this.add(this.make());
+        }
+        while (this.workers.length > threads && this.idle.length > 0) {
+            this.retire(this.idle.pop());
+        }
+        return this;
+    }
+    add(w: any) {
+        this.workers.push(w);
+        w.unref();
+        w.on('message', () => {
+            const job = this.busy.get(w);
+            if (job) {
+                this.busy.delete(w);
+                job.resolve();
+                this.next(w);
+            }
+        });
+        w.on('error', (err: any) => this.fail(err));
+        w.on('exit', (code: number) => this.busy.has(w) && this.fail(new Error(`Worker exited with ${code}`)));
+        this.next(w);
+    }
+    retire(w: any) {
+        this.workers.splice(this.workers.indexOf(w), 1);
+        w.terminate();
+    }
+    run(message: any) {
+        return new Promise<void>((resolve, reject) => {
+            this.queue.push({ message, resolve, reject });
+            const w = this.idle.pop();
+            w && this.next(w);
+        });
+    }
+    next(w: any) {
+        const job = this.workers.length > this.size ? undefined : this.queue.shift();
+        if (job) {
+            this.busy.set(w, job);
+            w.ref();
+            w.postMessage(job.message);
+        } else if (this.workers.length > this.size) {
+            this.retire(w);
+        } else {
+            w.unref();
+            this.idle.push(w);
+        }
+    }
+    fail(err: any) {
+        pool === this && (pool = undefined);
+        for (const job of [...this.busy.values(), ...this.queue]) {
+            job.reject(err);
+        }
+        this.busy.clear();
+        this.queue = [];
+        return this.close();
+    }
+    close() {
+        return Promise.all(this.workers.map(w => w.terminate()));
+    }
+}
+
+let pool: Pool | undefined;
+let pool_start: Promise<Pool> | undefined;
+
+// one pool, grown or shrunk to the threads each batch asks for
+async function get_pool(threads: number) {
+    const p =
+        pool ??
+        (await (pool_start ??= Pool.start()
+            .then(p => (pool = p))
+            .finally(() => (pool_start = undefined))));
+    return p.resize(threads);
+}
+
+// Length, bounding box, segment count and end points of many paths, into a shared Float64Array,
+// worked out on a pool of worker threads, or in thread for small batches
+export class PathBatch {
+    static LENGTH = LENGTH;
+    static MIN_X = MIN_X;
+    static MIN_Y = MIN_Y;
+    static MAX_X = MAX_X;
+    static MAX_Y = MAX_Y;
+    static SEGMENTS = SEGMENTS;
+    static START_X = START_X;
+    static START_Y = START_Y;
+    static END_X = END_X;
+    static END_Y = END_Y;
+    static FIELDS = FIELDS;
+    static threads = 0;
+    static inline_below = 1 << 16;
+    static chunks = 8;
+    readonly paths: PackedPaths;
+    readonly results: Float64Array;
+    constructor(paths: Iterable<string> | PackedPaths) {
+        this.paths = packed_of(paths);
+        const { length } = this.paths.ends;
+        this.results = new Float64Array(new SharedArrayBuffer(length * FIELDS * 8));
+    }
+    get size() {
+        return this.paths.ends.length;
+    }
+    // strings to PackedPaths in shared memory, which workers see without a copy
+    static pack(items: Iterable<string>): PackedPaths {
+        const list = Array.isArray(items) ? items : [...items];
+        const ends = new Uint32Array(new SharedArrayBuffer(list.length * 4));
+        let data = shared_bytes(list.reduce((n, d) => n + d.length, 0));
+        const enc = new TextEncoder();
+        let pos = 0;
+        list.forEach((d, i) => {
+            for (;;) {
+                const { read, written } = enc.encodeInto(d, data.subarray(pos));
+                if (read! >= d.length) {
+                    ends[i] = pos += written!;
+                    break;
+                }
+                // not ASCII, more bytes than characters
+                const more = shared_bytes(data.length + d.length * 3);
+                more.set(data.subarray(0, pos));
+                data = more;
+            }
+        });
+        return { data: data.subarray(0, pos), ends };
+    }
+    stats(i: number): PathStats {
+        const r = this.results.subarray(i * FIELDS, (i + 1) * FIELDS);
+        return {
+            length: r[LENGTH],
+            bbox: [r[MIN_X], r[MIN_Y], r[MAX_X], r[MAX_Y]],
+            segments: r[SEGMENTS],
+            start: [r[START_X], r[START_Y]],
+            end: [r[END_X], r[END_Y]],
+        };
+    }
+    // contiguous index ranges of about the same number of bytes
+    chunks(n: number) {
+        const { ends } = this.paths;
+        const size = ends.length;
+        const total = size > 0 ? ends[size - 1] : 0;
+        const step = max(1, ceil(total / max(1, n)));
+        const ranges: [number, number][] = [];
+        for (let from = 0; from < size; ) {
+            const base = from > 0 ? ends[from - 1] : 0;
+            let to = from + 1;
+            while (to < size && ends[to] - base <= step) {
+                ++to;
+            }
+            ranges.push([from, to]);
+            from = to;
+        }
+        return ranges;
+    }
+    // measures everything, yielding index ranges [from, to) in order as their results are in
+    async *run(opt: BatchOptions = {}): AsyncGenerator<[number, number]> {
+        const { paths, results } = this;
+        const { data, ends } = paths;
+        const total = ends.length > 0 ? ends[ends.length - 1] : 0;
+        const { inline_below = PathBatch.inline_below, chunks = PathBatch.chunks } = opt;
+        const threads = min(opt.threads ?? (PathBatch.threads || (await default_threads())), ends.length);
+        if (threads < 2 || total < inline_below) {
+            for (const [from, to] of this.chunks(chunks)) {
+                measure_range(data, ends, results, from, to);
+                yield [from, to];
+            }
+            return;
+        }
+        const ranges = this.chunks(threads * chunks);
+        const workers = await get_pool(threads);
+        const done = ranges.map(([from, to]) => workers.run({ data, ends, results, from, to }));
+        // failures surface in order, not as unhandled
+        done.forEach(p => p.catch(() => {}));
+        for (let i = 0; i < ranges.length; ++i) {
+            await done[i];
+            yield ranges[i];
+        }
+    }
+    async *[Symbol.asyncIterator](): AsyncGenerator<PathStats> {
+        for await (const [from, to] of this.run()) {
+            for (let i = from; i < to; ++i) {
+                yield this.stats(i);
+            }
+        }
+    }
+    static async measure(paths: Iterable<string> | PackedPaths, opt?: BatchOptions) {
+        const batch = new PathBatch(paths);
+        for await (const _ of batch.run(opt));
+        return batch;
+    }
+    // workers in the pool, 0 if none is running
+    static get pool_size() {
+        return pool?.workers.length ?? 0;
+    }
+    // ends the worker pool
+    static async close() {
+        const p = pool ?? (await pool_start);
+        pool = undefined;
+        await p?.close();
+    }
+}
+
+async function default_threads() {
+    const os = await import('os');
+    return os.availableParallelism?.() ?? os.cpus().length;
+}
@@ -0,0 +1,8 @@
+import { parentPort } from 'worker_threads';
+import { measure_range } from './batch.js';
+
+// runs PathBatch pieces; results go straight into the shared arrays
+parentPort!.on('message', ({ data, ends, results, from, to }) => {
+    measure_range(data, ends, results, from, to);
+    parentPort!.postMessage(to);
+});
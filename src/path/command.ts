@@ -2,8 +2,14 @@ import { DescParams, tCheck, tNorm } from './index.js';
 import { BoundingBox } from "../bbox.js";
 import { Vector } from "../vector.js";
 import { quad_split_at, quad_slope_at, quad_point_at, quad_bbox } from './quadhelp.js';
-import { quad_length } from './quadhelp.js';
-import { cubic_length, cubic_slope_at, cubic_point_at, cubic_box, cubic_split_at } from './cubichelp.js';
+import { quad_length, quad_speed } from './quadhelp.js';
+import { cubic_length, cubic_speed, cubic_slope_at, cubic_point_at, cubic_box, cubic_split_at } from './cubichelp.js';
+import { bezier_nearest_ts } from './cubichelp.js';
+import { LENGTH_TOLERANCE, gl_t_at_length } from './lengthhelp.js';
+import { PathParser, PathSink } from './parser.js';
+import { PathWriter, WriteParams } from './writer.js';
+import { Polyline } from './polyline.js';
+import { probe } from '../probe.js';
 const { min, max, abs, PI, cos, sin, sqrt, acos, tan } = Math;
 export abstract class Command {
 
@@ -11,17 +17,22 @@ export abstract class Command {
 function pos(p: Iterable<number>) {
     return Vector.pos(...p)
 }
+// p under the affine M, as [x, y]
+function under(p: Vector, M: any) {
+    const { a, b, c, d, e, f } = M;
+    const [x, y] = [p[0], p[1]];
+    return [a * x + c * y + e, b * x + d * y + f];
+}
 const tau = 2 * PI;
 const epsilon = 1e-6;
 const tauEpsilon = tau - epsilon;
 let digits = 6;
-function fmtN(n: number) {
-    const v = n.toFixed(digits);
-    return v.indexOf('.') < 0 ? v : v.replace(/0+$/g, '').replace(/\.$/g, '');
-}
 export abstract class BaseLC extends Command {
     _prev?: BaseLC;
     protected readonly _to: Vector;
+    // segments are immutable, so a curve's length and box are computed once
+    #length?: number;
+    #bbox?: BoundingBox;
     static get digits() {
         return digits;
     }
@@ -33,6 +44,12 @@ export abstract class BaseLC extends Command {
         this._prev = prev;
         this._to = to;
     }
+    protected cached_length(calc: () => number) {
+        return (this.#length ??= calc());
+    }
+    protected cached_bbox(calc: () => BoundingBox) {
+        return (this.#bbox ??= calc()).clone();
+    }
     get prev() {
         const { _prev } = this;
         if (_prev) {
@@ -72,9 +89,13 @@ export abstract class BaseLC extends Command {
     bbox() {
         return BoundingBox.not();
     }
+    // exact box of the segment transformed by M, without transforming it
+    bbox_under(_M: any) {
+        return BoundingBox.not();
+    }
 
     abstract split_at(t: number): [BaseLC, BaseLC];
-    abstract transform(M: any): BaseLC;
+    abstract with_transform(prev: BaseLC | undefined, M: any, parts?: any): BaseLC;
     abstract reversed(next?: BaseLC): BaseLC | undefined;
     abstract with_prev(prev: BaseLC | undefined): BaseLC;
     abstract point_at(t: number): Vector;
@@ -106,18 +127,92 @@ export abstract class BaseLC extends Command {
             return this.crop_at(t1, t0); // t0 >= 1
         }
     }
+    transform(M: any, parts?: any): BaseLC {
+        return probe ? probe.time('transform', () => this.#transform(M, parts)) : this.#transform(M, parts);
+    }
+    #transform(M: any, parts?: any): BaseLC {
+        // rebuilt from the head, without recursing down long paths
+        const segs: BaseLC[] = [];
+        for (let cur: BaseLC | undefined = this; cur; cur = cur._prev) {
+            segs.push(cur);
+        }
+        let prev: BaseLC | undefined;
+        for (let i = segs.length; i-- > 0; ) {
+            const seg = segs[i];
+            if (seg instanceof ArcLC) {
+                parts ??= M.decompose();
+            }
+            prev = seg.with_transform(prev, M, parts);
+        }
+        return prev!;
+    }
+    // the path up to here as a polyline no farther than tolerance from it
+    flatten(tolerance?: number, coords?: Float64Array | number) {
+        return new Polyline(tolerance, coords).segments(this);
+    }
     path_len(): number {
-        const { _prev } = this;
-        const len = this.segment_len();
-        return _prev ? _prev.path_len() + len : len;
+        // summed from the head, without recursing down long paths
+        const lens: number[] = [];
+        for (let cur: BaseLC | undefined = this; cur; cur = cur._prev) {
+            lens.push(cur.segment_len());
+        }
+        let len = 0;
+        for (let i = lens.length; i-- > 0; ) {
+            len += lens[i];
+        }
+        return len;
     }
     segment_len() {
         return this.length;
     }
+    length_at(t: number, _tolerance?: number): number {
+        t = tCheck(t);
+        return t <= 0 ? 0 : t >= 1 ? this.length : this.split_at(t)[0].length;
+    }
+    t_at_length(s: number, tolerance = LENGTH_TOLERANCE): number {
+        const len = this.length;
+        if (s <= 0 || !len) {
+            return 0;
+        } else if (s >= len) {
+            return 1;
+        }
+        let [lo, hi] = [0, 1];
+        while (hi - lo > tolerance) {
+            const t = (lo + hi) / 2;
+            if (this.length_at(t) < s) {
+                lo = t;
+            } else {
+                hi = t;
+            }
+        }
+        return (lo + hi) / 2;
+    }
     tangent_at(t: number) {
         const vec = this.slope_at(t);
         return vec.divide(vec.abs());
     }
+    //// Closest point
+    // t where the segment may be closest to (x, y), the ends among them
+    nearest_ts(_x: number, _y: number): number[] {
+        return [0, 1];
+    }
+    // t, point and distance of the point on the segment closest to p
+    nearest(p: Iterable<number>): [number, Vector, number] {
+        const [x, y] = p;
+        const { _prev, to } = this;
+        let [t, q, d2] = [1, to, (to[0] - x) ** 2 + (to[1] - y) ** 2];
+        if (_prev) {
+            for (const s of this.nearest_ts(x, y)) {
+                const v = s <= 0 ? _prev.to : s >= 1 ? to : this.point_at(s);
+                const e = (v[0] - x) ** 2 + (v[1] - y) ** 2;
+                e < d2 && ([t, q, d2] = [s, v, e]);
+            }
+        }
+        return [t, q, sqrt(d2)];
+    }
+    t_at_point(p: Iterable<number>) {
+        return this.nearest(p)[0];
+    }
     //// Add methods
     move_to(p: Iterable<number>) {
         return new MoveLC(this, pos(p));
@@ -185,11 +280,11 @@ export abstract class BaseLC extends Command {
             return [...this.term(opt)];
         }
     }
-    describe(opt?: DescParams): string {
-        const { _prev } = this;
-        const [cmd, ...args] = this.term(opt);
-        const d = `${cmd}${args.map(v => fmtN(v as number)).join(',')}`;
-        return _prev ? _prev.describe(opt) + d : d;
+    describe(opt?: WriteParams): string {
+        if (probe) {
+            return probe.time('describe', () => new PathWriter(opt).path(this).end());
+        }
+        return new PathWriter(opt).path(this).end();
     }
 
     ////// etc method
@@ -345,7 +440,7 @@ export abstract class BaseLC extends Command {
         return arc_tangent_to(undefined, p1, p2, r);
     }
     static parse(d: string) {
-        return parse(d, undefined);
+        return probe ? probe.time('parse', () => parse(d)) : parse(d);
     }
     static bezierCurveTo(cx1: number, cy1: number, cx2: number, cy2: number, px2: number, py2: number) {
         return this.curve_to([cx1, cy1], [cx2, cy2], [px2, py2]);
@@ -371,6 +466,15 @@ export class LineCL extends BaseLC {
         }
         return BoundingBox.not();
     }
+    override bbox_under(M: any) {
+        const { to, _prev } = this;
+        if (_prev) {
+            const [x1, y1] = under(_prev.to, M);
+            const [x2, y2] = under(to, M);
+            return BoundingBox.extrema([min(x1, x2), max(x1, x2)], [min(y1, y2), max(y1, y2)]);
+        }
+        return BoundingBox.not();
+    }
     override get length() {
         const { from, to } = this;
         return to.subtract(from).abs();
@@ -384,6 +488,13 @@ export class LineCL extends BaseLC {
         const vec = to.subtract(from);
         return vec.divide(vec.abs());
     }
+    override nearest_ts(x: number, y: number) {
+        const [x1, y1] = this.from;
+        const [x2, y2] = this.to;
+        const [dx, dy] = [x2 - x1, y2 - y1];
+        const d2 = dx * dx + dy * dy;
+        return [d2 > 0 ? min(1, max(0, ((x - x1) * dx + (y - y1) * dy) / d2)) : 0];
+    }
     override split_at(t: number): [BaseLC, BaseLC] {
         const { to } = this;
         const c = this.point_at(t);
@@ -429,9 +540,8 @@ export class LineCL extends BaseLC {
             return next;
         }
     }
-    override transform(M: any) {
-        const { to, _prev } = this;
-        return new LineCL(_prev?.transform(M), to.transform(M));
+    override with_transform(prev: BaseLC | undefined, M: any) {
+        return new LineCL(prev, this.to.transform(M));
     }
     override with_prev(newPrev: BaseLC | undefined) {
         const { to } = this;
@@ -461,9 +571,8 @@ export class MoveLC extends LineCL {
         const c = this.point_at(t);
         return [new MoveLC(this._prev, c), new MoveLC(new MoveLC(undefined, c), to)];
     }
-    override transform(M: any) {
-        const { to, _prev } = this;
-        return new MoveLC(_prev?.transform(M), to.transform(M));
+    override with_transform(prev: BaseLC | undefined, M: any) {
+        return new MoveLC(prev, this.to.transform(M));
     }
     override reversed(next?: BaseLC): BaseLC | undefined {
         const { _prev } = this;
@@ -481,6 +590,9 @@ export class MoveLC extends LineCL {
     override segment_len() {
         return 0;
     }
+    override nearest_ts(_x: number, _y: number) {
+        return [1];
+    }
 }
 export class CloseLC extends LineCL {
     override split_at(t: number): [BaseLC, BaseLC] {
@@ -488,9 +600,8 @@ export class CloseLC extends LineCL {
         const c = this.point_at(t);
         return [new LineCL(this._prev, c), new CloseLC(new MoveLC(undefined, c), to)];
     }
-    override transform(M: any) {
-        const { to, _prev } = this;
-        return new CloseLC(_prev?.transform(M), to.transform(M));
+    override with_transform(prev: BaseLC | undefined, M: any) {
+        return new CloseLC(prev, this.to.transform(M));
     }
     override term(opt?: DescParams) {
         if (opt) {
@@ -529,7 +640,13 @@ export class QuadLC extends BaseLC {
         return [from, p, to];
     }
     override get length() {
-        return quad_length(this._qpts);
+        return this.cached_length(() => quad_length(this._qpts));
+    }
+    override length_at(t: number, _tolerance?: number) {
+        return quad_length(this._qpts, tCheck(t));
+    }
+    override t_at_length(s: number, tolerance?: number) {
+        return gl_t_at_length(quad_speed(this._qpts), s, this.length, tolerance);
     }
     override slope_at(t: number): Vector {
         return quad_slope_at(this._qpts, tCheck(t));
@@ -537,13 +654,21 @@ export class QuadLC extends BaseLC {
     override point_at(t: number) {
         return quad_point_at(this._qpts, tCheck(t));
     }
+    override nearest_ts(x: number, y: number) {
+        const [[x1, y1], [cx, cy], [x2, y2]] = this._qpts;
+        return bezier_nearest_ts([x1, cx, x2], [y1, cy, y2], x, y);
+    }
     override split_at(t: number): [BaseLC, BaseLC] {
         const [a, b] = quad_split_at(this._qpts, tCheck(t));
         return [new QuadLC(this._prev, a[1], a[2]), new QuadLC(new MoveLC(undefined, b[0]), b[1], b[2])];
     }
     override bbox() {
         const { _prev } = this;
-        return _prev ? quad_bbox(this._qpts) : BoundingBox.not();
+        return _prev ? this.cached_bbox(() => quad_bbox(this._qpts)) : BoundingBox.not();
+    }
+    override bbox_under(M: any) {
+        const { p, to, _prev } = this;
+        return _prev ? quad_bbox([under(_prev.to, M), under(p, M), under(to, M)]) : BoundingBox.not();
     }
     override term(opt?: DescParams) {
         const {
@@ -574,9 +699,9 @@ export class QuadLC extends BaseLC {
             return next;
         }
     }
-    override transform(M: any) {
-        const { p, to, _prev } = this;
-        return new QuadLC(_prev?.transform(M), p.transform(M), to.transform(M));
+    override with_transform(prev: BaseLC | undefined, M: any) {
+        const { p, to } = this;
+        return new QuadLC(prev, p.transform(M), to.transform(M));
     }
     override with_prev(prev: BaseLC | undefined) {
         const { p, to } = this;
@@ -599,9 +724,17 @@ export class CubicLC extends BaseLC {
     override point_at(t: number) {
         return Vector.new(cubic_point_at(this._cpts, tCheck(t)));
     }
+    override nearest_ts(x: number, y: number) {
+        const [[x1, y1], [a, b], [c, d], [x2, y2]] = this._cpts;
+        return bezier_nearest_ts([x1, a, c, x2], [y1, b, d, y2], x, y);
+    }
     override bbox() {
         const { _prev } = this;
-        return _prev ? cubic_box(this._cpts) : BoundingBox.not();
+        return _prev ? this.cached_bbox(() => cubic_box(this._cpts)) : BoundingBox.not();
+    }
+    override bbox_under(M: any) {
+        const { c1, c2, to, _prev } = this;
+        return _prev ? cubic_box([under(_prev.to, M), under(c1, M), under(c2, M), under(to, M)]) : BoundingBox.not();
     }
     override slope_at(t: number): Vector {
         return cubic_slope_at(this._cpts, tCheck(t));
@@ -615,7 +748,13 @@ export class CubicLC extends BaseLC {
         ];
     }
     override get length() {
-        return cubic_length(this._cpts);
+        return this.cached_length(() => cubic_length(this._cpts));
+    }
+    override length_at(t: number, tolerance?: number) {
+        return cubic_length(this._cpts, 0, tCheck(t), tolerance);
+    }
+    override t_at_length(s: number, tolerance?: number) {
+        return gl_t_at_length(cubic_speed(this._cpts), s, this.length, tolerance);
     }
     override reversed(next?: BaseLC): BaseLC | undefined {
         const { to, c1, c2, _prev } = this;
@@ -627,9 +766,9 @@ export class CubicLC extends BaseLC {
             return next;
         }
     }
-    override transform(M: any) {
-        const { c1, c2, to, _prev } = this;
-        return new CubicLC(_prev?.transform(M), c1.transform(M), c2.transform(M), to.transform(M));
+    override with_transform(prev: BaseLC | undefined, M: any) {
+        const { c1, c2, to } = this;
+        return new CubicLC(prev, c1.transform(M), c2.transform(M), to.transform(M));
     }
     override term(opt?: DescParams) {
         const {
@@ -659,8 +798,8 @@ export class CubicLC extends BaseLC {
     }
 }
 
-import { arc_bbox, arc_length, arc_point_at, arc_slope_at, arc_transform } from './archelp.js';
-import { arc_params, arc_to_curve } from './archelp.js';
+import { arc_bbox, arc_bbox_under, arc_length, arc_t_at_length, arc_point_at, arc_slope_at, arc_transform } from './archelp.js';
+import { arc_params, arc_to_curve, arc_nearest_ts } from './archelp.js';
 export class ArcLC extends BaseLC {
     readonly rx: number;
     readonly ry: number;
@@ -701,14 +840,27 @@ export class ArcLC extends BaseLC {
     }
     override bbox() {
         const { _prev } = this;
-        return _prev ? arc_bbox(this) : BoundingBox.not();
+        return _prev ? this.cached_bbox(() => arc_bbox(this)) : BoundingBox.not();
+    }
+    override bbox_under(M: any) {
+        const { _prev } = this;
+        return _prev ? arc_bbox_under(this, M) : BoundingBox.not();
     }
     override get length() {
-        return arc_length(this);
+        return this.cached_length(() => arc_length(this));
+    }
+    override length_at(t: number, tolerance?: number) {
+        return arc_length(this, 0, tCheck(t), tolerance);
+    }
+    override t_at_length(s: number, tolerance?: number) {
+        return arc_t_at_length(this, s, tolerance);
     }
     override point_at(t: number) {
         return arc_point_at(this, tCheck(t));
     }
+    override nearest_ts(x: number, y: number) {
+        return arc_nearest_ts(this, x, y);
+    }
     override slope_at(t: number): Vector {
         return arc_slope_at(this, tCheck(t));
     }
@@ -721,10 +873,10 @@ export class ArcLC extends BaseLC {
             new ArcLC(new MoveLC(undefined, mid), rx, ry, phi, deltaA * (1 - t) > PI, sweep, to),
         ];
     }
-    override transform(M: any) {
-        const { bigArc, to, _prev } = this;
-        const [rx, ry, phi, sweep] = arc_transform(this, M);
-        return new ArcLC(_prev?.transform(M), rx, ry, phi, bigArc, sweep, to.transform(M));
+    override with_transform(prev: BaseLC | undefined, M: any, parts?: any) {
+        const { bigArc, to } = this;
+        const [rx, ry, phi, sweep] = arc_transform(this, M, parts);
+        return new ArcLC(prev, rx, ry, phi, bigArc, sweep, to.transform(M));
     }
     override reversed(next?: BaseLC): BaseLC | undefined {
         const { rx, ry, phi, bigArc, sweep, to, _prev } = this;
@@ -782,108 +934,31 @@ export class ArcLC extends BaseLC {
     }
 }
 
-function parse(d: string, prev: BaseLC | undefined): BaseLC {
-    let mat: RegExpExecArray | null;
-    const dRE = /[\s,]*(?:([MmZzLlHhVvCcSsQqTtAa])|([-+]?[0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?))/y;
-    const peek = function () {
-        const i = dRE.lastIndex;
-        const m = dRE.exec(d);
-        dRE.lastIndex = i;
-        return m;
-    };
-    const get = function () {
-        const m = dRE.exec(d);
-        return m;
-    };
-    const cmd = function () {
-        const m = get();
-        if (m) {
-            const v = m[1];
-            if (v) {
-                return v;
-            }
-            throw new Error(`Command expected '${v}' '${d}'`);
-        }
-    };
-    const num = function () {
-        const v = get()?.[2];
-        if (v) {
-            return parseFloat(v);
-        }
-        throw new Error(`Number expected '${v}' '${d}'`);
-    };
-    const isNum = () => peek()?.[2];
-    const vec = () => Vector.pos(num(), num());
-    const first = BaseLC.move_to([0, 0]);
-    let cur: BaseLC = prev ?? first;
-    let command;
-    while ((command = cmd())) {
-        switch (command) {
-            case 'M':
-                cur = cur === first ? BaseLC.move_to(vec()) : cur.M(vec());
-                while (isNum() && (cur = cur.L(vec())));
-                break;
-            case 'm':
-                cur = cur === first ? BaseLC.move_to(vec()) : cur.m(vec());
-                while (isNum() && (cur = cur.l(vec())));
-                break;
-            case 'Z':
-            case 'z':
-                cur === first || (cur = cur.Z());
-                break;
-            case 'L':
-                while ((cur = cur.L(vec())) && isNum());
-                break;
-            case 'l':
-                while ((cur = cur.l(vec())) && isNum());
-                break;
-            case 'H':
-                while ((cur = cur.H(num())) && isNum());
-                break;
-            case 'h':
-                while ((cur = cur.h(num())) && isNum());
-                break;
-            case 'V':
-                while ((cur = cur.V(num())) && isNum());
-                break;
-            case 'v':
-                while ((cur = cur.v(num())) && isNum());
-                break;
-            case 'Q':
-                while ((cur = cur.Q(vec(), vec())) && isNum());
-                break;
-            case 'q':
-                while ((cur = cur.q(vec(), vec())) && isNum());
-                break;
-            case 'C':
-                while ((cur = cur.C(vec(), vec(), vec())) && isNum());
-                break;
-            case 'c':
-                while ((cur = cur.c(vec(), vec(), vec())) && isNum());
-                break;
-            case 'S':
-                while ((cur = cur.S(vec(), vec())) && isNum());
-                break;
-            case 's':
-                while ((cur = cur.s(vec(), vec())) && isNum());
-                break;
-            case 'T':
-                while ((cur = cur.T(vec())) && isNum());
-                break;
-            case 't':
-                while ((cur = cur.t(vec())) && isNum());
-                break;
-            case 'A':
-                while ((cur = cur.A(num(), num(), num(), num(), num(), vec())) && isNum());
-                break;
-            case 'a':
-                while ((cur = cur.a(num(), num(), num(), num(), num(), vec())) && isNum());
-                break;
-            default:
-                throw new Error(`Invalid path command ${command} from "${d}"`);
-        }
+// builds the segment chain
+export class SegmentSink implements PathSink {
+    tail?: BaseLC;
+    move_to(x: number, y: number) {
+        this.tail = new MoveLC(this.tail, Vector.pos(x, y));
     }
-    return cur;
+    line_to(x: number, y: number) {
+        this.tail = new LineCL(this.tail, Vector.pos(x, y));
+    }
+    close_to(x: number, y: number) {
+        this.tail = new CloseLC(this.tail, Vector.pos(x, y));
+    }
+    quad_to(cx: number, cy: number, x: number, y: number) {
+        this.tail = new QuadLC(this.tail, Vector.pos(cx, cy), Vector.pos(x, y));
+    }
+    curve_to(x1: number, y1: number, x2: number, y2: number, x: number, y: number) {
+        this.tail = new CubicLC(this.tail, Vector.pos(x1, y1), Vector.pos(x2, y2), Vector.pos(x, y));
+    }
+    arc_to(rx: number, ry: number, φ: number, bigArc: number, sweep: number, x: number, y: number) {
+        this.tail = new ArcLC(this.tail, rx, ry, φ, bigArc, sweep, Vector.pos(x, y));
+    }
+}
+
+function parse(d: string): BaseLC {
+    return new PathParser(new SegmentSink()).write(d).end().tail!;
 }
 
 function arc_centered_at(cur: BaseLC | undefined, c: Iterable<number>, radius: number, startAngle: number, endAngle: number, counterclockwise = false): BaseLC {
@@ -1,5 +1,6 @@
 import { BoundingBox } from '../bbox.js';
 import { Vector } from '../vector.js';
+import { gl_length, SpeedFn } from './lengthhelp.js';
 
 export function cubic_extrema(s: number, a: number, b: number, e: number) {
     //  Returns the extreme value, given a set of bezier coordinates
@@ -46,21 +47,6 @@ export function cubic_extrema(s: number, a: number, b: number, e: number) {
 export function cubic_box([[sx, sy], [x1, y1], [x2, y2], [ex, ey]]: Iterable<Iterable<number>>) {
     return BoundingBox.extrema(cubic_extrema(sx, x1, x2, ex), cubic_extrema(sy, y1, y2, ey));
 }
-const { pow } = Math;
-function cubic_flatness([[sx, sy], [x1, y1], [x2, y2], [ex, ey]]: Iterable<number>[]) {
-    let ux = pow(3 * x1 - 2 * sx - ex, 2);
-    let uy = pow(3 * y1 - 2 * sy - ey, 2);
-    const vx = pow(3 * x2 - 2 * ex - sx, 2);
-    const vy = pow(3 * y2 - 2 * ey - sy, 2);
-    if (ux < vx) {
-        ux = vx;
-    }
-    if (uy < vy) {
-        uy = vy;
-    }
-    return ux + uy;
-}
-
 export function cubic_point_at([[sx, sy], [x1, y1], [x2, y2], [ex, ey]]: Iterable<number>[], t: number) {
     const F = 1 - t;
     return [
@@ -109,13 +95,118 @@ export function cubic_slope_at([from, c1, c2, to]: Vector[], t: number): Vector
     }
 }
 
-export function cubic_length(_cpts: Iterable<number>[]): number {
-    if (cubic_flatness(_cpts) > 0.15) {
-        const [a, b] = cubic_split_at(_cpts, 0.5);
-        return cubic_length(a) + cubic_length(b);
-    } else {
-        const [from, , , to] = _cpts;
-        return (new Vector(to)).subtract(from).abs();
+// |B'(t)| with B'(t) = a t² + b t + c
+export function cubic_speed([[sx, sy], [x1, y1], [x2, y2], [ex, ey]]: Iterable<number>[]): SpeedFn {
+    const ax = 3 * (ex - 3 * x2 + 3 * x1 - sx);
+    const ay = 3 * (ey - 3 * y2 + 3 * y1 - sy);
+    const bx = 6 * (x2 - 2 * x1 + sx);
+    const by = 6 * (y2 - 2 * y1 + sy);
+    const cx = 3 * (x1 - sx);
+    const cy = 3 * (y1 - sy);
+    return (t: number) => {
+        const dx = (ax * t + bx) * t + cx;
+        const dy = (ay * t + by) * t + cy;
+        return Math.sqrt(dx * dx + dy * dy);
+    };
+}
+
+export function cubic_length(_cpts: Iterable<number>[], t0 = 0, t1 = 1, tolerance?: number): number {
+    return gl_length(cubic_speed(_cpts), t0, t1, tolerance);
+}
+
+
+// c[0] + c[1] t + c[2] t² + ... at t
+export function poly_at(c: ArrayLike<number>, t: number) {
+    let v = 0;
+    for (let i = c.length; i-- > 0; ) {
+        v = v * t + c[i];
+    }
+    return v;
+}
+
+// Bezier coordinates of degree up to 3 as power coefficients, c[0] + c[1] t + ...
+export function bezier_coefs(p: number[]) {
+    switch (p.length) {
+        case 2:
+            return [p[0], p[1] - p[0]];
+        case 3:
+            return [p[0], 2 * (p[1] - p[0]), p[2] - 2 * p[1] + p[0]];
+        case 4:
+            return [p[0], 3 * (p[1] - p[0]), 3 * (p[2] - 2 * p[1] + p[0]), p[3] - 3 * p[2] + 3 * p[1] - p[0]];
     }
+    throw new Error(`Unexpected degree ${p.length - 1}`);
 }
 
+export function poly_mul(a: number[], b: number[]) {
+    const c = new Array(a.length + b.length - 1).fill(0);
+    a.forEach((u, i) => b.forEach((v, j) => (c[i + j] += u * v)));
+    return c;
+}
+
+// t where a Bezier, x and y control points apart, may be closest to (x, y):
+// the ends and the roots of (B(t) - p)⋅B'(t)
+export function bezier_nearest_ts(xs: number[], ys: number[], x: number, y: number) {
+    const X = bezier_coefs(xs);
+    const Y = bezier_coefs(ys);
+    X[0] -= x;
+    Y[0] -= y;
+    const dX = X.slice(1).map((v, i) => v * (i + 1));
+    const dY = Y.slice(1).map((v, i) => v * (i + 1));
+    const gy = poly_mul(Y, dY);
+    const g = poly_mul(X, dX).map((v, i) => v + gy[i]);
+    return [0, 1, ...poly_roots(g)];
+}
+
+// Real roots in [lo, hi] of a polynomial, ascending: the roots of its derivative split the range
+// into monotone pieces, each bisected where it changes sign
+export function poly_roots(c: ArrayLike<number>, lo = 0, hi = 1): number[] {
+    let n = c.length - 1;
+    while (n > 0 && c[n] == 0) {
+        --n;
+    }
+    if (n <= 0) {
+        return [];
+    } else if (n == 1) {
+        const t = -c[0] / c[1];
+        return lo <= t && t <= hi ? [t] : [];
+    }
+    const d = [];
+    for (let i = 1; i <= n; ++i) {
+        d.push(i * c[i]);
+    }
+    const stops = [lo, ...poly_roots(d, lo, hi), hi];
+    const roots: number[] = [];
+    const push = (t: number) => (roots.length > 0 && roots[roots.length - 1] == t) || roots.push(t);
+    let fa = poly_at(c, lo);
+    for (let i = 1; i < stops.length; ++i) {
+        let [a, b] = [stops[i - 1], stops[i]];
+        const fb = poly_at(c, b);
+        if (fa == 0) {
+            push(a);
+        } else if (fb != 0 && fa < 0 != fb < 0) {
+            let fl = fa;
+            for (;;) {
+                const m = (a + b) / 2;
+                if (m <= a || m >= b) {
+                    break;
+                }
+                const fm = poly_at(c, m);
+                if (fm == 0) {
+                    a = b = m;
+                } else if (fm < 0 == fl < 0) {
+                    [a, fl] = [m, fm];
+                } else {
+                    b = m;
+                }
+            }
+            push(abs_min(c, a, b));
+        }
+        fa = fb;
+    }
+    fa == 0 && push(hi);
+    return roots;
+}
+
+function abs_min(c: ArrayLike<number>, a: number, b: number) {
+    return Math.abs(poly_at(c, a)) <= Math.abs(poly_at(c, b)) ? a : b;
+}
@@ -0,0 +1,149 @@
+import { PathBuffer } from './pathbuffer.js';
+
+// Something to draw on with canvas calls, as PathLC is
+interface GlyphTarget {
+    moveTo(x: number, y: number): unknown;
+    lineTo(x: number, y: number): unknown;
+    quadraticCurveTo(cx: number, cy: number, x: number, y: number): unknown;
+    bezierCurveTo(x1: number, y1: number, x2: number, y2: number, x: number, y: number): unknown;
+    closePath(): unknown;
+}
+
+export interface TextOptions {
+    kerning?: boolean;
+    tracking?: number;
+    letterSpacing?: number;
+    hinting?: boolean;
+}
+
+// A glyph's outline in font units, y up, as opentype.js has it
+export interface GlyphOutline {
+    path: PathBuffer;
+    units: number;
+}
+
+const fonts = new WeakMap<object, GlyphCache>();
+
+function outline_of(glyph: any): GlyphOutline {
+    const { MOVE, LINE, CLOSE, QUAD, CUBIC } = PathBuffer;
+    const { commands, unitsPerEm } = glyph.path;
+    const codes: number[] = [];
+    const coords: number[] = [];
+    let [mx, my] = [0, 0];
+    for (const cmd of commands) {
+        switch (cmd.type) {
+            case 'M':
+                codes.push(MOVE);
+                coords.push((mx = cmd.x), (my = cmd.y));
+                break;
+            case 'L':
+                codes.push(LINE);
+                coords.push(cmd.x, cmd.y);
+                break;
+            case 'Q':
+                codes.push(QUAD);
+                coords.push(cmd.x1, cmd.y1, cmd.x, cmd.y);
+                break;
+            case 'C':
+                codes.push(CUBIC);
+                coords.push(cmd.x1, cmd.y1, cmd.x2, cmd.y2, cmd.x, cmd.y);
+                break;
+            case 'Z':
+                codes.push(CLOSE);
+                coords.push(mx, my);
+                break;
+        }
+    }
+    return {
+        path: new PathBuffer(Uint8Array.from(codes), Float64Array.from(coords), new Float64Array(0)),
+        units: unitsPerEm || 1000,
+    };
+}
+
+// Glyph outlines of one font, the least recently used dropped past limit
+export class GlyphCache {
+    static limit = 1024;
+    readonly font: any;
+    readonly limit: number;
+    #outlines = new Map<number, GlyphOutline>();
+    hits = 0;
+    misses = 0;
+    constructor(font: any, limit = GlyphCache.limit) {
+        this.font = font;
+        this.limit = limit;
+    }
+    get size() {
+        return this.#outlines.size;
+    }
+    static of(font: any) {
+        let cache = fonts.get(font);
+        if (!cache) {
+            fonts.set(font, (cache = new GlyphCache(font)));
+        }
+        return cache;
+    }
+    outline(glyph: any) {
+        const map = this.#outlines;
+        const key = glyph.index;
+        let v = map.get(key);
+        if (v) {
+            ++this.hits;
+            // most recent last
+            map.delete(key);
+        } else {
+            ++this.misses;
+            v = outline_of(glyph);
+            map.size >= this.limit && map.delete(map.keys().next().value!);
+        }
+        map.set(key, v);
+        return v;
+    }
+    clear() {
+        this.#outlines.clear();
+        this.hits = this.misses = 0;
+    }
+    // what font.getPath(text, x, y, fontSize, options).draw(ctx) draws, with the outlines from here;
+    // returns where the text ends
+    draw(ctx: GlyphTarget, text: string, x: number, y: number, fontSize: number, options: TextOptions) {
+        const { font } = this;
+        if (options.hinting) {
+            font.getPath(text, x, y, fontSize, options).draw(ctx);
+            return x + font.getAdvanceWidth(text, fontSize, options);
+        }
+        const { MOVE, LINE, CLOSE, QUAD, CUBIC } = PathBuffer;
+        return font.forEachGlyph(text, x, y, fontSize, options, (glyph: any, gX: number, gY: number, gFontSize: number) => {
+            const {
+                path: { codes, coords },
+                units,
+            } = this.outline(glyph);
+            const s = (1 / units) * gFontSize;
+            // as glyph.getPath places each point
+            const X = (k: number) => gX + coords[k] * s;
+            const Y = (k: number) => gY + -coords[k + 1] * s;
+            for (let i = 0, k = 0; i < codes.length; ++i) {
+                switch (codes[i]) {
+                    case MOVE:
+                        ctx.moveTo(X(k), Y(k));
+                        k += 2;
+                        break;
+                    case LINE:
+                        ctx.lineTo(X(k), Y(k));
+                        k += 2;
+                        break;
+                    case QUAD:
+                        ctx.quadraticCurveTo(X(k), Y(k), X(k + 2), Y(k + 2));
+                        k += 4;
+                        break;
+                    case CUBIC:
+                        ctx.bezierCurveTo(X(k), Y(k), X(k + 2), Y(k + 2), X(k + 4), Y(k + 4));
+                        k += 6;
+                        break;
+                    case CLOSE:
+                        ctx.closePath();
+                        k += 2;
+                        break;
+                }
+            }
+        });
+    }
+}
@@ -0,0 +1,296 @@
+import { BoundingBox } from '../bbox.js';
+import { Vector } from '../vector.js';
+import { BaseLC, MoveLC, LineCL, CloseLC, QuadLC, CubicLC, ArcLC } from './command.js';
+import { PathLC } from './pathlc.js';
+import { PathBuffer } from './pathbuffer.js';
+import { PathParser, PathSink } from './parser.js';
+import { WriteParams } from './writer.js';
+import { arc_params } from './archelp.js';
+const { min, max, abs, sqrt, cos, sin, PI } = Math;
+
+// arc as written: rx, ry, φ, bigArc, sweep; solved only when its geometry is needed
+const RAW_STRIDE = 5;
+
+interface Tokens {
+    codes: Uint8Array;
+    coords: Float64Array;
+    arcs: Float64Array;
+}
+
+class TokenSink implements PathSink {
+    codes = new Uint8Array(8);
+    coords = new Float64Array(16);
+    arcs = new Float64Array(RAW_STRIDE);
+    n = 0;
+    m = 0;
+    r = 0;
+    push(code: number, ...v: number[]) {
+        let { codes, coords, n, m } = this;
+        if (n >= codes.length) {
+            (this.codes = new Uint8Array(n * 2)).set(codes);
+        }
+        if (m + v.length > coords.length) {
+            (this.coords = new Float64Array((m + v.length) * 2)).set(coords);
+        }
+        this.codes[n] = code;
+        this.coords.set(v, m);
+        this.n = n + 1;
+        this.m = m + v.length;
+        return this;
+    }
+    move_to(x: number, y: number) {
+        return this.push(PathBuffer.MOVE, x, y);
+    }
+    line_to(x: number, y: number) {
+        return this.push(PathBuffer.LINE, x, y);
+    }
+    close_to(x: number, y: number) {
+        return this.push(PathBuffer.CLOSE, x, y);
+    }
+    quad_to(cx: number, cy: number, x: number, y: number) {
+        return this.push(PathBuffer.QUAD, cx, cy, x, y);
+    }
+    curve_to(x1: number, y1: number, x2: number, y2: number, x: number, y: number) {
+        return this.push(PathBuffer.CUBIC, x1, y1, x2, y2, x, y);
+    }
+    arc_to(rx: number, ry: number, φ: number, bigArc: boolean | number, sweep: boolean | number, x: number, y: number) {
+        if (!(isFinite(φ) && isFinite(rx) && isFinite(ry))) throw Error(`${JSON.stringify([rx, ry, φ, bigArc, sweep, x, y])}`);
+        const { arcs, r } = this;
+        if (r + RAW_STRIDE > arcs.length) {
+            (this.arcs = new Float64Array((r + RAW_STRIDE) * 2)).set(arcs);
+        }
+        this.arcs.set([rx, ry, φ, bigArc ? 1 : 0, sweep ? 1 : 0], r);
+        this.r = r + RAW_STRIDE;
+        return this.push(PathBuffer.ARC, x, y);
+    }
+    finish(): Tokens {
+        const { codes, coords, arcs, n, m, r } = this;
+        return { codes: codes.slice(0, n), coords: coords.slice(0, m), arcs: arcs.slice(0, r) };
+    }
+}
+
+// A path kept as its path data, or as commands and coordinates once asked about,
+// with arcs solved and segments made only for what needs exact geometry
+export class LazyPath {
+    #d?: string;
+    #tokens?: Tokens;
+    #buffer?: PathBuffer;
+    // coordinate and arc offsets of each command
+    #offsets?: [Uint32Array, Uint32Array];
+    constructor(d: string) {
+        this.#d = d;
+    }
+    static parse(d: string) {
+        return new this(d);
+    }
+    static from(path: PathBuffer | PathLC | BaseLC | undefined) {
+        const buf = path instanceof PathBuffer ? path : PathBuffer.from(path);
+        const { codes, coords, arcs } = buf;
+        const { ARC_STRIDE } = PathBuffer;
+        const raw = new Float64Array((arcs.length / ARC_STRIDE) * RAW_STRIDE);
+        for (let r = 0, a = 0; r < arcs.length; r += ARC_STRIDE, a += RAW_STRIDE) {
+            raw.set([arcs[r + 1], arcs[r + 2], arcs[r], arcs[r + 9], arcs[r + 10]], a);
+        }
+        const lazy = new this('');
+        lazy.#d = undefined;
+        lazy.#tokens = { codes, coords, arcs: raw };
+        lazy.#buffer = buf;
+        return lazy;
+    }
+    get tokens() {
+        return (this.#tokens ??= new PathParser(new TokenSink()).write(this.#d!).end().finish());
+    }
+    // the same path with every arc solved, made once
+    get buffer() {
+        return (this.#buffer ??= solve(this.tokens));
+    }
+    get is_solved() {
+        return !!this.#buffer;
+    }
+    //// Answered from the commands
+    get size() {
+        return this.tokens.codes.length;
+    }
+    get arcs() {
+        return this.tokens.arcs.length / RAW_STRIDE;
+    }
+    get subpaths() {
+        const { codes } = this.tokens;
+        const { MOVE } = PathBuffer;
+        let n = 0;
+        for (let i = 0; i < codes.length; ++i) {
+            codes[i] == MOVE && ++n;
+        }
+        return n;
+    }
+    get from() {
+        const { coords } = this.tokens;
+        if (coords.length > 0) {
+            return Vector.pos(coords[0], coords[1]);
+        }
+    }
+    get to() {
+        const { coords } = this.tokens;
+        const n = coords.length;
+        if (n > 0) {
+            return Vector.pos(coords[n - 2], coords[n - 1]);
+        }
+    }
+    // a box holding the path: that of the points and control points,
+    // grown about each arc's chord by the reach of its radii
+    hull() {
+        const { codes, coords, arcs } = this.tokens;
+        const { ARC, STRIDE } = PathBuffer;
+        let [x0, x1, y0, y1] = [Infinity, -Infinity, Infinity, -Infinity];
+        for (let k = 0; k < coords.length; k += 2) {
+            const [x, y] = [coords[k], coords[k + 1]];
+            [x0, x1, y0, y1] = [min(x0, x), max(x1, x), min(y0, y), max(y1, y)];
+        }
+        for (let i = 1, k = 2, a = 0; i < codes.length; k += STRIDE[codes[i++]]) {
+            if (codes[i] == ARC) {
+                const [sx, sy, ex, ey] = [coords[k - 2], coords[k - 1], coords[k], coords[k + 1]];
+                const d = arc_reach(sx, sy, ex, ey, arcs[a], arcs[a + 1], arcs[a + 2]);
+                const [mx, my] = [(sx + ex) / 2, (sy + ey) / 2];
+                [x0, x1, y0, y1] = [min(x0, mx - d), max(x1, mx + d), min(y0, my - d), max(y1, my + d)];
+                a += RAW_STRIDE;
+            }
+        }
+        return x0 > x1 ? BoundingBox.not() : BoundingBox.extrema([x0, x1], [y0, y1]);
+    }
+    // transformed, without solving anything unless there are arcs
+    transform(M: any) {
+        const { codes, coords, arcs } = this.tokens;
+        if (arcs.length > 0) {
+            return LazyPath.from(this.buffer.transform(M));
+        }
+        const { a, b, c, d, e, f } = M;
+        const to = new Float64Array(coords.length);
+        for (let k = 0; k < coords.length; k += 2) {
+            const [x, y] = [coords[k], coords[k + 1]];
+            to[k] = a * x + c * y + e;
+            to[k + 1] = b * x + d * y + f;
+        }
+        const lazy = new LazyPath('');
+        lazy.#d = undefined;
+        lazy.#tokens = { codes, coords: to, arcs };
+        return lazy;
+    }
+    describe(opt?: WriteParams) {
+        return this.#buffer_as_is().describe(opt);
+    }
+    toString() {
+        return this.describe();
+    }
+    //// Exact geometry
+    bbox() {
+        return this.buffer.bbox();
+    }
+    get length() {
+        return this.buffer.length;
+    }
+    point_at(T: number) {
+        return this.buffer.point_at(T);
+    }
+    point_at_length(L: number, clamp?: boolean) {
+        return this.buffer.point_at_length(L, clamp);
+    }
+    to_path() {
+        return this.buffer.to_path();
+    }
+    // the i-th command alone as a segment, from where the one before it ends
+    segment(i: number) {
+        const { codes, coords } = this.tokens;
+        if (!(i >= 0 && i < codes.length)) {
+            throw new RangeError(`No command ${i} of ${codes.length}`);
+        }
+        const [ks] = this.#offsets_of();
+        const k = ks[i];
+        return this.#make(i, i > 0 ? new MoveLC(undefined, Vector.pos(coords[k - 2], coords[k - 1])) : undefined);
+    }
+    // commands from up to to as a path, only their segments made
+    slice(from = 0, to = this.size) {
+        const { codes, coords } = this.tokens;
+        const { MOVE } = PathBuffer;
+        [from, to] = [max(0, from), min(codes.length, to)];
+        let cur: BaseLC | undefined;
+        if (from > 0 && from < to && codes[from] != MOVE) {
+            const k = this.#offsets_of()[0][from];
+            cur = new MoveLC(undefined, Vector.pos(coords[k - 2], coords[k - 1]));
+        }
+        for (let i = from; i < to; ++i) {
+            cur = this.#make(i, cur);
+        }
+        return new PathLC(cur);
+    }
+    #make(i: number, prev: BaseLC | undefined): BaseLC {
+        const { codes, coords, arcs } = this.tokens;
+        const { MOVE, LINE, CLOSE, QUAD, CUBIC } = PathBuffer;
+        const [ks, as] = this.#offsets_of();
+        const [k, a] = [ks[i], as[i]];
+        const v = (j: number) => Vector.pos(coords[k + j], coords[k + j + 1]);
+        switch (codes[i]) {
+            case MOVE:
+                return new MoveLC(prev, v(0));
+            case LINE:
+                return new LineCL(prev, v(0));
+            case CLOSE:
+                return new CloseLC(prev, v(0));
+            case QUAD:
+                return new QuadLC(prev, v(0), v(2));
+            case CUBIC:
+                return new CubicLC(prev, v(0), v(2), v(4));
+            default:
+                return new ArcLC(prev, arcs[a], arcs[a + 1], arcs[a + 2], arcs[a + 3], arcs[a + 4], v(0));
+        }
+    }
+    #offsets_of() {
+        return (this.#offsets ??= offsets(this.tokens));
+    }
+    // a PathBuffer to write from; without arcs the commands are one already
+    #buffer_as_is() {
+        const { codes, coords, arcs } = this.tokens;
+        return this.#buffer ?? (arcs.length > 0 ? this.buffer : new PathBuffer(codes, coords, new Float64Array(0)));
+    }
+}
+
+function offsets({ codes, coords }: Tokens): [Uint32Array, Uint32Array] {
+    const { ARC, STRIDE } = PathBuffer;
+    const ks = new Uint32Array(codes.length);
+    const as = new Uint32Array(codes.length);
+    for (let i = 0, k = 0, a = 0; i < codes.length; ++i) {
+        [ks[i], as[i]] = [k, a];
+        k += STRIDE[codes[i]];
+        codes[i] == ARC && (a += RAW_STRIDE);
+    }
+    return [ks, as];
+}
+
+function solve({ codes, coords, arcs }: Tokens) {
+    const { ARC, STRIDE, ARC_STRIDE } = PathBuffer;
+    const rows = new Float64Array((arcs.length / RAW_STRIDE) * ARC_STRIDE);
+    for (let i = 1, k = 2, a = 0, r = 0; i < codes.length; k += STRIDE[codes[i++]]) {
+        if (codes[i] == ARC) {
+            const [rx, ry, φ, bigArc, sweep] = arcs.subarray(a, a + RAW_STRIDE);
+            rows.set(arc_params(coords[k - 2], coords[k - 1], rx, ry, φ, !!bigArc, !!sweep, coords[k], coords[k + 1]), r);
+            [rows[r + 9], rows[r + 10]] = [bigArc, sweep];
+            a += RAW_STRIDE;
+            r += ARC_STRIDE;
+        }
+    }
+    return new PathBuffer(codes, coords, rows);
+}
+
+// how far from the middle of its chord an arc can get: its radii scaled up to
+// reach both ends, as arc_params does, plus how far the centre can be
+function arc_reach(x1: number, y1: number, x2: number, y2: number, rx: number, ry: number, φ: number) {
+    [rx, ry] = [abs(rx), abs(ry)];
+    const h = sqrt((x1 - x2) ** 2 + (y1 - y2) ** 2) / 2;
+    if (!rx || !ry) {
+        return h;
+    }
+    const θ = ((φ % 360) * PI) / 180;
+    const [dx, dy] = [(x1 - x2) / 2, (y1 - y2) / 2];
+    const [u, v] = [cos(θ) * dx + sin(θ) * dy, -sin(θ) * dx + cos(θ) * dy];
+    const R = max(rx, ry) * max(1, sqrt((u * u) / (rx * rx) + (v * v) / (ry * ry)));
+    return R + sqrt(max(0, R * R - h * h));
+}
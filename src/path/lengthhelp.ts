@@ -0,0 +1,82 @@
+// Arc length by adaptive Gauss-Legendre quadrature of the speed |B'(t)|
+import { probe } from '../probe.js';
+
+const { abs, max } = Math;
+
+export const LENGTH_TOLERANCE = 1e-10;
+const MAX_DEPTH = 30;
+
+// 8 point Gauss-Legendre nodes (positive half) and weights on [-1, 1]
+const GL_X = [
+    0.1834346424956498, 0.525532409916329, 0.7966664774136267, 0.9602898564975363,
+];
+const GL_W = [
+    0.362683783378362, 0.3137066458778873, 0.2223810344533745, 0.1012285362903763,
+];
+
+export type SpeedFn = (t: number) => number;
+
+function gauss(speed: SpeedFn, a: number, b: number) {
+    const h = (b - a) / 2;
+    const m = (a + b) / 2;
+    let s = 0;
+    for (let i = 0; i < 4; ++i) {
+        const x = h * GL_X[i];
+        s += GL_W[i] * (speed(m - x) + speed(m + x));
+    }
+    return s * h;
+}
+
+function adapt(speed: SpeedFn, a: number, b: number, whole: number, tolerance: number, depth: number): number {
+    const m = (a + b) / 2;
+    const left = gauss(speed, a, m);
+    const right = gauss(speed, m, b);
+    const both = left + right;
+    probe && probe.step('length', depth);
+    if (depth >= MAX_DEPTH || abs(both - whole) <= tolerance) {
+        return both;
+    }
+    tolerance /= 2;
+    return adapt(speed, a, m, left, tolerance, depth + 1) + adapt(speed, m, b, right, tolerance, depth + 1);
+}
+
+// length from t0 to t1, within tolerance relative to it
+export function gl_length(speed: SpeedFn, t0 = 0, t1 = 1, tolerance = LENGTH_TOLERANCE) {
+    if (t0 == t1) {
+        return 0;
+    }
+    const whole = gauss(speed, t0, t1);
+    return adapt(speed, t0, t1, whole, tolerance * max(abs(whole), Number.MIN_VALUE), 0);
+}
+
+// t where the length from 0 is s, by safeguarded Newton steps
+export function gl_t_at_length(speed: SpeedFn, s: number, total?: number, tolerance = LENGTH_TOLERANCE) {
+    total ??= gl_length(speed, 0, 1, tolerance);
+    if (s <= 0 || !total) {
+        return 0;
+    } else if (s >= total) {
+        return 1;
+    }
+    const eps = tolerance * total;
+    let [lo, hi] = [0, 1];
+    let t = s / total;
+    let len = gl_length(speed, 0, t, tolerance);
+    for (let i = 0; i < 64; ++i) {
+        const f = len - s;
+        if (abs(f) <= eps) {
+            break;
+        } else if (f < 0) {
+            lo = t;
+        } else {
+            hi = t;
+        }
+        const v = speed(t);
+        let u = v > 0 ? t - f / v : NaN;
+        if (!(u > lo && u < hi)) {
+            u = (lo + hi) / 2;
+        }
+        len += gl_length(speed, t, u, tolerance);
+        t = u;
+    }
+    return t;
+}
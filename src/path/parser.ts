@@ -0,0 +1,285 @@
+// Path data scanner, fed whole or in chunks
+
+// Receives the segments of a path, in absolute coordinates, as they complete
+export interface PathSink {
+    move_to(x: number, y: number): unknown;
+    line_to(x: number, y: number): unknown;
+    close_to(x: number, y: number): unknown;
+    quad_to(cx: number, cy: number, x: number, y: number): unknown;
+    curve_to(x1: number, y1: number, x2: number, y2: number, x: number, y: number): unknown;
+    arc_to(rx: number, ry: number, φ: number, bigArc: number, sweep: number, x: number, y: number): unknown;
+}
+
+// arguments per command letter, -1 for other characters
+const ARGS = new Int8Array(128).fill(-1);
+for (const [cmds, n] of [
+    ['Mm', 2],
+    ['Zz', 0],
+    ['LlTt', 2],
+    ['HhVv', 1],
+    ['Cc', 6],
+    ['SsQq', 4],
+    ['Aa', 7],
+] as [string, number][]) {
+    for (const c of cmds) {
+        ARGS[c.charCodeAt(0)] = n;
+    }
+}
+const SPACE = /\s/;
+const MORE = -2;
+
+function is_space(s: string, c: number, i: number) {
+    // [\s,]
+    return c == 32 || c == 44 || (c >= 9 && c <= 13) || (c > 127 && SPACE.test(s[i]));
+}
+
+function is_digit(c: number) {
+    return c >= 48 && c <= 57;
+}
+
+// end of the number /[-+]?[0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?/ at i, -1 if none,
+// MORE if what follows may still change it
+function scan_number(s: string, i: number, final: boolean) {
+    const n = s.length;
+    let j = i;
+    let c = s.charCodeAt(j);
+    if (c == 43 || c == 45) {
+        c = s.charCodeAt(++j);
+    }
+    const d0 = j;
+    while (is_digit(c)) {
+        c = s.charCodeAt(++j);
+    }
+    let digits = j > d0;
+    if (c == 46) {
+        const k = j + 1;
+        if (is_digit(s.charCodeAt(k))) {
+            j = k;
+            while (is_digit((c = s.charCodeAt(j)))) {
+                ++j;
+            }
+            digits = true;
+        } else if (!final && k >= n) {
+            return MORE;
+        }
+    }
+    if (!digits) {
+        return !final && j >= n ? MORE : -1;
+    } else if (c == 101 || c == 69) {
+        let k = j + 1;
+        let e = s.charCodeAt(k);
+        if (e == 43 || e == 45) {
+            e = s.charCodeAt(++k);
+        }
+        if (is_digit(e)) {
+            while (is_digit(s.charCodeAt(++k)));
+            j = k;
+        } else if (!final && k >= n) {
+            return MORE;
+        }
+    }
+    return !final && j >= n ? MORE : j;
+}
+
+export class PathParser<S extends PathSink> {
+    readonly sink: S;
+    // unconsumed input and its offset in the whole
+    #text = '';
+    #base = 0;
+    #decoder?: TextDecoder;
+    // current command letter, its arguments so far and how many groups of them are done
+    #command = 0;
+    #need = 0;
+    #args = new Float64Array(7);
+    #argc = 0;
+    #groups = 0;
+    // stopped at something that is not path data; the rest is ignored
+    #stopped = false;
+    // nothing emitted yet; a leading move replaces the implicit M0,0
+    #fresh = true;
+    #x = 0;
+    #y = 0;
+    #mx = 0;
+    #my = 0;
+    // the control point a smooth command reflects, after a cubic or a quadratic
+    #last = 0;
+    #cx = 0;
+    #cy = 0;
+    constructor(sink: S) {
+        this.sink = sink;
+    }
+    get offset() {
+        return this.#base;
+    }
+    write(chunk: string | Uint8Array) {
+        if (typeof chunk != 'string') {
+            chunk = (this.#decoder ??= new TextDecoder()).decode(chunk, { stream: true });
+        }
+        if (!this.#stopped) {
+            this.#text += chunk;
+            this.#scan(false);
+        }
+        return this;
+    }
+    end() {
+        if (this.#decoder) {
+            this.#text += this.#decoder.decode();
+        }
+        this.#stopped || this.#scan(true);
+        this.#expect_number(this.#base + this.#text.length);
+        if (this.#fresh) {
+            this.#fresh = false;
+            this.sink.move_to(0, 0);
+        }
+        return this.sink;
+    }
+    #expect_number(offset: number) {
+        if (this.#need > 0 && (this.#argc > 0 || this.#groups == 0)) {
+            throw new Error(`Number expected at offset ${offset}`);
+        }
+    }
+    #scan(final: boolean) {
+        const s = this.#text;
+        const n = s.length;
+        let i = 0;
+        while (i < n) {
+            const c = s.charCodeAt(i);
+            if (is_space(s, c, i)) {
+                ++i;
+                continue;
+            }
+            const need = c < 128 ? ARGS[c] : -1;
+            if (need >= 0) {
+                this.#expect_number(this.#base + i);
+                this.#command = c;
+                this.#need = need;
+                this.#argc = this.#groups = 0;
+                need == 0 && this.#close();
+                ++i;
+                continue;
+            }
+            const j = scan_number(s, i, final);
+            if (j == MORE) {
+                break;
+            } else if (j < 0) {
+                // as if the data ended here
+                this.#expect_number(this.#base + i);
+                this.#stopped = true;
+                i = n;
+                break;
+            } else if (this.#need <= 0) {
+                throw new Error(`Command expected at offset ${this.#base + i}`);
+            }
+            const args = this.#args;
+            args[this.#argc++] = parseFloat(s.slice(i, j));
+            if (this.#argc == this.#need) {
+                this.#emit(args);
+                this.#argc = 0;
+                ++this.#groups;
+            }
+            i = j;
+        }
+        this.#text = s.slice(i);
+        this.#base += i;
+    }
+    #close() {
+        if (!this.#fresh) {
+            const [x, y] = [this.#mx, this.#my];
+            this.sink.close_to(x, y);
+            [this.#x, this.#y, this.#last] = [x, y, 0];
+        }
+    }
+    #emit(v: Float64Array) {
+        const { sink } = this;
+        const command = this.#command;
+        const rel = command >= 97;
+        const [x, y] = [this.#x, this.#y];
+        // relative to the current point, without adding to absolute values
+        const X = (i: number) => (rel ? x + v[i] : v[i]);
+        const Y = (i: number) => (rel ? y + v[i] : v[i]);
+        let last = 0;
+        let ex, ey;
+        switch (command) {
+            case 77: // M
+            case 109: // m
+                if (this.#groups == 0) {
+                    if (this.#fresh) {
+                        this.#fresh = false;
+                        [ex, ey] = [v[0], v[1]];
+                    } else {
+                        [ex, ey] = [X(0), Y(1)];
+                    }
+                    sink.move_to(ex, ey);
+                    [this.#mx, this.#my] = [ex, ey];
+                } else {
+                    sink.line_to((ex = X(0)), (ey = Y(1)));
+                }
+                [this.#x, this.#y, this.#last] = [ex, ey, 0];
+                return;
+        }
+        if (this.#fresh) {
+            this.#fresh = false;
+            sink.move_to(0, 0);
+        }
+        switch (command) {
+            case 76: // L
+            case 108:
+                sink.line_to((ex = X(0)), (ey = Y(1)));
+                break;
+            case 72: // H
+            case 104:
+                sink.line_to((ex = X(0)), (ey = y));
+                break;
+            case 86: // V
+            case 118:
+                sink.line_to((ex = x), (ey = Y(0)));
+                break;
+            case 81: // Q
+            case 113: {
+                const [cx, cy] = [X(0), Y(1)];
+                sink.quad_to(cx, cy, (ex = X(2)), (ey = Y(3)));
+                [this.#cx, this.#cy, last] = [cx, cy, 81];
+                break;
+            }
+            case 84: // T
+            case 116: {
+                const [cx, cy] = this.#last == 81 ? [x + (x - this.#cx), y + (y - this.#cy)] : [x, y];
+                sink.quad_to(cx, cy, (ex = X(0)), (ey = Y(1)));
+                [this.#cx, this.#cy, last] = [cx, cy, 81];
+                break;
+            }
+            case 67: // C
+            case 99: {
+                const [x2, y2] = [X(2), Y(3)];
+                sink.curve_to(X(0), Y(1), x2, y2, (ex = X(4)), (ey = Y(5)));
+                [this.#cx, this.#cy, last] = [x2, y2, 67];
+                break;
+            }
+            case 83: // S
+            case 115: {
+                const [x1, y1] = this.#last == 67 ? [x + (x - this.#cx), y + (y - this.#cy)] : [x, y];
+                const [x2, y2] = [X(0), Y(1)];
+                sink.curve_to(x1, y1, x2, y2, (ex = X(2)), (ey = Y(3)));
+                [this.#cx, this.#cy, last] = [x2, y2, 67];
+                break;
+            }
+            case 65: // A
+            case 97:
+                sink.arc_to(v[0], v[1], v[2], v[3], v[4], (ex = X(5)), (ey = Y(6)));
+                break;
+        }
+        [this.#x, this.#y, this.#last] = [ex as number, ey as number, last];
+    }
+}
+
+// Feed a stream of path data chunks to sink
+export async function parse_stream<S extends PathSink>(
+    source: AsyncIterable<string | Uint8Array> | Iterable<string | Uint8Array>,
+    sink: S
+) {
+    const parser = new PathParser(sink);
+    for await (const chunk of source) {
+        parser.write(chunk);
+    }
+    return parser.end();
+}
@@ -0,0 +1,616 @@
+import { DescParams, tCheck } from './index.js';
+import { BoundingBox } from '../bbox.js';
+import { Vector } from '../vector.js';
+import { BaseLC, MoveLC, LineCL, CloseLC, QuadLC, CubicLC, ArcLC } from './command.js';
+import { PathLC, wrap_length } from './pathlc.js';
+import { PathParser, PathSink, parse_stream } from './parser.js';
+import { PathWriter, PathOutput, WriteParams } from './writer.js';
+import { quad_length, quad_point_at, quad_bbox } from './quadhelp.js';
+import { cubic_length, cubic_point_at, cubic_box } from './cubichelp.js';
+import { arc_params, arc_length, arc_point_at, arc_bbox, arc_transform, IArc } from './archelp.js';
+import { probe } from '../probe.js';
+const { min, max, abs, sqrt } = Math;
+
+const MOVE = 0;
+const LINE = 1;
+const CLOSE = 2;
+const QUAD = 3;
+const CUBIC = 4;
+const ARC = 5;
+// coordinates of each command, control points first and the end point last
+const STRIDE = [2, 2, 2, 4, 6, 2];
+// arc side table row: phi, rx, ry, sinφ, cosφ, cx, cy, rtheta, rdelta (as arc_params), bigArc, sweep
+const ARC_STRIDE = 11;
+
+interface BufferIndex {
+    pos: Uint32Array;
+    rows: Uint32Array;
+    lens: Float64Array;
+    total: number;
+    first: number;
+    segs: Uint32Array;
+    starts: Float64Array;
+}
+
+// A path as a command per segment plus packed coordinates, no segment objects
+export class PathBuffer {
+    static MOVE = MOVE;
+    static LINE = LINE;
+    static CLOSE = CLOSE;
+    static QUAD = QUAD;
+    static CUBIC = CUBIC;
+    static ARC = ARC;
+    static STRIDE = STRIDE;
+    static ARC_STRIDE = ARC_STRIDE;
+    readonly codes: Uint8Array;
+    readonly coords: Float64Array;
+    readonly arcs: Float64Array;
+    #index?: BufferIndex;
+    constructor(codes: Uint8Array, coords: Float64Array, arcs: Float64Array) {
+        this.codes = codes;
+        this.coords = coords;
+        this.arcs = arcs;
+    }
+    get size() {
+        return this.codes.length;
+    }
+    get to() {
+        const { coords } = this;
+        const n = coords.length;
+        if (n > 0) {
+            return Vector.pos(coords[n - 2], coords[n - 1]);
+        }
+    }
+    get length() {
+        return this.index.total;
+    }
+    protected get index() {
+        return (this.#index ??= build_index(this));
+    }
+    //// Query methods
+    bbox() {
+        const { codes, coords, arcs } = this;
+        const b = BoundingBox.not();
+        let [x, y] = [coords[0], coords[1]];
+        for (let i = 1, k = 2, r = 0; i < codes.length; ++i) {
+            const code = codes[i];
+            b.merge_self(segment_bbox(code, coords, k, arcs, r, x, y));
+            k += STRIDE[code];
+            code == ARC && (r += ARC_STRIDE);
+            [x, y] = [coords[k - 2], coords[k - 1]];
+        }
+        return b;
+    }
+    segment_at_length(L: number, clamp?: boolean): [number, number, number] {
+        const { total, first, segs, starts, lens } = this.index;
+        const lenP = wrap_length(L, total, clamp);
+        if (lenP == 0) {
+            if (first >= 0) {
+                return [first, 0, lens[first]];
+            }
+        } else {
+            let [lo, hi] = [0, segs.length];
+            while (lo < hi) {
+                const mid = (lo + hi) >>> 1;
+                if (lenP - starts[mid] >= 0) {
+                    lo = mid + 1;
+                } else {
+                    hi = mid;
+                }
+            }
+            if (lo > 0) {
+                const i = segs[lo - 1];
+                return [i, lenP - starts[lo - 1], lens[i]];
+            }
+        }
+        return [-1, NaN, NaN];
+    }
+    segment_at(T: number): [number, number] {
+        const [i, n, N] = this.segment_at_length(T * this.index.total);
+        return [i, N == 0 ? 0 : n / N];
+    }
+    segment_point_at(i: number, t: number) {
+        const { codes, coords, arcs } = this;
+        const { pos, rows } = this.index;
+        const k = pos[i];
+        const [x, y] = [coords[k - 2], coords[k - 1]];
+        t = tCheck(t);
+        switch (codes[i]) {
+            case QUAD:
+                return quad_point_at(quad_pts(coords, k, x, y), t);
+            case CUBIC:
+                return Vector.new(cubic_point_at(cubic_pts(coords, k, x, y), t));
+            case ARC:
+                return arc_point_at(arc_view(arcs, rows[i], x, y, coords[k], coords[k + 1]), t);
+        }
+        return Vector.pos(coords[k] - x, coords[k + 1] - y)
+            .multiply(t)
+            .post_add([x, y]);
+    }
+    point_at(T: number) {
+        const [i, t] = this.segment_at(T);
+        if (i > 0) return this.segment_point_at(i, t);
+    }
+    point_at_length(L: number, clamp?: boolean) {
+        const [i, n, N] = this.segment_at_length(L, clamp);
+        if (i > 0) return this.segment_point_at(i, n / N);
+    }
+    //// Transform methods
+    transform(M: any, parts?: any) {
+        const { codes, coords, arcs } = this;
+        const out = new PathBuffer(codes, new Float64Array(coords.length), new Float64Array(arcs.length));
+        return transform_into(this, out, M, parts);
+    }
+    // coordinates and arcs rewritten where they are
+    transform_self(M: any, parts?: any) {
+        this.#index = undefined;
+        return transform_into(this, this, M, parts);
+    }
+    // one matrix over many buffers, decomposed once for all their arcs
+    static transform_all(bufs: Iterable<PathBuffer>, M: any, in_place = false) {
+        const parts = M.decompose();
+        const out: PathBuffer[] = [];
+        for (const buf of bufs) {
+            out.push(in_place ? buf.transform_self(M, parts) : buf.transform(M, parts));
+        }
+        return out;
+    }
+    reversed() {
+        const { codes, coords, arcs } = this;
+        const n = codes.length;
+        const w = new BufferBuilder(n, coords.length, arcs.length);
+        if (n > 1) {
+            let k = coords.length;
+            let r = arcs.length;
+            const tail = codes[n - 1];
+            if (tail != MOVE) {
+                w.move_to(coords[k - 2], coords[k - 1]);
+            }
+            for (let i = n; --i > 0; ) {
+                const code = codes[i];
+                k -= STRIDE[code];
+                // the start of this segment is where its reverse ends
+                const [x, y] = [coords[k - 2], coords[k - 1]];
+                switch (code) {
+                    case MOVE:
+                        w.move_to(x, y);
+                        break;
+                    case LINE:
+                    case CLOSE:
+                        w.line_to(x, y);
+                        break;
+                    case QUAD:
+                        w.quad_to(coords[k], coords[k + 1], x, y);
+                        break;
+                    case CUBIC:
+                        w.curve_to(coords[k + 2], coords[k + 3], coords[k], coords[k + 1], x, y);
+                        break;
+                    case ARC: {
+                        r -= ARC_STRIDE;
+                        const [phi, rx, ry] = arcs.subarray(r, r + 3);
+                        w.arc_to(rx, ry, phi, arcs[r + 9], !arcs[r + 10], x, y);
+                        break;
+                    }
+                }
+            }
+        }
+        return w.finish();
+    }
+    //// to String methods
+    describe(opt?: WriteParams) {
+        return this.#write(new PathWriter(opt)).end();
+    }
+    write<T extends PathOutput>(out: T, opt?: WriteParams) {
+        this.#write(new PathWriter(opt, out)).end();
+        return out;
+    }
+    #write(w: PathWriter) {
+        const { codes, coords, arcs } = this;
+        const { term_opt } = w;
+        for (let i = 0, k = 0, r = 0; i < codes.length; ++i) {
+            const code = codes[i];
+            w.term(term(code, coords, k, arcs, r, i > 0, i > 0 ? codes[i - 1] : -1, term_opt));
+            k += STRIDE[code];
+            code == ARC && (r += ARC_STRIDE);
+        }
+        return w;
+    }
+    toString() {
+        return this.describe();
+    }
+    //// Conversion methods
+    to_path() {
+        const { codes, coords, arcs } = this;
+        let cur: BaseLC | undefined;
+        for (let i = 0, k = 0, r = 0; i < codes.length; ++i) {
+            const code = codes[i];
+            const v = (j: number) => Vector.pos(coords[k + j], coords[k + j + 1]);
+            switch (code) {
+                case MOVE:
+                    cur = new MoveLC(cur, v(0));
+                    break;
+                case LINE:
+                    cur = new LineCL(cur, v(0));
+                    break;
+                case CLOSE:
+                    cur = new CloseLC(cur, v(0));
+                    break;
+                case QUAD:
+                    cur = new QuadLC(cur, v(0), v(2));
+                    break;
+                case CUBIC:
+                    cur = new CubicLC(cur, v(0), v(2), v(4));
+                    break;
+                case ARC:
+                    cur = new ArcLC(cur, arcs[r + 1], arcs[r + 2], arcs[r], arcs[r + 9], arcs[r + 10], v(0));
+                    r += ARC_STRIDE;
+                    break;
+            }
+            k += STRIDE[code];
+        }
+        return new PathLC(cur);
+    }
+    static from(path: PathLC | BaseLC | undefined) {
+        const segs: BaseLC[] = [];
+        for (let cur = path instanceof PathLC ? path._tail : path; cur; cur = cur._prev) {
+            segs.push(cur);
+        }
+        const w = new BufferBuilder(segs.length, segs.length * 2, 0);
+        for (let i = segs.length; i-- > 0; ) {
+            const seg = segs[i];
+            const [x, y] = seg.to;
+            if (seg instanceof MoveLC || !seg._prev) {
+                w.move_to(x, y);
+            } else if (seg instanceof CloseLC) {
+                w.close_to(x, y);
+            } else if (seg instanceof LineCL) {
+                w.line_to(x, y);
+            } else if (seg instanceof QuadLC) {
+                const [px, py] = seg.p;
+                w.quad_to(px, py, x, y);
+            } else if (seg instanceof CubicLC) {
+                const [x1, y1] = seg.c1;
+                const [x2, y2] = seg.c2;
+                w.curve_to(x1, y1, x2, y2, x, y);
+            } else if (seg instanceof ArcLC) {
+                const { phi, rx, ry, sinφ, cosφ, cx, cy, rtheta, rdelta, bigArc, sweep } = seg;
+                w.arc_with(x, y, [phi, rx, ry, sinφ, cosφ, cx, cy, rtheta, rdelta, bigArc ? 1 : 0, sweep ? 1 : 0]);
+            } else {
+                throw new Error(`Unexpected segment ${seg.constructor.name}`);
+            }
+        }
+        return w.finish();
+    }
+    static parse(d: string) {
+        return probe ? probe.time('parse', () => parse_buffer(d)) : parse_buffer(d);
+    }
+    static async parse_stream(source: AsyncIterable<string | Uint8Array> | Iterable<string | Uint8Array>) {
+        return (await parse_stream(source, new BufferBuilder(0, 0, 0))).finish();
+    }
+}
+
+function parse_buffer(d: string) {
+    return new PathParser(new BufferBuilder(d.length >> 3, d.length >> 2, 0)).write(d).end().finish();
+}
+
+class BufferBuilder implements PathSink {
+    codes: Uint8Array;
+    coords: Float64Array;
+    arcs: Float64Array;
+    n = 0;
+    m = 0;
+    r = 0;
+    constructor(n: number, m: number, r: number) {
+        this.codes = new Uint8Array(max(n, 8));
+        this.coords = new Float64Array(max(m, 16));
+        this.arcs = new Float64Array(max(r, ARC_STRIDE));
+    }
+    get x() {
+        return this.coords[this.m - 2];
+    }
+    get y() {
+        return this.coords[this.m - 1];
+    }
+    push(code: number, ...v: number[]) {
+        let { codes, coords, n, m } = this;
+        if (n >= codes.length) {
+            (this.codes = new Uint8Array(n * 2)).set(codes);
+        }
+        if (m + v.length > coords.length) {
+            (this.coords = new Float64Array((m + v.length) * 2)).set(coords);
+        }
+        this.codes[n] = code;
+        this.coords.set(v, m);
+        this.n = n + 1;
+        this.m = m + v.length;
+        return this;
+    }
+    row() {
+        const { arcs, r } = this;
+        if (r + ARC_STRIDE > arcs.length) {
+            (this.arcs = new Float64Array((r + ARC_STRIDE) * 2)).set(arcs);
+        }
+        this.r = r + ARC_STRIDE;
+        return r;
+    }
+    move_to(x: number, y: number) {
+        return this.push(MOVE, x, y);
+    }
+    line_to(x: number, y: number) {
+        return this.push(LINE, x, y);
+    }
+    close_to(x: number, y: number) {
+        return this.push(CLOSE, x, y);
+    }
+    quad_to(cx: number, cy: number, x: number, y: number) {
+        return this.push(QUAD, cx, cy, x, y);
+    }
+    curve_to(x1: number, y1: number, x2: number, y2: number, x: number, y: number) {
+        return this.push(CUBIC, x1, y1, x2, y2, x, y);
+    }
+    arc_to(rx: number, ry: number, φ: number, bigArc: boolean | number, sweep: boolean | number, x: number, y: number) {
+        const r = this.row();
+        arc_row(this.arcs, r, this.x, this.y, rx, ry, φ, bigArc, sweep, x, y);
+        return this.push(ARC, x, y);
+    }
+    arc_with(x: number, y: number, params: number[]) {
+        const r = this.row();
+        this.arcs.set(params, r);
+        return this.push(ARC, x, y);
+    }
+    finish() {
+        const { codes, coords, arcs, n, m, r } = this;
+        return new PathBuffer(codes.slice(0, n), coords.slice(0, m), arcs.slice(0, r));
+    }
+}
+
+// src transformed by M into out, which may be src itself
+function transform_into(src: PathBuffer, out: PathBuffer, M: any, parts?: any) {
+    const { codes, coords, arcs } = src;
+    const { coords: to, arcs: arcsT } = out;
+    const { a, b, c, d, e, f } = M;
+    for (let k = 0, n = coords.length; k < n; k += 2) {
+        const [x, y] = [coords[k], coords[k + 1]];
+        to[k] = a * x + c * y + e;
+        to[k + 1] = b * x + d * y + f;
+    }
+    if (arcs.length > 0) {
+        parts ??= M.decompose();
+        for (let i = 1, k = 2, r = 0; i < codes.length; k += STRIDE[codes[i++]]) {
+            if (codes[i] == ARC) {
+                // the row is read before it is rewritten
+                const arc = arc_view(arcs, r, to[k - 2], to[k - 1], to[k], to[k + 1]);
+                const [rx, ry, phi, sweep] = arc_transform(arc, M, parts);
+                arc_row(arcsT, r, to[k - 2], to[k - 1], rx, ry, phi, arc.bigArc, sweep, to[k], to[k + 1]);
+                r += ARC_STRIDE;
+            }
+        }
+    }
+    return out;
+}
+
+function arc_row(
+    out: Float64Array,
+    r: number,
+    x1: number,
+    y1: number,
+    rx: number,
+    ry: number,
+    φ: number,
+    bigArc: boolean | number,
+    sweep: boolean | number,
+    x2: number,
+    y2: number
+) {
+    if (!(isFinite(φ) && isFinite(rx) && isFinite(ry))) throw Error(`${JSON.stringify([rx, ry, φ, bigArc, sweep, x2, y2])}`);
+    out.set(arc_params(x1, y1, rx, ry, φ, !!bigArc, !!sweep, x2, y2), r);
+    out[r + 9] = bigArc ? 1 : 0;
+    out[r + 10] = sweep ? 1 : 0;
+}
+
+function arc_view(arcs: Float64Array, r: number, x1: number, y1: number, x2: number, y2: number): IArc {
+    const [phi, rx, ry, sinφ, cosφ, cx, cy, rtheta, rdelta, bigArc, sweep] = arcs.subarray(r, r + ARC_STRIDE);
+    return {
+        from: Vector.pos(x1, y1),
+        to: Vector.pos(x2, y2),
+        phi,
+        rx,
+        ry,
+        sinφ,
+        cosφ,
+        cx,
+        cy,
+        rtheta,
+        rdelta,
+        bigArc: !!bigArc,
+        sweep: !!sweep,
+        point_at(t: number) {
+            return arc_point_at(this, t);
+        },
+    };
+}
+
+function quad_pts(coords: Float64Array, k: number, x: number, y: number) {
+    return [
+        [x, y],
+        [coords[k], coords[k + 1]],
+        [coords[k + 2], coords[k + 3]],
+    ];
+}
+
+function cubic_pts(coords: Float64Array, k: number, x: number, y: number) {
+    return [
+        [x, y],
+        [coords[k], coords[k + 1]],
+        [coords[k + 2], coords[k + 3]],
+        [coords[k + 4], coords[k + 5]],
+    ];
+}
+
+function segment_length(code: number, coords: Float64Array, k: number, arcs: Float64Array, r: number, x: number, y: number) {
+    switch (code) {
+        case MOVE:
+            return 0;
+        case QUAD:
+            return quad_length(quad_pts(coords, k, x, y));
+        case CUBIC:
+            return cubic_length(cubic_pts(coords, k, x, y));
+        case ARC:
+            return arc_length(arc_view(arcs, r, x, y, coords[k], coords[k + 1]));
+    }
+    const dx = coords[k] - x;
+    const dy = coords[k + 1] - y;
+    return sqrt(dx * dx + dy * dy);
+}
+
+function segment_bbox(code: number, coords: Float64Array, k: number, arcs: Float64Array, r: number, x: number, y: number) {
+    switch (code) {
+        case QUAD:
+            return quad_bbox(quad_pts(coords, k, x, y));
+        case CUBIC:
+            return cubic_box(cubic_pts(coords, k, x, y));
+        case ARC:
+            return arc_bbox(arc_view(arcs, r, x, y, coords[k], coords[k + 1]));
+    }
+    const [x2, y2] = [coords[k], coords[k + 1]];
+    return BoundingBox.extrema([min(x, x2), max(x, x2)], [min(y, y2), max(y, y2)]);
+}
+
+function build_index(buf: PathBuffer): BufferIndex {
+    const { codes, coords, arcs } = buf;
+    const n = codes.length;
+    const pos = new Uint32Array(n);
+    const rows = new Uint32Array(n);
+    const lens = new Float64Array(n);
+    let total = 0;
+    let first = -1;
+    for (let i = 1, k = 2, r = 0; i < n; ++i) {
+        const code = codes[i];
+        pos[i] = k;
+        rows[i] = r;
+        total += lens[i] = segment_length(code, coords, k, arcs, r, coords[k - 2], coords[k - 1]);
+        if (code != MOVE && first < 0) {
+            first = i;
+        }
+        k += STRIDE[code];
+        code == ARC && (r += ARC_STRIDE);
+    }
+    // start offsets taken back from the total, as PathLC.segment_at_length does
+    const segs: number[] = [];
+    const starts: number[] = [];
+    let to = total;
+    for (let i = n; --i > 0; ) {
+        const lenS = lens[i];
+        if (codes[i] != MOVE && lenS >= 0) {
+            segs.push(i);
+            starts.push((to -= lenS));
+        }
+    }
+    return {
+        pos,
+        rows,
+        lens,
+        total,
+        first,
+        segs: Uint32Array.from(segs.reverse()),
+        starts: Float64Array.from(starts.reverse()),
+    };
+}
+
+function close(x1: number, y1: number, x2: number, y2: number) {
+    return abs(x1 - x2) < 1e-12 && abs(y1 - y2) < 1e-12;
+}
+
+// the term of BaseLC.term for the segment at k
+function term(
+    code: number,
+    coords: Float64Array,
+    k: number,
+    arcs: Float64Array,
+    r: number,
+    hasPrev: boolean,
+    prevCode: number,
+    opt?: DescParams
+): (number | string)[] {
+    const [x, y] = [coords[k + STRIDE[code] - 2], coords[k + STRIDE[code] - 1]];
+    const [sx, sy] = hasPrev ? [coords[k - 2], coords[k - 1]] : [0, 0];
+    switch (code) {
+        case MOVE:
+            if (opt?.relative) {
+                return hasPrev ? ['m', x - sx, y - sy] : ['m', x, y];
+            }
+            return ['M', x, y];
+        case CLOSE:
+            if (opt) {
+                const { relative, close } = opt;
+                if (close === false) {
+                    return term(LINE, coords, k, arcs, r, hasPrev, prevCode, opt);
+                } else if (relative) {
+                    return ['z'];
+                }
+            }
+            return ['Z'];
+        case LINE:
+            if (opt && hasPrev) {
+                const { relative, short } = opt;
+                if (relative) {
+                    if (short) {
+                        if (sx === x) {
+                            return ['v', y - sy];
+                        } else if (sy === y) {
+                            return ['h', x - sx];
+                        }
+                    }
+                    return ['l', x - sx, y - sy];
+                } else if (short) {
+                    if (sx === x) {
+                        return ['V', y];
+                    } else if (sy === y) {
+                        return ['H', x];
+                    }
+                }
+            }
+            return ['L', x, y];
+        case QUAD: {
+            const [x1, y1] = [coords[k], coords[k + 1]];
+            if (opt && hasPrev) {
+                const { relative, smooth } = opt;
+                if (smooth) {
+                    const [rx, ry] = prevCode == QUAD ? [sx + (sx - coords[k - 4]), sy + (sy - coords[k - 3])] : [sx, sy];
+                    if (close(rx, ry, x1, y1)) {
+                        return relative ? ['t', x - sx, y - sy] : ['T', x, y];
+                    }
+                }
+                if (relative) {
+                    return ['q', x1 - sx, y1 - sy, x - sx, y - sy];
+                }
+            }
+            return ['Q', x1, y1, x, y];
+        }
+        case CUBIC: {
+            const [x1, y1, x2, y2] = coords.subarray(k, k + 4);
+            if (opt && hasPrev) {
+                const { relative, smooth } = opt;
+                if (smooth) {
+                    const [rx, ry] = prevCode == CUBIC ? [sx + (sx - coords[k - 4]), sy + (sy - coords[k - 3])] : [sx, sy];
+                    if (close(rx, ry, x1, y1)) {
+                        return relative ? ['s', x2 - sx, y2 - sy, x - sx, y - sy] : ['S', x2, y2, x, y];
+                    }
+                }
+                if (relative) {
+                    return ['c', x1 - sx, y1 - sy, x2 - sx, y2 - sy, x - sx, y - sy];
+                }
+            }
+            return ['C', x1, y1, x2, y2, x, y];
+        }
+        case ARC: {
+            const [phi, rx, ry] = arcs.subarray(r, r + 3);
+            const [bigArc, sweep] = [arcs[r + 9], arcs[r + 10]];
+            if (opt?.relative && hasPrev) {
+                return ['a', rx, ry, phi, bigArc, sweep, x - sx, y - sy];
+            }
+            return ['A', rx, ry, phi, bigArc, sweep, x, y];
+        }
+    }
+    throw new Error(`Unexpected command code ${code}`);
+}
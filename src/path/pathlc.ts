@@ -1,17 +1,41 @@
 import { BoundingBox } from "../bbox.js";
-import { BaseLC, MoveLC } from "./command.js";
+import { Vector } from "../vector.js";
+import { BaseLC, MoveLC, SegmentSink } from "./command.js";
+import { parse_stream } from "./parser.js";
+import { PathWriter, PathOutput, WriteParams } from "./writer.js";
+import { Polyline } from "./polyline.js";
+import { GlyphCache, TextOptions } from "./glyphs.js";
 import { DescParams, tNorm } from "./index.js";
+import { probe } from "../probe.js";
+const { min, max, sqrt } = Math;
+
+// closest points of many queries, -1 and NaN where the path has no segments
+export interface NearestOutput {
+    distance: Float64Array;
+    // index of the segment in the path, moves counted
+    segment: Int32Array;
+    t: Float64Array;
+}
 
 export class PathLC {
     static Unit = BaseLC;
     _tail: BaseLC | undefined;
+    #indexed = false;
     constructor(tail: BaseLC | undefined) {
         this._tail = tail;
     }
+    // opt in to a length index, built on the next length query and again after appending
+    indexed(on = true) {
+        this.#indexed = on;
+        return this;
+    }
+    get is_indexed() {
+        return this.#indexed;
+    }
     get length() {
         let cur: BaseLC | undefined = this._tail;
         if (cur) {
-            return path_length(cur);
+            return probe ? probe.time('length', () => path_length(cur!)) : path_length(cur);
         }
         return 0;
     }
@@ -135,17 +159,39 @@ export class PathLC {
     ) {
         const { font, fontSize = 72, kerning, letterSpacing, tracking } = options;
         const [_x1, _y1] = this?._tail?.to ?? [0, 0];
-        font.getPath(text, _x1, _y1, fontSize, {
+        // glyph outlines come from the font's cache, only placed and scaled here
+        GlyphCache.of(font).draw(this, text, _x1, _y1, fontSize, {
             kerning,
             letterSpacing,
             tracking,
-        }).draw(this);
+        });
         return this;
     }
+    // a path per label, each drawn at its [x, y]
+    static texts(
+        options: { fontSize: number; font: any } & TextOptions,
+        labels: Iterable<[string, number, number]>
+    ) {
+        const { font, fontSize = 72, kerning, letterSpacing, tracking } = options;
+        const cache = GlyphCache.of(font);
+        const opt = { kerning, letterSpacing, tracking };
+        const paths: PathLC[] = [];
+        for (const [text, x, y] of labels) {
+            const path = new this(undefined);
+            cache.draw(path, text, x, y, fontSize, opt);
+            paths.push(path);
+        }
+        return paths;
+    }
     //// to String methods
-    describe(opt?: DescParams) {
+    describe(opt?: WriteParams) {
         return this._tail?.describe(opt) || '';
     }
+    // path data to out, flushed as it grows
+    write<T extends PathOutput>(out: T, opt?: WriteParams) {
+        new PathWriter(opt, out).path(this._tail).end();
+        return out;
+    }
     toString() {
         return this.describe();
     }
@@ -153,6 +199,10 @@ export class PathLC {
     segment_at_length(T: number, clamp?: boolean): [BaseLC | undefined, number, number] {
         let cur: BaseLC | undefined = this._tail;
         if (cur) {
+            if (this.#indexed) {
+                const index = length_index(cur);
+                return index_at_length(index, T, clamp);
+            }
             return segment_at_length(cur, T, path_length(cur), clamp);
         }
         return [undefined, NaN, NaN];
@@ -160,12 +210,36 @@ export class PathLC {
     segment_at(T: number): [BaseLC | undefined, number] {
         let cur: BaseLC | undefined = this._tail;
         if (cur) {
-            const len = path_length(cur);
-            const [seg, n, N] = segment_at_length(cur, T * len, len);
+            let seg, n, N;
+            if (this.#indexed) {
+                const index = length_index(cur);
+                [seg, n, N] = index_at_length(index, T * index.total);
+            } else {
+                const len = path_length(cur);
+                [seg, n, N] = segment_at_length(cur, T * len, len);
+            }
             return [seg, N == 0 ? 0 : n / N];
         }
         return [undefined, NaN];
     }
+    points_at(T: ArrayLike<number>, out?: Float64Array) {
+        // [x0, y0, x1, y1, ...] at each T, with the index whether or not opted in
+        const n = T.length;
+        out ??= new Float64Array(2 * n);
+        const { _tail } = this;
+        const index = _tail && length_index(_tail);
+        for (let i = 0; i < n; ++i) {
+            const [seg, l, L] = index ? index_at_length(index, T[i] * index.total) : [];
+            if (seg) {
+                const [x, y] = seg.point_at(L == 0 ? 0 : l! / L!);
+                out[2 * i] = x;
+                out[2 * i + 1] = y;
+            } else {
+                out[2 * i] = out[2 * i + 1] = NaN;
+            }
+        }
+        return out;
+    }
     tangent_at(T: number) {
         const [seg, t] = this.segment_at(T);
         if (seg) return seg.tangent_at(t);
@@ -176,6 +250,9 @@ export class PathLC {
         if (seg) return seg.slope_at(t);
     }
     point_at(T: number) {
+        return probe ? probe.time('point_at', () => this.#point_at(T)) : this.#point_at(T);
+    }
+    #point_at(T: number) {
         const [seg, t] = this.segment_at(T);
         if (seg) return seg.point_at(t);
     }
@@ -185,13 +262,95 @@ export class PathLC {
     }
     ////
     bbox() {
-        let b = BoundingBox.not();
+        return probe ? probe.time('bbox', () => this.#bbox()) : this.#bbox();
+    }
+    #bbox() {
+        const { _tail } = this;
+        if (_tail) {
+            const [x0, x1, y0, y1] = path_bbox(_tail);
+            return BoundingBox.extrema([x0, x1], [y0, y1]);
+        }
+        return BoundingBox.not();
+    }
+    // exact box of the path transformed by M, without transforming it
+    bbox_under(M: any) {
+        const b = BoundingBox.not();
         for (let cur: BaseLC | undefined = this._tail; cur; cur = cur._prev) {
-            b = b.merge(cur.bbox());
+            b.merge_self(cur.bbox_under(M));
         }
         return b;
     }
-    split_at(T: number) {
+    // min_x, min_y, max_x, max_y of each path, under M if given
+    static bbox_all(paths: Iterable<PathLC>, M?: any, out?: Float64Array) {
+        const list = [...paths];
+        out ??= new Float64Array(list.length * 4);
+        for (let i = 0; i < list.length; ++i) {
+            const { _tail } = list[i];
+            let [x0, x1, y0, y1] = [Infinity, -Infinity, Infinity, -Infinity];
+            if (!_tail) {
+                // empty
+            } else if (M) {
+                [[x0, x1], [y0, y1]] = list[i].bbox_under(M);
+            } else {
+                [x0, x1, y0, y1] = path_bbox(_tail);
+            }
+            out.set([x0, y0, x1, y1], i * 4);
+        }
+        return out;
+    }
+    //// Closest point
+    // segment, t on it, point and distance of the point on the path closest to p
+    nearest(p: Iterable<number>): [BaseLC | undefined, number, Vector | undefined, number] {
+        const [x, y] = p;
+        const { _tail } = this;
+        if (_tail) {
+            const index = nearest_index(_tail);
+            const [k, t, d2] = nearest_in(index, x, y);
+            if (k >= 0) {
+                const seg = index.segs[k];
+                return [seg, t, seg.point_at(t), sqrt(d2)];
+            }
+        }
+        return [undefined, NaN, undefined, NaN];
+    }
+    // T where the path comes closest to p, as segment_at would give back the segment and t
+    t_at_point(p: Iterable<number>) {
+        const [x, y] = p;
+        const { _tail } = this;
+        if (_tail) {
+            const index = nearest_index(_tail);
+            const [k, t] = nearest_in(index, x, y);
+            if (k >= 0) {
+                const lengths = length_index(_tail);
+                const j = (index.in_lengths ??= positions_in(index.segs, lengths.segs))[k];
+                const { total, starts, lens } = lengths;
+                return j < 0 ? NaN : total > 0 ? (starts[j] + t * lens[j]) / total : 0;
+            }
+        }
+        return NaN;
+    }
+    // closest points to [x0, y0, x1, y1, ...]
+    nearest_all(points: ArrayLike<number>, out?: NearestOutput): NearestOutput {
+        return probe ? probe.time('nearest', () => this.#nearest_all(points, out)) : this.#nearest_all(points, out);
+    }
+    #nearest_all(points: ArrayLike<number>, out?: NearestOutput) {
+        const n = points.length >> 1;
+        out ??= { distance: new Float64Array(n), segment: new Int32Array(n), t: new Float64Array(n) };
+        const { distance, segment, t } = out;
+        const { _tail } = this;
+        const index = _tail && nearest_index(_tail);
+        for (let i = 0; i < n; ++i) {
+            const [k, u, d2] = index ? nearest_in(index, points[2 * i], points[2 * i + 1]) : [-1, NaN, NaN];
+            distance[i] = k < 0 ? NaN : sqrt(d2);
+            segment[i] = k < 0 ? -1 : index!.ids[k];
+            t[i] = u;
+        }
+        return out;
+    }
+    split_at(T: number): [PathLC, PathLC] {
+        return probe ? probe.time('split_at', () => this.#split_at(T)) : this.#split_at(T);
+    }
+    #split_at(T: number): [PathLC, PathLC] {
         const { _tail } = this;
         if (_tail) {
             const [seg, t] = this.segment_at(T);
@@ -252,6 +411,29 @@ export class PathLC {
         const { _tail } = this;
         return _tail ? new PathLC(_tail.transform(M)) : this;
     }
+    // a polyline no farther than tolerance from the path, into coords if given
+    flatten(tolerance?: number, coords?: Float64Array | number) {
+        return new Polyline(tolerance, coords).segments(this._tail);
+    }
+    transform_self(M: any, parts?: any) {
+        const { _tail } = this;
+        _tail && (this._tail = _tail.transform(M, parts));
+        return this;
+    }
+    // one matrix over many paths, decomposed once for all their arcs; in_place replaces their segments
+    static transform_all(paths: Iterable<PathLC>, M: any, in_place = false) {
+        const parts = M.decompose();
+        const out: PathLC[] = [];
+        for (const path of paths) {
+            if (in_place) {
+                out.push(path.transform_self(M, parts));
+            } else {
+                const { _tail } = path;
+                out.push(_tail ? new PathLC(_tail.transform(M, parts)) : path);
+            }
+        }
+        return out;
+    }
     ////
     static lineTo(x: number, y: number) {
         return this.move_to([0, 0]).line_to([x, y]);
@@ -262,6 +444,9 @@ export class PathLC {
     static parse(d: string) {
         return new this(BaseLC.parse(d));
     }
+    static async parse_stream(source: AsyncIterable<string | Uint8Array> | Iterable<string | Uint8Array>) {
+        return new this((await parse_stream(source, new SegmentSink())).tail);
+    }
     static rect(x: number, y: number, w: number, h: number) {
         return (new this(undefined)).rect(x, y, w, h);
     }
@@ -274,13 +459,35 @@ export class PathLC {
 }
 
 
+// x0, x1, y0, y1 of the path up to a segment
+const bbox_path_map = new WeakMap<BaseLC, number[]>();
+
+function path_bbox(tail: BaseLC) {
+    // back to a box already known, usually the one before appending, then forward from there
+    const segs: BaseLC[] = [];
+    let ext: number[] | undefined;
+    for (let cur: BaseLC | undefined = tail; cur && !(ext = bbox_path_map.get(cur)); cur = cur._prev) {
+        segs.push(cur);
+    }
+    let [x0, x1, y0, y1] = ext ?? [Infinity, -Infinity, Infinity, -Infinity];
+    for (let i = segs.length; i-- > 0; ) {
+        const [[a, b], [c, d]] = segs[i].bbox();
+        [x0, x1, y0, y1] = [min(x0, a), max(x1, b), min(y0, c), max(y1, d)];
+    }
+    if (segs.length > 0) {
+        bbox_path_map.set(tail, (ext = [x0, x1, y0, y1]));
+    }
+    return ext!;
+}
+
 const len_segment_map = new WeakMap<BaseLC, number>();
 const len_path_map = new WeakMap<BaseLC, number>();
 
 function path_length(seg: BaseLC) {
     let v = len_path_map.get(seg);
     if (v == null) {
-        len_path_map.set(seg, (v = seg.path_len()));
+        v = probe ? probe.time('path_length', () => seg.path_len()) : seg.path_len();
+        len_path_map.set(seg, v);
     }
     return v;
 }
@@ -293,6 +500,24 @@ function segment_length(seg: BaseLC) {
     return v;
 }
 
+export function wrap_length(lenP: number, LEN: number, clamp?: boolean) {
+    if (lenP < 0) {
+        if (clamp) {
+            lenP = 0;
+        } else {
+            lenP = LEN + (lenP % LEN);
+        }
+    }
+    if (lenP > LEN) {
+        if (clamp) {
+            lenP = LEN;
+        } else if (0 == (lenP = lenP % LEN)) {
+            lenP = LEN;
+        }
+    }
+    return lenP;
+}
+
 function segment_at_length(
     cur: BaseLC | undefined,
     lenP: number,
@@ -300,13 +525,7 @@ function segment_at_length(
     clamp?: boolean
 ): [BaseLC | undefined, number, number] {
     S1: if (cur) {
-        if (lenP < 0) {
-            if (clamp) {
-                lenP = 0;
-            } else {
-                lenP = LEN + (lenP % LEN);
-            }
-        }
+        lenP = wrap_length(lenP, LEN, clamp);
         if (lenP == 0) {
             let last: BaseLC | undefined;
             do {
@@ -319,12 +538,6 @@ function segment_at_length(
                 return [last, 0, segment_length(last)];
             }
             break S1;
-        } else if (lenP > LEN) {
-            if (clamp) {
-                lenP = LEN;
-            } else if (0 == (lenP = lenP % LEN)) {
-                lenP = LEN;
-            }
         }
         let to = LEN;
         do {
@@ -344,6 +557,181 @@ function segment_at_length(
     return [undefined, NaN, NaN];
 }
 
+interface NearestIndex {
+    // segments that are not moves
+    segs: BaseLC[];
+    // where each is in the path, moves counted
+    ids: Int32Array;
+    // leaves from this node on, a power of 2
+    first: number;
+    // min_x, min_y, max_x, max_y of each node of a complete binary tree over segs in order,
+    // the root at 1, node i with children 2i and 2i + 1, segment k the box of node first + k
+    boxes: Float64Array;
+    // where each is in the length index, once asked for
+    in_lengths?: Int32Array;
+}
+
+const nearest_map = new WeakMap<BaseLC, NearestIndex>();
+
+function nearest_index(tail: BaseLC) {
+    let index = nearest_map.get(tail);
+    if (!index) {
+        const all: BaseLC[] = [];
+        for (let cur: BaseLC | undefined = tail; cur; cur = cur._prev) {
+            all.push(cur);
+        }
+        all.reverse();
+        const segs: BaseLC[] = [];
+        const ids: number[] = [];
+        all.forEach((cur, i) => cur._prev && !(cur instanceof MoveLC) && segs.push(cur) && ids.push(i));
+        let first = 1;
+        while (first < segs.length) {
+            first *= 2;
+        }
+        const boxes = new Float64Array(first * 8);
+        for (let i = 0; i < first * 2; ++i) {
+            boxes.set([Infinity, Infinity, -Infinity, -Infinity], i * 4);
+        }
+        segs.forEach((cur, k) => {
+            const [[x0, x1], [y0, y1]] = cur.bbox();
+            boxes.set([x0, y0, x1, y1], (first + k) * 4);
+        });
+        for (let i = first; i-- > 1; ) {
+            const [o, l, r] = [i * 4, i * 8, i * 8 + 4];
+            boxes[o] = min(boxes[l], boxes[r]);
+            boxes[o + 1] = min(boxes[l + 1], boxes[r + 1]);
+            boxes[o + 2] = max(boxes[l + 2], boxes[r + 2]);
+            boxes[o + 3] = max(boxes[l + 3], boxes[r + 3]);
+        }
+        nearest_map.set(tail, (index = { segs, ids: Int32Array.from(ids), first, boxes }));
+    }
+    return index;
+}
+
+function box_distance2(boxes: Float64Array, i: number, x: number, y: number) {
+    const o = i * 4;
+    const dx = max(boxes[o] - x, 0, x - boxes[o + 2]);
+    const dy = max(boxes[o + 1] - y, 0, y - boxes[o + 3]);
+    return dx * dx + dy * dy;
+}
+
+// where each of segs is in all, -1 if not, both in path order
+function positions_in(segs: BaseLC[], all: BaseLC[]) {
+    const at = new Int32Array(segs.length);
+    for (let k = 0, j = 0; k < segs.length; ++k) {
+        let i = j;
+        while (i < all.length && all[i] !== segs[k]) {
+            ++i;
+        }
+        i < all.length ? (at[k] = i, j = i + 1) : (at[k] = -1);
+    }
+    return at;
+}
+
+// segment, t and squared distance of the closest point, the first segment if more are as close:
+// down the tree, nearer child first, leaving out boxes farther than the best so far
+function nearest_in({ segs, first, boxes }: NearestIndex, x: number, y: number): [number, number, number] {
+    let [j, t, best2] = [-1, NaN, Infinity];
+    const stack = segs.length > 0 ? [1] : [];
+    for (let i; (i = stack.pop()); ) {
+        if (!(box_distance2(boxes, i, x, y) <= best2)) {
+            continue;
+        } else if (i < first) {
+            const [a, b] = [2 * i, 2 * i + 1];
+            box_distance2(boxes, a, x, y) <= box_distance2(boxes, b, x, y) ? stack.push(b, a) : stack.push(a, b);
+            continue;
+        }
+        const k = i - first;
+        const seg = segs[k];
+        if (!seg) {
+            continue;
+        }
+        for (const s of seg.nearest_ts(x, y)) {
+            const [qx, qy] = s <= 0 ? seg.from : s >= 1 ? seg.to : seg.point_at(s);
+            const e = (qx - x) ** 2 + (qy - y) ** 2;
+            (e < best2 || (e == best2 && k < j)) && ([j, t, best2] = [k, s, e]);
+        }
+    }
+    return [j, t, best2];
+}
+
+interface LengthIndex {
+    total: number;
+    first?: BaseLC;
+    segs: BaseLC[];
+    starts: Float64Array;
+    lens: Float64Array;
+}
+
+// keyed by the tail, so appending (a new tail) leaves the old index behind
+const index_map = new WeakMap<BaseLC, LengthIndex>();
+
+function length_index(tail: BaseLC) {
+    let index = index_map.get(tail);
+    if (!index) {
+        const all: BaseLC[] = [];
+        for (let cur: BaseLC | undefined = tail; cur; cur = cur._prev) {
+            all.push(cur);
+        }
+        let total = 0;
+        for (let i = all.length; i-- > 0; ) {
+            total += segment_length(all[i]);
+        }
+        // start offsets the way segment_at_length finds them, walking back from the total
+        const segs: BaseLC[] = [];
+        const starts: number[] = [];
+        const lens: number[] = [];
+        let first: BaseLC | undefined;
+        let to = total;
+        for (const cur of all) {
+            if (!(cur instanceof MoveLC)) {
+                first = cur;
+                const lenS = segment_length(cur);
+                if (lenS >= 0) {
+                    segs.push(cur);
+                    starts.push((to -= lenS));
+                    lens.push(lenS);
+                }
+            }
+        }
+        index = {
+            total,
+            first,
+            segs: segs.reverse(),
+            starts: Float64Array.from(starts.reverse()),
+            lens: Float64Array.from(lens.reverse()),
+        };
+        index_map.set(tail, index);
+        len_path_map.set(tail, total);
+    }
+    return index;
+}
+
+function index_at_length(index: LengthIndex, lenP: number, clamp?: boolean): [BaseLC | undefined, number, number] {
+    const { total, first, segs, starts, lens } = index;
+    lenP = wrap_length(lenP, total, clamp);
+    if (lenP == 0) {
+        if (first) {
+            return [first, 0, segment_length(first)];
+        }
+    } else {
+        // last segment starting at or before lenP
+        let [lo, hi] = [0, segs.length];
+        while (lo < hi) {
+            const mid = (lo + hi) >>> 1;
+            if (lenP - starts[mid] >= 0) {
+                lo = mid + 1;
+            } else {
+                hi = mid;
+            }
+        }
+        if (lo > 0) {
+            return [segs[lo - 1], lenP - starts[lo - 1], lens[lo - 1]];
+        }
+    }
+    return [undefined, NaN, NaN];
+}
+
 function* enum_sub_paths(cur: BaseLC | undefined) {
     let tail: undefined | BaseLC;
     for (; cur; cur = cur._prev) {
@@ -0,0 +1,161 @@
+import { BaseLC, MoveLC, CloseLC, LineCL, QuadLC, CubicLC, ArcLC } from './command.js';
+import { PathSink } from './parser.js';
+import { arc_params } from './archelp.js';
+const { abs, max, ceil, sqrt, acos, cos, sin, hypot, PI } = Math;
+
+// Receives the points a full Polyline had, before it is reused
+export interface PolylineOutput {
+    write(coords: Float64Array, breaks: number[]): unknown;
+}
+
+// A path as straight runs, none farther than tolerance from the curve it stands for,
+// in packed x, y pairs; breaks are the points subpaths start at
+export class Polyline implements PathSink {
+    readonly tolerance: number;
+    readonly out?: PolylineOutput;
+    coords: Float64Array;
+    size = 0;
+    breaks: number[] = [];
+    #x = 0;
+    #y = 0;
+    // coords: a buffer to fill, or the capacity of one; it grows when full, unless out takes it
+    constructor(tolerance = 0.25, coords: Float64Array | number = 1024, out?: PolylineOutput) {
+        if (!(tolerance > 0)) {
+            throw new Error(`Unexpected tolerance ${tolerance}`);
+        }
+        this.tolerance = tolerance;
+        this.coords = typeof coords == 'number' ? new Float64Array(max(2, coords * 2)) : coords;
+        this.out = out;
+    }
+    get points() {
+        return this.coords.subarray(0, this.size * 2);
+    }
+    #push(x: number, y: number): void {
+        let i = this.size * 2;
+        if (i + 2 > this.coords.length && this.out) {
+            this.flush();
+            i = 0;
+        }
+        // still full: no out, or a buffer too small for a point
+        if (i + 2 > this.coords.length) {
+            const coords = new Float64Array(max(16, this.coords.length * 2));
+            coords.set(this.coords);
+            this.coords = coords;
+        }
+        this.coords[i] = this.#x = x;
+        this.coords[i + 1] = this.#y = y;
+        ++this.size;
+    }
+    // hands the points so far to out, then starts over
+    flush() {
+        if (this.out && this.size > 0) {
+            this.out.write(this.points, this.breaks);
+        }
+        this.size = 0;
+        this.breaks = [];
+        return this;
+    }
+    end() {
+        return this.out ? this.flush() : this;
+    }
+    move_to(x: number, y: number) {
+        this.#push(x, y);
+        this.breaks.push(this.size - 1);
+    }
+    line_to(x: number, y: number) {
+        this.#push(x, y);
+    }
+    close_to(x: number, y: number) {
+        this.#push(x, y);
+    }
+    // steps for a chord error of at most tolerance: |B''| / 8 per step squared
+    quad_to(cx: number, cy: number, x: number, y: number) {
+        const [x0, y0] = [this.#x, this.#y];
+        const dd = hypot(x0 - 2 * cx + x, y0 - 2 * cy + y);
+        const n = ceil(sqrt(dd / (4 * this.tolerance)));
+        for (let i = 1; i < n; ++i) {
+            const t = i / n;
+            const [a, b, c] = [(1 - t) * (1 - t), 2 * (1 - t) * t, t * t];
+            this.#push(a * x0 + b * cx + c * x, a * y0 + b * cy + c * y);
+        }
+        this.#push(x, y);
+    }
+    // Wang's formula
+    curve_to(x1: number, y1: number, x2: number, y2: number, x: number, y: number) {
+        const [x0, y0] = [this.#x, this.#y];
+        const dd = max(hypot(x0 - 2 * x1 + x2, y0 - 2 * y1 + y2), hypot(x1 - 2 * x2 + x, y1 - 2 * y2 + y));
+        const n = ceil(sqrt((0.75 * dd) / this.tolerance));
+        for (let i = 1; i < n; ++i) {
+            const t = i / n;
+            const F = 1 - t;
+            const [a, b, c, d] = [F * F * F, 3 * F * F * t, 3 * F * t * t, t * t * t];
+            this.#push(a * x0 + b * x1 + c * x2 + d * x, a * y0 + b * y1 + c * y2 + d * y);
+        }
+        this.#push(x, y);
+    }
+    arc_to(rx: number, ry: number, φ: number, bigArc: number, sweep: number, x: number, y: number) {
+        const [x0, y0] = [this.#x, this.#y];
+        if (x0 == x && y0 == y) {
+            return;
+        }
+        const [, rX, rY, sinφ, cosφ, cx, cy, rtheta, rdelta] = arc_params(x0, y0, rx, ry, φ, !!bigArc, !!sweep, x, y);
+        this.#arc(rX, rY, cosφ, sinφ, cx, cy, rtheta, rdelta, x, y);
+    }
+    // an arc with its centre parameters at hand
+    arc_with(arc: ArcLC) {
+        const { rx, ry, cosφ, sinφ, cx, cy, rtheta, rdelta, to, from } = arc;
+        if (!from.equals(to)) {
+            this.#arc(rx, ry, cosφ, sinφ, cx, cy, rtheta, rdelta, to[0], to[1]);
+        }
+    }
+    // the ellipse is an affine image of a circle, so a chord is off by at most r⋅(1 - cos(Δθ/2))
+    #arc(
+        rx: number,
+        ry: number,
+        cosφ: number,
+        sinφ: number,
+        cx: number,
+        cy: number,
+        rtheta: number,
+        rdelta: number,
+        x: number,
+        y: number
+    ) {
+        const r = max(abs(rx), abs(ry));
+        const step = this.tolerance < r ? 2 * acos(1 - this.tolerance / r) : PI;
+        const n = ceil(abs(rdelta) / step);
+        for (let i = 1; i < n; ++i) {
+            const θ = rtheta + (rdelta * i) / n;
+            const [c, s] = [cos(θ), sin(θ)];
+            this.#push(rx * cosφ * c - ry * sinφ * s + cx, rx * sinφ * c + ry * cosφ * s + cy);
+        }
+        this.#push(x, y);
+    }
+    // the segments up to tail, from the head, without recursing
+    segments(tail: BaseLC | undefined) {
+        const segs: BaseLC[] = [];
+        for (let cur = tail; cur; cur = cur._prev) {
+            segs.push(cur);
+        }
+        for (let i = segs.length; i-- > 0; ) {
+            const seg = segs[i];
+            const [x, y] = seg.to;
+            if (!seg._prev || seg instanceof MoveLC) {
+                this.move_to(x, y);
+            } else if (seg instanceof CloseLC) {
+                this.close_to(x, y);
+            } else if (seg instanceof LineCL) {
+                this.line_to(x, y);
+            } else if (seg instanceof QuadLC) {
+                const [cx, cy] = seg.p;
+                this.quad_to(cx, cy, x, y);
+            } else if (seg instanceof CubicLC) {
+                const [[x1, y1], [x2, y2]] = [seg.c1, seg.c2];
+                this.curve_to(x1, y1, x2, y2, x, y);
+            } else if (seg instanceof ArcLC) {
+                this.arc_with(seg);
+            }
+        }
+        return this;
+    }
+}
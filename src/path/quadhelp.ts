@@ -1,5 +1,6 @@
 import { BoundingBox } from '../bbox.js';
 import { Vector } from '../vector.js';
+import { SpeedFn } from './lengthhelp.js';
 
 // https://gitlab.com/inkscape/extensions/-/blob/master/inkex/transforms.py
 export function quadratic_extrema(a: number, b: number, c: number) {
@@ -41,6 +42,17 @@ export function quad_length([[x0, y0], [x1, y1], [x2, y2]]: Iterable<number>[],
 
     return (Math.sqrt(A) / 2) * (u * uuk - b * bbk + term);
 }
+export function quad_speed([[x0, y0], [x1, y1], [x2, y2]]: Iterable<number>[]): SpeedFn {
+    const ax = 2 * (x0 - 2 * x1 + x2);
+    const ay = 2 * (y0 - 2 * y1 + y2);
+    const bx = 2 * (x1 - x0);
+    const by = 2 * (y1 - y0);
+    return (t: number) => {
+        const dx = ax * t + bx;
+        const dy = ay * t + by;
+        return Math.sqrt(dx * dx + dy * dy);
+    };
+}
 export function quad_split_at([[x1, y1], [cx, cy], [x2, y2]]: Vector[], t: number) {
     const mx1 = (1 - t) * x1 + t * cx;
     const mx2 = (1 - t) * cx + t * x2;
@@ -56,7 +68,7 @@ export function quad_split_at([[x1, y1], [cx, cy], [x2, y2]]: Vector[], t: numbe
     ];
 }
 
-export function quad_point_at([[x1, y1], [cx, cy], [x2, y2]]: Vector[], t: number) {
+export function quad_point_at([[x1, y1], [cx, cy], [x2, y2]]: Iterable<number>[], t: number) {
     const v = 1 - t;
     return Vector.new(v * v * x1 + 2 * v * t * cx + t * t * x2, v * v * y1 + 2 * v * t * cy + t * t * y2);
 }
@@ -77,7 +89,7 @@ export function quad_slope_at([from, c, to]: Vector[], t: number): Vector {
     return a.add(b).multiply(2); // 1st derivative;
 }
 
-export function quad_bbox([[x1, y1], [x2, y2], [x3, y3]]: Vector[]) {
+export function quad_bbox([[x1, y1], [x2, y2], [x3, y3]]: Iterable<number>[]) {
     return BoundingBox.extrema(quadratic_extrema(x1, x2, x3), quadratic_extrema(y1, y2, y3));
 }
 
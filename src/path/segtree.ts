@@ -0,0 +1,405 @@
+import { Vector } from '../vector.js';
+import { VecRay } from '../ray.js';
+import { BaseLC, MoveLC, QuadLC, CubicLC, ArcLC } from './command.js';
+import { PathLC } from './pathlc.js';
+import { poly_roots, bezier_coefs } from './cubichelp.js';
+import { arc_t_at_angle } from './archelp.js';
+const { min, max, sqrt, atan2, acos, hypot } = Math;
+
+export interface SegmentEntry<T> {
+    id: number;
+    seg: BaseLC;
+    owner: T;
+}
+
+export interface SegmentHit<T> extends SegmentEntry<T> {
+    t: number;
+    point: Vector;
+    distance: number;
+}
+
+class Node<T> {
+    x0 = Infinity;
+    y0 = Infinity;
+    x1 = -Infinity;
+    y1 = -Infinity;
+    parent?: Node<T>;
+    left?: Node<T>;
+    right?: Node<T>;
+    entry?: SegmentEntry<T>;
+    refit() {
+        const { left, right } = this;
+        if (left && right) {
+            this.x0 = min(left.x0, right.x0);
+            this.y0 = min(left.y0, right.y0);
+            this.x1 = max(left.x1, right.x1);
+            this.y1 = max(left.y1, right.y1);
+        }
+    }
+    overlaps(that: Node<T>) {
+        return this.x0 <= that.x1 && that.x0 <= this.x1 && this.y0 <= that.y1 && that.y0 <= this.y1;
+    }
+    // squared distance from (x, y) to the box
+    distance2(x: number, y: number) {
+        const dx = x < this.x0 ? this.x0 - x : x > this.x1 ? x - this.x1 : 0;
+        const dy = y < this.y0 ? this.y0 - y : y > this.y1 ? y - this.y1 : 0;
+        return dx * dx + dy * dy;
+    }
+    // if the ray from (x, y) along the unit (h, v) goes through the box before far
+    ray_meets(x: number, y: number, h: number, v: number, far: number) {
+        let [s0, s1] = [0, far];
+        if (h == 0) {
+            if (x < this.x0 || x > this.x1) return false;
+        } else {
+            const [a, b] = [(this.x0 - x) / h, (this.x1 - x) / h];
+            [s0, s1] = [max(s0, min(a, b)), min(s1, max(a, b))];
+        }
+        if (v == 0) {
+            if (y < this.y0 || y > this.y1) return false;
+        } else {
+            const [a, b] = [(this.y0 - y) / v, (this.y1 - y) / v];
+            [s0, s1] = [max(s0, min(a, b)), min(s1, max(a, b))];
+        }
+        return s0 <= s1;
+    }
+}
+
+function area(x0: number, y0: number, x1: number, y1: number) {
+    return (x1 - x0) * (y1 - y0);
+}
+
+function leaf<T>(entry: SegmentEntry<T>) {
+    const node = new Node<T>();
+    const [[x0, x1], [y0, y1]] = entry.seg.bbox();
+    [node.x0, node.y0, node.x1, node.y1] = [x0, y0, x1, y1];
+    node.entry = entry;
+    return node;
+}
+
+function join<T>(left: Node<T>, right: Node<T>) {
+    const node = new Node<T>();
+    [node.left, node.right] = [left, right];
+    left.parent = right.parent = node;
+    node.refit();
+    return node;
+}
+
+// top down, halving at the median centre along the longer side
+function build<T>(nodes: Node<T>[], lo: number, hi: number): Node<T> {
+    if (hi - lo == 1) {
+        return nodes[lo];
+    }
+    let [x0, y0, x1, y1] = [Infinity, Infinity, -Infinity, -Infinity];
+    for (let i = lo; i < hi; ++i) {
+        const n = nodes[i];
+        [x0, y0, x1, y1] = [min(x0, n.x0), min(y0, n.y0), max(x1, n.x1), max(y1, n.y1)];
+    }
+    const part = nodes.slice(lo, hi);
+    if (x1 - x0 >= y1 - y0) {
+        part.sort((a, b) => a.x0 + a.x1 - b.x0 - b.x1);
+    } else {
+        part.sort((a, b) => a.y0 + a.y1 - b.y0 - b.y1);
+    }
+    for (let i = lo; i < hi; ++i) {
+        nodes[i] = part[i - lo];
+    }
+    const mid = (lo + hi) >>> 1;
+    return join(build(nodes, lo, mid), build(nodes, mid, hi));
+}
+
+// Bezier control points of a line, quadratic or cubic, x and y apart
+function bezier_points(seg: BaseLC): [number[], number[]] | undefined {
+    const [x, y] = seg.from;
+    const [ex, ey] = seg.to;
+    if (seg instanceof CubicLC) {
+        const { c1, c2 } = seg;
+        return [
+            [x, c1[0], c2[0], ex],
+            [y, c1[1], c2[1], ey],
+        ];
+    } else if (seg instanceof QuadLC) {
+        const { p } = seg;
+        return [
+            [x, p[0], ex],
+            [y, p[1], ey],
+        ];
+    } else if (!(seg instanceof ArcLC)) {
+        return [
+            [x, ex],
+            [y, ey],
+        ];
+    }
+}
+
+// t values where seg crosses the line through (x, y) along (h, v)
+function crossing_ts(seg: BaseLC, x: number, y: number, h: number, v: number) {
+    const pts = bezier_points(seg);
+    if (pts) {
+        // signed distances of the control points from the line, a Bezier of its own
+        const d = pts[0].map((px, i) => h * (pts[1][i] - y) - v * (px - x));
+        return poly_roots(bezier_coefs(d));
+    }
+    const ts: number[] = [];
+    if (seg instanceof ArcLC && !seg.from.equals(seg.to)) {
+        // K + A cosθ + B sinθ = 0
+        const { rx, ry, cosφ, sinφ, cx, cy } = seg;
+        const K = h * (cy - y) - v * (cx - x);
+        const A = h * rx * sinφ - v * rx * cosφ;
+        const B = h * ry * cosφ + v * ry * sinφ;
+        const R = hypot(A, B);
+        if (R > 0 && K <= R && -K <= R) {
+            const base = atan2(B, A);
+            const off = acos(-K / R);
+            arc_t_at_angle(seg, base + off, ts);
+            off > 0 && arc_t_at_angle(seg, base - off, ts);
+        }
+    }
+    return ts;
+}
+
+// A bounding volume hierarchy over segments, each boxed by its bbox()
+export class SegmentTree<T = PathLC | undefined> {
+    #root?: Node<T>;
+    #leaves = new Map<number, Node<T>>();
+    #next = 0;
+    // milliseconds spent in each kind of call, and the number of queries
+    readonly timings = { build: 0, insert: 0, remove: 0, query: 0, queries: 0 };
+    get size() {
+        return this.#leaves.size;
+    }
+    get depth() {
+        let depth = 0;
+        const stack: [Node<T>, number][] = this.#root ? [[this.#root, 1]] : [];
+        for (let top; (top = stack.pop()); ) {
+            const [node, d] = top;
+            depth = max(depth, d);
+            node.left && stack.push([node.left, d + 1], [node.right!, d + 1]);
+        }
+        return depth;
+    }
+    entry(id: number) {
+        return this.#leaves.get(id)?.entry;
+    }
+    *entries() {
+        for (const node of this.#leaves.values()) {
+            yield node.entry!;
+        }
+    }
+    // drawn segments of the paths, owned by their path; replaces what the tree had
+    static from_paths(paths: Iterable<PathLC>) {
+        const tree = new SegmentTree<PathLC>();
+        const items: [BaseLC, PathLC][] = [];
+        for (const path of paths) {
+            for (let cur = path._tail; cur; cur = cur._prev) {
+                cur._prev && !(cur instanceof MoveLC) && items.push([cur, path]);
+            }
+        }
+        return tree.build(items);
+    }
+    build(items: Iterable<[BaseLC, T]>) {
+        const t0 = performance.now();
+        this.#leaves.clear();
+        const nodes: Node<T>[] = [];
+        for (const [seg, owner] of items) {
+            const node = leaf({ id: this.#next++, seg, owner });
+            this.#leaves.set(node.entry!.id, node);
+            nodes.push(node);
+        }
+        this.#root = nodes.length > 0 ? build(nodes, 0, nodes.length) : undefined;
+        this.#root && (this.#root.parent = undefined);
+        this.timings.build += performance.now() - t0;
+        return this;
+    }
+    // rebuilt top down, after many inserts and removes
+    rebuild() {
+        return this.build([...this.entries()].map(({ seg, owner }) => [seg, owner] as [BaseLC, T]));
+    }
+    insert(seg: BaseLC, owner: T) {
+        const t0 = performance.now();
+        const node = leaf({ id: this.#next++, seg, owner });
+        const id = node.entry!.id;
+        this.#leaves.set(id, node);
+        let sib = this.#root;
+        if (!sib) {
+            this.#root = node;
+        } else {
+            // down to the sibling the box grows least by
+            const { x0, y0, x1, y1 } = node;
+            while (sib.left) {
+                const { left, right } = sib as { left: Node<T>; right: Node<T> };
+                const grow = (n: Node<T>) =>
+                    area(min(x0, n.x0), min(y0, n.y0), max(x1, n.x1), max(y1, n.y1)) - area(n.x0, n.y0, n.x1, n.y1);
+                sib = grow(left) <= grow(right) ? left : right;
+            }
+            const parent = sib.parent;
+            const joined = join(sib, node);
+            joined.parent = parent;
+            if (!parent) {
+                this.#root = joined;
+            } else {
+                parent.left === sib ? (parent.left = joined) : (parent.right = joined);
+                for (let p: Node<T> | undefined = parent; p; p = p.parent) {
+                    p.refit();
+                }
+            }
+        }
+        this.timings.insert += performance.now() - t0;
+        return id;
+    }
+    insert_path(path: PathLC, owner: T) {
+        const segs: BaseLC[] = [];
+        for (let cur = path._tail; cur; cur = cur._prev) {
+            cur._prev && !(cur instanceof MoveLC) && segs.push(cur);
+        }
+        return segs.reverse().map(seg => this.insert(seg, owner));
+    }
+    remove(id: number) {
+        const t0 = performance.now();
+        const node = this.#leaves.get(id);
+        if (node) {
+            this.#leaves.delete(id);
+            const parent = node.parent;
+            if (!parent) {
+                this.#root = undefined;
+            } else {
+                const sib = parent.left === node ? parent.right! : parent.left!;
+                const grand = parent.parent;
+                sib.parent = grand;
+                if (!grand) {
+                    this.#root = sib;
+                } else {
+                    grand.left === parent ? (grand.left = sib) : (grand.right = sib);
+                    for (let p: Node<T> | undefined = grand; p; p = p.parent) {
+                        p.refit();
+                    }
+                }
+            }
+        }
+        this.timings.remove += performance.now() - t0;
+        return !!node;
+    }
+    #timed<R>(f: () => R) {
+        const t0 = performance.now();
+        try {
+            return f();
+        } finally {
+            this.timings.query += performance.now() - t0;
+            ++this.timings.queries;
+        }
+    }
+    // segments whose box, grown by tolerance, holds p
+    at_point(p: Iterable<number>, tolerance = 0) {
+        const [x, y] = p;
+        return this.#timed(() => {
+            const found: SegmentEntry<T>[] = [];
+            const stack = this.#root ? [this.#root] : [];
+            for (let node; (node = stack.pop()); ) {
+                if (
+                    x >= node.x0 - tolerance &&
+                    x <= node.x1 + tolerance &&
+                    y >= node.y0 - tolerance &&
+                    y <= node.y1 + tolerance
+                ) {
+                    node.entry ? found.push(node.entry) : stack.push(node.left!, node.right!);
+                }
+            }
+            return found;
+        });
+    }
+    // closest point on any segment, not farther than max_distance
+    nearest(p: Iterable<number>, max_distance = Infinity): SegmentHit<T> | undefined {
+        const [x, y] = p;
+        return this.#timed(() => {
+            let best: SegmentHit<T> | undefined;
+            let best2 = max_distance * max_distance;
+            const stack = this.#root ? [this.#root] : [];
+            for (let node; (node = stack.pop()); ) {
+                if (!(node.distance2(x, y) <= best2)) {
+                    continue;
+                }
+                const { entry } = node;
+                if (entry) {
+                    const { seg } = entry;
+                    for (const t of seg.nearest_ts(x, y)) {
+                        const q = t <= 0 ? seg.from : t >= 1 ? seg.to : seg.point_at(t);
+                        const d2 = (q[0] - x) ** 2 + (q[1] - y) ** 2;
+                        if (d2 < best2 || (d2 == best2 && !best)) {
+                            best2 = d2;
+                            best = { ...entry, t, point: q, distance: sqrt(d2) };
+                        }
+                    }
+                } else {
+                    // the nearer child is popped first
+                    const [a, b] = [node.left!, node.right!];
+                    a.distance2(x, y) < b.distance2(x, y) ? stack.push(b, a) : stack.push(a, b);
+                }
+            }
+            return best;
+        });
+    }
+    // where the ray meets segments, nearest first, up to max_distance along it
+    ray_cast(ray: VecRay, max_distance = Infinity) {
+        const [x, y] = ray.pos;
+        const [dx, dy] = ray.dir;
+        const len = hypot(dx, dy);
+        if (!(len > 0 && len < Infinity)) {
+            throw new TypeError(`Unexpected ray direction <${dx}, ${dy}>`);
+        }
+        const [h, v] = [dx / len, dy / len];
+        return this.#timed(() => {
+            const hits: SegmentHit<T>[] = [];
+            const stack = this.#root ? [this.#root] : [];
+            for (let node; (node = stack.pop()); ) {
+                if (!node.ray_meets(x, y, h, v, max_distance)) {
+                    continue;
+                } else if (!node.entry) {
+                    stack.push(node.left!, node.right!);
+                    continue;
+                }
+                const { entry } = node;
+                const { seg } = entry;
+                for (const t of crossing_ts(seg, x, y, h, v)) {
+                    const q = t <= 0 ? seg.from : t >= 1 ? seg.to : seg.point_at(t);
+                    const s = (q[0] - x) * h + (q[1] - y) * v;
+                    s >= 0 && s <= max_distance && hits.push({ ...entry, t, point: q, distance: s });
+                }
+            }
+            return hits.sort((a, b) => a.distance - b.distance);
+        });
+    }
+    // pairs of segments with overlapping boxes, the candidates for intersections;
+    // within one tree, segments next to each other on a path are left out
+    pairs(other?: SegmentTree<T>) {
+        const that = other ?? this;
+        return this.#timed(() => {
+            const found: [SegmentEntry<T>, SegmentEntry<T>][] = [];
+            const [a, b] = [this.#root, that.#root];
+            if (!a || !b) {
+                return found;
+            }
+            const self = that === this;
+            const stack: [Node<T>, Node<T>][] = [[a, b]];
+            for (let top; (top = stack.pop()); ) {
+                const [m, n] = top;
+                if (self && m === n) {
+                    if (m.left) {
+                        const [l, r] = [m.left, m.right!];
+                        stack.push([l, l], [r, r], [l, r]);
+                    }
+                } else if (!m.overlaps(n)) {
+                    // apart
+                } else if (m.entry && n.entry) {
+                    const [e, f] = [m.entry, n.entry];
+                    if (!self || (e.seg._prev !== f.seg && f.seg._prev !== e.seg)) {
+                        found.push(self && e.id > f.id ? [f, e] : [e, f]);
+                    }
+                } else if (n.entry || (m.left && area(m.x0, m.y0, m.x1, m.y1) >= area(n.x0, n.y0, n.x1, n.y1))) {
+                    stack.push([m.left!, n], [m.right!, n]);
+                } else {
+                    stack.push([m, n.left!], [m, n.right!]);
+                }
+            }
+            return found;
+        });
+    }
+}
@@ -0,0 +1,178 @@
+import { DescParams } from './index.js';
+import { BaseLC } from './command.js';
+
+export interface WriteParams extends DescParams {
+    // minimal separators, no leading zeros, no repeated command letters
+    compact?: boolean;
+    // each segment relative or absolute, whichever is shorter
+    auto?: boolean;
+    digits?: number;
+}
+
+export interface PathOutput {
+    write(s: string): unknown;
+}
+
+const FLUSH_SIZE = 1 << 16;
+// what each argument of an absolute command is: x, y or neither
+const ARGS: { [cmd: string]: string } = {
+    M: 'xy',
+    L: 'xy',
+    H: 'x',
+    V: 'y',
+    C: 'xyxyxy',
+    S: 'xyxy',
+    Q: 'xyxy',
+    T: 'xy',
+    A: '-----xy',
+    Z: '',
+};
+
+// n.toFixed(digits) without trailing zeros or a trailing '.'
+export function fmt_number(n: number, digits: number) {
+    if (Number.isInteger(n) && n < 1e21 && n > -1e21) {
+        return String(n);
+    }
+    const v = n.toFixed(digits);
+    if (v.indexOf('.') < 0) {
+        return v;
+    }
+    let end = v.length;
+    while (v.charCodeAt(end - 1) == 48) {
+        --end;
+    }
+    if (v.charCodeAt(end - 1) == 46) {
+        --end;
+    }
+    return end < v.length ? v.slice(0, end) : v;
+}
+
+// Path data out of terms, into a string or a stream
+export class PathWriter {
+    readonly opt?: WriteParams;
+    readonly out?: PathOutput;
+    readonly digits: number;
+    // what segments are asked for: absolute ones when choosing per segment
+    readonly term_opt?: DescParams;
+    #parts: string[] = [];
+    #size = 0;
+    // compact: the command a bare number continues, and if the last number has a '.' or an exponent
+    #cmd = '';
+    #dot = false;
+    // auto: the point a reader of the output is at, and its subpath start
+    #x = 0;
+    #y = 0;
+    #mx = 0;
+    #my = 0;
+    constructor(opt?: WriteParams, out?: PathOutput) {
+        this.opt = opt;
+        this.out = out;
+        this.digits = opt?.digits ?? BaseLC.digits;
+        this.term_opt = opt?.auto ? { ...opt, relative: false } : opt;
+    }
+    path(tail: BaseLC | undefined) {
+        const segs: BaseLC[] = [];
+        for (let cur = tail; cur; cur = cur._prev) {
+            segs.push(cur);
+        }
+        const { term_opt } = this;
+        for (let i = segs.length; i-- > 0; ) {
+            this.term(segs[i].term(term_opt));
+        }
+        return this;
+    }
+    term([cmd, ...args]: (number | string)[]) {
+        const { opt } = this;
+        if (opt?.auto) {
+            this.#auto(cmd as string, args as number[]);
+        } else {
+            this.#put(this.#render(cmd as string, args as number[]));
+        }
+        return this;
+    }
+    end() {
+        const text = this.#parts.join('');
+        this.#parts = [];
+        this.#size = 0;
+        if (this.out) {
+            text && this.out.write(text);
+            return '';
+        }
+        return text;
+    }
+    #put([s, cmd, dot]: [string, string, boolean]) {
+        this.#cmd = cmd;
+        this.#dot = dot;
+        this.#parts.push(s);
+        if ((this.#size += s.length) >= FLUSH_SIZE && this.out) {
+            this.out.write(this.#parts.join(''));
+            this.#parts = [];
+            this.#size = 0;
+        }
+    }
+    #number(v: number) {
+        const s = fmt_number(v, this.digits);
+        if (this.opt?.compact) {
+            if (s.startsWith('0.')) {
+                return s.slice(1);
+            } else if (s.startsWith('-0.')) {
+                return '-' + s.slice(2);
+            }
+        }
+        return s;
+    }
+    #render(cmd: string, args: number[]): [string, string, boolean] {
+        if (!this.opt?.compact) {
+            let s = cmd;
+            for (let i = 0; i < args.length; ++i) {
+                s += (i > 0 ? ',' : '') + this.#number(args[i]);
+            }
+            return [s, cmd, false];
+        }
+        // a repeated command, or a line after a move, can go without its letter
+        const bare = args.length > 0 && cmd == this.#cmd;
+        let s = bare ? '' : cmd;
+        let dot = this.#dot;
+        for (let i = 0; i < args.length; ++i) {
+            const v = this.#number(args[i]);
+            if (i > 0 || bare) {
+                const c = v.charCodeAt(0);
+                if (!(c == 45 || (c == 46 && dot))) {
+                    s += ' ';
+                }
+            }
+            s += v;
+            dot = v.indexOf('.') >= 0 || v.indexOf('e') >= 0;
+        }
+        return [s, cmd == 'M' ? 'L' : cmd == 'm' ? 'l' : cmd, dot];
+    }
+    #auto(cmd: string, args: number[]) {
+        const kinds = ARGS[cmd];
+        if (kinds == null) {
+            throw new Error(`Unexpected command ${cmd}`);
+        } else if (cmd == 'Z') {
+            [this.#x, this.#y] = [this.#mx, this.#my];
+            this.#put(this.#render(cmd, args));
+            return;
+        }
+        // relative to where the reader is, not to the exact previous end, so errors do not add up
+        const [x0, y0] = [this.#x, this.#y];
+        const rel = args.map((v, i) => (kinds[i] == 'x' ? v - x0 : kinds[i] == 'y' ? v - y0 : v));
+        const a = this.#render(cmd, args);
+        const r = this.#render(cmd.toLowerCase(), rel);
+        const relative = r[0].length < a[0].length;
+        const vals = relative ? rel : args;
+        for (let i = 0; i < kinds.length; ++i) {
+            const v = Number(this.#number(vals[i]));
+            if (kinds[i] == 'x') {
+                this.#x = relative ? x0 + v : v;
+            } else if (kinds[i] == 'y') {
+                this.#y = relative ? y0 + v : v;
+            }
+        }
+        if (cmd == 'M') {
+            [this.#mx, this.#my] = [this.#x, this.#y];
+        }
+        this.#put(relative ? r : a);
+    }
+}
@@ -0,0 +1,95 @@
+// Counts and times of operations, taken only while a Probe is in scope
+
+export interface OpStats {
+    calls: number;
+    // wall time, nested calls of the same operation counted once
+    ms: number;
+    // subdivision steps and the deepest of them
+    steps: number;
+    depth: number;
+    // Vectors made by Vector.vec, pos and the Vector methods during the calls
+    vectors: number;
+}
+
+export interface ProbeSnapshot {
+    ops: { [name: string]: OpStats };
+    vectors: number;
+}
+
+// the Probe in scope; the hooks in the library only test this
+export let probe: Probe | undefined;
+// scopes open, latest last, as async ones can close out of order
+const open_scopes: Probe[] = [];
+
+function close_scope(p: Probe) {
+    open_scopes.splice(open_scopes.lastIndexOf(p), 1);
+    probe = open_scopes[open_scopes.length - 1];
+}
+
+export class Probe {
+    readonly ops = new Map<string, OpStats>();
+    vectors = 0;
+    #open = new Set<string>();
+    op(name: string) {
+        let s = this.ops.get(name);
+        if (!s) {
+            this.ops.set(name, (s = { calls: 0, ms: 0, steps: 0, depth: 0, vectors: 0 }));
+        }
+        return s;
+    }
+    // f() as a call of the operation name
+    time<T>(name: string, f: () => T): T {
+        const s = this.op(name);
+        ++s.calls;
+        const open = this.#open;
+        if (open.has(name)) {
+            return f();
+        }
+        open.add(name);
+        const [t0, v0] = [performance.now(), this.vectors];
+        try {
+            return f();
+        } finally {
+            open.delete(name);
+            s.ms += performance.now() - t0;
+            s.vectors += this.vectors - v0;
+        }
+    }
+    step(name: string, depth: number) {
+        const s = this.op(name);
+        ++s.steps;
+        depth > s.depth && (s.depth = depth);
+    }
+    // runs f with this probe in scope, until the promise it returns settles if it does;
+    // while async scopes overlap the latest one still open counts
+    scope<T>(f: () => T): T {
+        open_scopes.push((probe = this));
+        let r: T;
+        try {
+            r = f();
+        } catch (err) {
+            close_scope(this);
+            throw err;
+        }
+        if (r instanceof Promise) {
+            return r.finally(() => close_scope(this)) as T;
+        }
+        close_scope(this);
+        return r;
+    }
+    reset() {
+        this.ops.clear();
+        this.vectors = 0;
+        return this;
+    }
+    snapshot(): ProbeSnapshot {
+        const ops: { [name: string]: OpStats } = {};
+        for (const [name, s] of this.ops) {
+            ops[name] = { ...s };
+        }
+        return { ops, vectors: this.vectors };
+    }
+    toJSON() {
+        return this.snapshot();
+    }
+}
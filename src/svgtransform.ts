@@ -216,14 +216,11 @@ export class SVGTransformList extends Array<SVGTransform> {
 	}
 
 	_parse(d: string) {
-		for (const str of d.split(/\)\s*,?\s*/).slice(0, -1)) {
-			const kv = str.trim().split('(');
-			const name = kv[0].trim();
-			const args = kv[1].split(/[\s,]+/).map(str => parseFloat(str));
+		for (const [name, args] of Matrix.compile(d).ops) {
 			const t = new SVGTransform();
 			switch (name) {
 				case 'matrix':
-					t.setMatrix(MatrixMut.fromArray(args));
+					t.setMatrix(MatrixMut.fromArray([...args]));
 					break;
 				case 'translate':
 					t.setTranslate(args[0], args[1]);
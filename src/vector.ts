@@ -1,3 +1,4 @@
+import { probe } from './probe.js';
 const { sqrt, abs, cos, sin, atan2, PI } = Math;
 const TAU = PI * 2;
 
@@ -122,6 +123,7 @@ export class Vector extends Float64Array {
     }
     add(that: Iterable<number>) {
         const I = that[Symbol.iterator]();
+        probe && ++probe.vectors;
         return new Vector(this.map((v) => v + (I.next().value ?? 0)));
     }
     divide(factor: number) {
@@ -132,6 +134,7 @@ export class Vector extends Float64Array {
     }
     subtract(that: Iterable<number>) {
         const I = that[Symbol.iterator]();
+        probe && ++probe.vectors;
         return new Vector(this.map((v) => v - (I.next().value ?? 0)));
     }
     /**
@@ -156,11 +159,13 @@ export class Vector extends Float64Array {
     // subtract, divide, multiply
     post_subtract(that: Iterable<number> | Vector) {
         const I = that[Symbol.iterator]();
+        probe && ++probe.vectors;
         return new Vector(this.map((v) => (I.next().value ?? 0) - v));
     }
 
     post_add(that: Iterable<number>) {
         const I = that[Symbol.iterator]();
+        probe && ++probe.vectors;
         return new Vector(this.map((v) => (I.next().value ?? 0) + v));
     }
 
@@ -180,55 +185,79 @@ export class Vector extends Float64Array {
     }
 
     transform(matrix: any) {
-        const [x, y, ...o] = this;
+        if (this.length < 2) {
+            const [x, y, ...o] = this;
+            const { a, b, c, d, e, f } = matrix;
+            return Vector.vec(a * x + c * y + e, b * x + d * y + f, ...o);
+        }
         const { a, b, c, d, e, f } = matrix;
-        return Vector.vec(a * x + c * y + e, b * x + d * y + f, ...o);
+        const [x, y] = [this[0], this[1]];
+        probe && ++probe.vectors;
+        const v = new Vector(this);
+        v[0] = a * x + c * y + e;
+        v[1] = b * x + d * y + f;
+        if (isNaN(v[0]) || isNaN(v[1])) {
+            throw new TypeError(`Unextepcted NaN <${[...v]}>`);
+        }
+        return v;
     }
 
     flip_x() {
+        probe && ++probe.vectors;
         return new Vector(this.map((v, i) => (i == 0 ? -v : v)));
     }
 
     flip_y() {
+        probe && ++probe.vectors;
         return new Vector(this.map((v, i) => (i == 1 ? -v : v)));
     }
 
     flip_z() {
+        probe && ++probe.vectors;
         return new Vector(this.map((v, i) => (i == 2 ? -v : v)));
     }
 
     shift_x(d: number) {
+        probe && ++probe.vectors;
         return new Vector(this.map((v, i) => (i == 0 ? v + d : v)));
     }
 
     shift_y(d: number) {
+        probe && ++probe.vectors;
         return new Vector(this.map((v, i) => (i == 1 ? v + d : v)));
     }
 
     shift_z(d: number) {
+        probe && ++probe.vectors;
         return new Vector(this.map((v, i) => (i == 2 ? v + d : v)));
     }
     only_x() {
+        probe && ++probe.vectors;
         return new Vector(this.map((v, i) => (i == 0 ? v : 0)));
     }
 
     only_y() {
+        probe && ++probe.vectors;
         return new Vector(this.map((v, i) => (i == 1 ? v : 0)));
     }
 
     only_z() {
+        probe && ++probe.vectors;
         return new Vector(this.map((v, i) => (i == 2 ? v : 0)));
     }
 
     with_x(n: number) {
+        probe && ++probe.vectors;
         return new Vector(this.map((v, i) => (i == 0 ? n : v)));
     }
 
     with_y(n: number) {
+        probe && ++probe.vectors;
         return new Vector(this.map((v, i) => (i == 1 ? n : v)));
     }
 
     with_z(n: number) {
+        probe && ++probe.vectors;
         return new Vector(this.map((v, i) => (i == 2 ? n : v)));
     }
     rotated(rad: number) {
@@ -244,6 +273,7 @@ export class Vector extends Float64Array {
         const u = 1 - t;
         const a = this.map((v) => v * u);
         const b = that.map((v) => v * t);
+        probe && ++probe.vectors;
         return new Vector(a.map((v, i) => v + b[i]));
     }
     nearest_point_of_line(a: Iterable<number>, b: Iterable<number>): Vector {
@@ -267,6 +297,7 @@ export class Vector extends Float64Array {
                 if (x) {
                     return this.pos(...x);
                 } else {
+                    probe && ++probe.vectors;
                     return new this();
                 }
         }
@@ -277,6 +308,7 @@ export class Vector extends Float64Array {
                 throw new TypeError(`Unextepcted NaN <${n}> <${args}> <${[...arguments]}>`)
             }
         }
+        probe && ++probe.vectors;
         return new this(args);
     }
     static pos(x: number = 0, y: number = 0, z: number = 0) {
@@ -0,0 +1,216 @@
+'uses strict';
+// svggeom against svgpathtools/svgelements on the corpus of test/bench.py
+//
+//   node test/bench.mjs                  both sides, compared to test/bench.baseline.json
+//   BENCH_SIDES=ts node test/bench.mjs   svggeom only
+//   BENCH_SAVE=1 node test/bench.mjs     store the results as the new baseline
+//
+// flatten (to a 0.1 tolerance) and sample (16 fixed steps of point_at per segment)
+// are only run when named in BENCH_OPS, and only on the svggeom side.
+// BENCH_THRESHOLD (default 0.25) is the ops/sec drop, against the baseline,
+// that counts as a regression and fails the run.  BENCH_SETS, BENCH_TIME,
+// BENCH_OPS, N, SEGS, SEED, MIX and DEGEN are shared with bench.py.
+// alloc is the median heap growth of a call, in bytes, after a full gc.
+import { PathLC, Matrix } from 'svggeom';
+import { spawnSync } from 'child_process';
+import { readFileSync, writeFileSync, existsSync } from 'fs';
+import { fileURLToPath } from 'url';
+import v8 from 'v8';
+import vm from 'vm';
+
+const { env } = process;
+const SCRIPT = fileURLToPath(new URL('./bench.py', import.meta.url));
+const BASELINE = fileURLToPath(new URL('./bench.baseline.json', import.meta.url));
+const SIDES = (env.BENCH_SIDES || 'ts,py').split(',');
+const TIME = parseFloat(env.BENCH_TIME ?? '0.5');
+const THRESHOLD = parseFloat(env.BENCH_THRESHOLD ?? '0.25');
+const OPS = (env.BENCH_OPS || 'parse,length,point,crop,bbox,reversed,transform').split(',');
+const POINTS = [...Array(10).keys()].map(i => i / 10).concat([1]);
+const STEPS = [...Array(16).keys()].map(i => (i + 1) / 16);
+const TRANSFORM = 'translate(10,20) rotate(30) scale(1.5,0.5)';
+// corpus parameters the baseline is only valid for
+const CORPUS_NAMES = ['BENCH_SETS', 'N', 'SEGS', 'SEED', 'MIX', 'DEGEN'];
+
+v8.setFlagsFromString('--expose-gc');
+const gc = vm.runInNewContext('gc');
+
+function python(args) {
+    const r = spawnSync('python3', [SCRIPT, ...args], {
+        encoding: 'utf8',
+        maxBuffer: 1 << 28,
+        stdio: ['ignore', 'pipe', 'inherit'],
+    });
+    if (r.status !== 0) {
+        throw new Error(`bench.py ${args.join(' ')} exited with ${r.status}`);
+    }
+    return r.stdout;
+}
+
+const parse = d => PathLC.parse(d);
+
+// op: [prepare, call]; prepare is untimed
+const BENCH = {
+    parse: [d => d, parse],
+    length: [parse, p => p.length],
+    point: [parse, p => POINTS.map(t => p.point_at(t))],
+    crop: [parse, p => p.crop_at(0.25, 0.75)],
+    bbox: [parse, p => p.bbox()],
+    reversed: [parse, p => p.reversed()],
+    transform: [d => [parse(d), Matrix.parse(TRANSFORM)], ([p, m]) => p.transform(m)],
+    flatten: [parse, p => p.flatten(0.1)],
+    sample: [parse, sample],
+};
+
+function sample(p) {
+    const out = [];
+    for (let cur = p._tail; cur; cur = cur._prev) {
+        if (cur._prev) {
+            for (const t of STEPS) {
+                out.push(cur.point_at(t));
+            }
+        }
+    }
+    return out;
+}
+
+function percentile(sorted, q) {
+    return sorted[Math.min(sorted.length - 1, Math.floor(q * sorted.length))] * 1000;
+}
+
+function alloc(prepare, call, items) {
+    const sizes = [];
+    for (const { d } of items) {
+        try {
+            const x = prepare(d);
+            gc();
+            const before = v8.getHeapStatistics().used_heap_size;
+            const r = call(x);
+            const after = v8.getHeapStatistics().used_heap_size;
+            // a scavenge during the call only makes this smaller
+            after >= before && sizes.push(after - before);
+            void r;
+        } catch (err) {}
+    }
+    sizes.sort((a, b) => a - b);
+    return sizes.length ? sizes[sizes.length >> 1] : null;
+}
+
+function run(call, prepare, items, budget) {
+    const times = [];
+    const n = items.length;
+    let errors = 0;
+    let spent = 0;
+    for (let i = 0; i < n || spent < budget; ) {
+        const { d } = items[i++ % n];
+        let x, dt;
+        try {
+            x = prepare(d);
+            const t = performance.now();
+            call(x);
+            dt = performance.now() - t;
+        } catch (err) {
+            if (++errors >= i && i >= n) break;
+            continue;
+        }
+        times.push(dt);
+        spent += dt;
+    }
+    return [times, errors];
+}
+
+function bench(op, items) {
+    const [prepare, call] = BENCH[op];
+    // warm up the JIT on a slice of the corpus
+    run(call, prepare, items.slice(0, 16), (TIME * 1000) / 5);
+    const [times, errors] = run(call, prepare, items, TIME * 1000);
+    times.sort((a, b) => a - b);
+    const total = times.reduce((a, b) => a + b, 0);
+    return {
+        calls: times.length,
+        ops_per_sec: total ? (times.length * 1000) / total : null,
+        p50_us: times.length ? percentile(times, 0.5) : null,
+        p99_us: times.length ? percentile(times, 0.99) : null,
+        alloc: alloc(prepare, call, items),
+        errors,
+    };
+}
+
+function fmt(v, digits = 1) {
+    if (v == null) return '-';
+    return v >= 1e7 ? v.toExponential(2) : v.toFixed(v >= 100 ? 0 : digits);
+}
+
+function table(results) {
+    const sides = Object.keys(results);
+    const cols = ['op'];
+    for (const side of sides) {
+        cols.push(`${side} ops/s`, `${side} p50us`, `${side} p99us`, `${side} alloc`);
+    }
+    if (results.ts && results.py) {
+        cols.push('ts/py');
+    }
+    const rows = [cols];
+    for (const op of OPS) {
+        const row = [op];
+        for (const side of sides) {
+            const r = results[side][op] ?? {};
+            row.push(fmt(r.ops_per_sec), fmt(r.p50_us), fmt(r.p99_us), fmt(r.alloc, 0));
+        }
+        if (results.ts && results.py) {
+            const [a, b] = [results.ts[op]?.ops_per_sec, results.py[op]?.ops_per_sec];
+            row.push(a && b ? `${(a / b).toPrecision(3)}x` : '-');
+        }
+        rows.push(row);
+    }
+    const width = cols.map((_, j) => Math.max(...rows.map(r => r[j].length)));
+    return rows.map(r => r.map((v, j) => (j ? v.padStart(width[j]) : v.padEnd(width[j]))).join('  ')).join('\n');
+}
+
+function regressions(results, base) {
+    const out = [];
+    for (const [side, ops] of Object.entries(results)) {
+        for (const [op, r] of Object.entries(ops)) {
+            const b = base[side]?.[op]?.ops_per_sec;
+            if (b && r.ops_per_sec != null && r.ops_per_sec < b * (1 - THRESHOLD)) {
+                out.push(`${side} ${op}: ${fmt(r.ops_per_sec)} ops/s < ${fmt(b)} baseline`);
+            }
+        }
+    }
+    return out;
+}
+
+const items = python(['corpus'])
+    .split('\n')
+    .filter(line => line)
+    .map(line => JSON.parse(line));
+const corpus = Object.fromEntries(CORPUS_NAMES.map(k => [k, env[k] ?? null]));
+const results = {};
+for (const side of SIDES) {
+    if (side == 'ts') {
+        const ops = (results.ts = {});
+        for (const op of OPS) {
+            ops[op] = bench(op, items);
+            console.error(`ts ${op}: ${ops[op].calls} calls`);
+        }
+    } else if (side == 'py') {
+        results.py = JSON.parse(python([])).ops;
+    } else {
+        throw new Error(`Unexpected BENCH_SIDES item ${side}`);
+    }
+}
+console.log(`${items.length} paths`);
+console.log(table(results));
+
+if (env.BENCH_SAVE) {
+    writeFileSync(BASELINE, JSON.stringify({ corpus, ...results }, null, 1) + '\n');
+    console.log(`Saved ${BASELINE}`);
+} else if (existsSync(BASELINE)) {
+    const base = JSON.parse(readFileSync(BASELINE, 'utf8'));
+    if (JSON.stringify(base.corpus) != JSON.stringify(corpus)) {
+        console.log('Baseline is for another corpus, not compared');
+    } else {
+        const bad = regressions(results, base);
+        for (const line of bad) console.log(`Regression ${line}`);
+        process.exitCode = bad.length ? 1 : 0;
+    }
+}
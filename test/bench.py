@@ -0,0 +1,143 @@
+"""Python side of the svggeom benchmark (driven by test/bench.mjs).
+
+    python3 test/bench.py corpus    the corpus as JSON lines {"i", "set", "d"}
+    python3 test/bench.py           time every op, print one JSON result
+
+The corpus is the ``data1``/``data2``/``data3`` paths of path.py plus a
+DATA=synthetic style set, chosen by
+
+    BENCH_SETS=data1,data2,data3,synthetic
+    N=4 SEGS=50 SEED=0 MIX=line:cubic:quad:arc DEGEN=0
+
+Each op runs over the whole corpus at least once and then keeps cycling
+until BENCH_TIME seconds (default 0.5) are spent; every call gets a fresh
+parse, untimed, so nothing cached by an earlier call is reused.  ``alloc``
+is the median tracemalloc peak, in bytes, above the heap in use before
+the call.
+"""
+
+from os import environ
+from time import perf_counter_ns
+from json import dumps
+import sys
+import tracemalloc
+
+import path as oracle
+from svgpathtools import parse_path
+from svgelements import Path as SEPath, Matrix
+
+SETS = (environ.get("BENCH_SETS") or "data1,data2,data3,synthetic").split(",")
+TIME = float(environ.get("BENCH_TIME", 0.5))
+OPS = (environ.get("BENCH_OPS") or "parse,length,point,crop,bbox,reversed,transform").split(",")
+POINTS = [i / 10 for i in range(10)] + [1]
+TRANSFORM = "translate(10,20) rotate(30) scale(1.5,0.5)"
+
+
+def corpus(env=environ):
+    items = []
+    for name in SETS:
+        if name == "synthetic":
+            syn = oracle.Synthetic(
+                seed=int(env.get("SEED", 0) or 0),
+                segs=int(env.get("SEGS", 50)),
+                mix=env.get("MIX") or "line:cubic:quad:arc",
+                degen=float(env.get("DEGEN", 0) or 0),
+            )
+            items.extend((name, syn.path()) for _ in range(int(env.get("N", 4))))
+        elif name in ("data1", "data2", "data3"):
+            items.extend((name, d) for d in oracle.unique(getattr(oracle, name)))
+        elif name:
+            raise ValueError(f"Unexpected BENCH_SETS item {name!r}")
+    return items
+
+
+def _points(p):
+    return [p.point(t) for t in POINTS]
+
+
+# op: (prepare, call); prepare is untimed
+BENCH = dict(
+    parse=(lambda d: d, parse_path),
+    length=(parse_path, lambda p: p.length()),
+    point=(parse_path, _points),
+    crop=(parse_path, lambda p: p.cropped(0.25, 0.75)),
+    bbox=(parse_path, lambda p: p.bbox()),
+    reversed=(parse_path, lambda p: p.reversed()),
+    transform=(lambda d: (SEPath(d), Matrix(TRANSFORM)), lambda v: abs(v[0] * v[1])),
+)
+
+
+def percentile(sorted_ns, q):
+    return sorted_ns[min(len(sorted_ns) - 1, int(q * len(sorted_ns)))] / 1000
+
+
+def alloc(prepare, call, items):
+    sizes = []
+    tracemalloc.start()
+    try:
+        for _, d in items:
+            try:
+                x = prepare(d)
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                r = call(x)
+                sizes.append(tracemalloc.get_traced_memory()[1] - before)
+                del r
+            except Exception:
+                pass
+    finally:
+        tracemalloc.stop()
+    sizes.sort()
+    return sizes[len(sizes) // 2] if sizes else None
+
+
+def bench(op, items):
+    prepare, call = BENCH[op]
+    times = []
+    errors = 0
+    spent = 0
+    n = len(items)
+    i = 0
+    while i < n or spent < TIME * 1e9:
+        d = items[i % n][1]
+        i += 1
+        try:
+            x = prepare(d)
+            t = perf_counter_ns()
+            call(x)
+            dt = perf_counter_ns() - t
+        except Exception:
+            errors += 1
+            if i >= n and errors >= i:
+                break
+            continue
+        times.append(dt)
+        spent += dt
+    times.sort()
+    total = sum(times)
+    return dict(
+        calls=len(times),
+        ops_per_sec=len(times) * 1e9 / total if total else None,
+        p50_us=percentile(times, 0.5) if times else None,
+        p99_us=percentile(times, 0.99) if times else None,
+        alloc=alloc(prepare, call, items),
+        errors=errors,
+    )
+
+
+if __name__ == "__main__":
+    items = corpus()
+    if sys.argv[1:] == ["corpus"]:
+        for i, (name, d) in enumerate(items):
+            print(dumps(dict(i=i, set=name, d=d)))
+    elif not sys.argv[1:]:
+        ops = {}
+        for op in OPS:
+            if op not in BENCH:
+                continue
+            ops[op] = bench(op, items)
+            sys.stderr.write(f"py {op}: {ops[op]['calls']} calls\n")
+        print(dumps(dict(side="py", paths=len(items), ops=ops)))
+    else:
+        sys.stderr.write("usage: bench.py [corpus]\n")
+        sys.exit(2)
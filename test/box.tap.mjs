@@ -20,7 +20,9 @@ export async function* enum_box_data(env) {
 
         for (const item of lines.map(value => JSON.parse(value))) {
             // console.log(item.points);
-            yield [i++, item];
+            // grid index, so SHARD=i/n and SAMPLE runs keep the same constructor per box
+            yield [item.i ?? i, item];
+            ++i;
         }
     }
 }
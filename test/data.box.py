@@ -1,50 +1,170 @@
-from sys import path
+from sys import path, stderr
 from os.path import exists
 from os import environ
 from json import dumps
+from oracle_cache import cached
 
+cached(__file__, ["BOX_RANGE", "BOX_ENGINE", "SHARD", "SAMPLE", "SEED", "VERIFY"])
 
 d = "/usr/share/inkscape/extensions"
 exists(d) and path.append(d)
 
 from inkex import BoundingBox
 
-
+# BOX_ENGINE=numpy|inkex  columns for the whole grid at once, or one BoundingBox per row
+# SHARD=i/n               only the i-th of n contiguous slices of the grid
+# SAMPLE=k SEED=s         k random rows (of the shard)
+# VERIFY=k                check k random numpy rows against inkex (default 64)
 BOX_RANGE = map(int, environ.get("BOX_RANGE", "-2,3,1").split(","))
+BOX_ENGINE = environ.get("BOX_ENGINE", "numpy")
+SHARD = environ.get("SHARD")
+SAMPLE = int(environ.get("SAMPLE", 0) or 0)
+SEED = int(environ.get("SEED", 0) or 0)
+VERIFY = int(environ.get("VERIFY", 64) or 0)
+BLOCK = 1 << 16
+
+KEYS = [
+    "x",
+    "y",
+    "minX",
+    "minY",
+    "maxX",
+    "maxY",
+    "width",
+    "height",
+    "top",
+    "left",
+    "bottom",
+    "right",
+    "centerX",
+    "centerY",
+]
+
+ROW = "{" + ", ".join(f'"{key}": %r' for key in [*KEYS, "i"]) + "}"
+
+
+def inkex_record(a, b, c, d):
+    B = BoundingBox((a, b), (c, d))
+    D = {}
+    D["x"] = B.x.minimum
+    D["y"] = B.y.minimum
+    D["minX"] = B.x.minimum
+    D["minY"] = B.y.minimum
+    D["maxX"] = B.x.maximum
+    D["maxY"] = B.y.maximum
+
+    for n in [
+        "width",
+        "height",
+        "top",
+        "left",
+        "bottom",
+        "right",
+        ("center_x", "centerX"),
+        ("center_y", "centerY"),
+    ]:
+        if isinstance(n, tuple):
+            D[n[-1]] = getattr(B, n[0])
+        else:
+            D[n] = getattr(B, n)
+    return D
+
+
+def shard(total):
+    # contiguous slice [start, stop) of the grid for SHARD=i/n
+    if not SHARD:
+        return 0, total
+    i, n = map(int, SHARD.split("/"))
+    if not 0 <= i < n:
+        raise ValueError(f"Unexpected SHARD={SHARD!r}")
+    return total * i // n, total * (i + 1) // n
+
+
+def selection(total):
+    start, stop = shard(total)
+    if SAMPLE and SAMPLE < stop - start:
+        import numpy as np
+
+        rng = np.random.default_rng(SEED)
+        return np.sort(rng.choice(np.arange(start, stop), SAMPLE, replace=False))
+    return range(start, stop)
+
+
+def extrema(r, index):
+    # grid rows (a, b, c, d) in the order of the nested loops
+    n = len(r)
+    for i in index:
+        i, d = divmod(i, n)
+        i, c = divmod(i, n)
+        a, b = divmod(i, n)
+        yield r[a], r[b], r[c], r[d]
+
+
+def columns(r, index):
+    import numpy as np
+
+    R = np.array(r)
+    n = len(r)
+    i = np.asarray(index, dtype=np.int64)
+    i, d = np.divmod(i, n)
+    i, c = np.divmod(i, n)
+    a, b = np.divmod(i, n)
+    a, b, c, d = R[a], R[b], R[c], R[d]
+    minX, maxX = np.minimum(a, b), np.maximum(a, b)
+    minY, maxY = np.minimum(c, d), np.maximum(c, d)
+    width, height = maxX - minX, maxY - minY
+    return dict(
+        x=minX,
+        y=minY,
+        minX=minX,
+        minY=minY,
+        maxX=maxX,
+        maxY=maxY,
+        width=width,
+        height=height,
+        top=minY,
+        left=minX,
+        bottom=maxY,
+        right=maxX,
+        centerX=minX + width / 2,
+        centerY=minY + height / 2,
+    )
+
+
+def verify(r, index, k):
+    from random import Random
+
+    rnd = Random(SEED)
+    picks = [int(index[j]) for j in rnd.sample(range(len(index)), min(k, len(index)))]
+    cols = columns(r, picks)
+    for j, abcd in enumerate(extrema(r, picks)):
+        want = inkex_record(*abcd)
+        got = {key: cols[key][j].item() for key in KEYS}
+        if got != want:
+            raise AssertionError(f"#{picks[j]} {abcd}: {got} != {want}")
+    return len(picks)
+
+
 if BOX_RANGE:
     r = [a * 10 for a in range(*BOX_RANGE)]
+    index = selection(len(r) ** 4)
+
+    if BOX_ENGINE == "inkex":
+        for i, abcd in zip(index, extrema(r, index)):
+            D = inkex_record(*abcd)
+            D["i"] = int(i)
+            print(dumps(D))
+    elif BOX_ENGINE == "numpy":
+        from sys import stdout  # after cached() has hooked it
+        import numpy as np
 
-    def extrema():
-        for a in r:
-            for b in r:
-                for c in r:
-                    for d in r:
-                        yield a, b, c, d
-
-    # print([a, b])
-    for a, b, c, d in extrema():
-        B = BoundingBox((a, b), (c, d))
-        D = {}
-        D["x"] = B.x.minimum
-        D["y"] = B.y.minimum
-        D["minX"] = B.x.minimum
-        D["minY"] = B.y.minimum
-        D["maxX"] = B.x.maximum
-        D["maxY"] = B.y.maximum
-
-        for n in [
-            "width",
-            "height",
-            "top",
-            "left",
-            "bottom",
-            "right",
-            ("center_x", "centerX"),
-            ("center_y", "centerY"),
-        ]:
-            if isinstance(n, tuple):
-                D[n[-1]] = getattr(B, n[0])
-            else:
-                D[n] = getattr(B, n)
-
-        print(dumps(D))
+        VERIFY and stderr.write(f"{verify(r, index, VERIFY)} Verified\n")
+        for j in range(0, len(index), BLOCK):
+            part = index[j : j + BLOCK]
+            cols = columns(r, part)
+            cols["i"] = np.asarray(part)
+            # finite ints and floats only, so repr() is what dumps() would write
+            stdout.write("\n".join(map(ROW.__mod__, zip(*(cols[key].tolist() for key in [*KEYS, "i"])))))
+            stdout.write("\n")
+    else:
+        raise ValueError(f"Unexpected BOX_ENGINE={BOX_ENGINE!r}")
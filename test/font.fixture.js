@@ -0,0 +1,174 @@
+// A font of a few glyphs with the methods and fields of an opentype.js Font that
+// PathLC.text and GlyphCache use, placing and drawing glyphs the way opentype.js does
+
+class Path {
+    commands = [];
+    moveTo(x, y) {
+        this.commands.push({ type: 'M', x, y });
+    }
+    lineTo(x, y) {
+        this.commands.push({ type: 'L', x, y });
+    }
+    quadraticCurveTo(x1, y1, x, y) {
+        this.commands.push({ type: 'Q', x1, y1, x, y });
+    }
+    curveTo(x1, y1, x2, y2, x, y) {
+        this.commands.push({ type: 'C', x1, y1, x2, y2, x, y });
+    }
+    close() {
+        this.commands.push({ type: 'Z' });
+    }
+    extend(path) {
+        this.commands.push(...path.commands);
+    }
+    draw(ctx) {
+        for (const cmd of this.commands) {
+            switch (cmd.type) {
+                case 'M':
+                    ctx.moveTo(cmd.x, cmd.y);
+                    break;
+                case 'L':
+                    ctx.lineTo(cmd.x, cmd.y);
+                    break;
+                case 'Q':
+                    ctx.quadraticCurveTo(cmd.x1, cmd.y1, cmd.x, cmd.y);
+                    break;
+                case 'C':
+                    ctx.bezierCurveTo(cmd.x1, cmd.y1, cmd.x2, cmd.y2, cmd.x, cmd.y);
+                    break;
+                case 'Z':
+                    ctx.closePath();
+                    break;
+            }
+        }
+    }
+}
+
+class Glyph {
+    constructor(index, advanceWidth, draw) {
+        this.index = index;
+        this.advanceWidth = advanceWidth;
+        this.path = new Path();
+        this.path.unitsPerEm = 1000;
+        draw(this.path);
+    }
+    // as opentype.js Glyph.getPath
+    getPath(x, y, fontSize) {
+        const scale = (1 / this.path.unitsPerEm) * fontSize;
+        const p = new Path();
+        for (const cmd of this.path.commands) {
+            const X = v => x + v * scale;
+            const Y = v => y + -v * scale;
+            switch (cmd.type) {
+                case 'M':
+                    p.moveTo(X(cmd.x), Y(cmd.y));
+                    break;
+                case 'L':
+                    p.lineTo(X(cmd.x), Y(cmd.y));
+                    break;
+                case 'Q':
+                    p.quadraticCurveTo(X(cmd.x1), Y(cmd.y1), X(cmd.x), Y(cmd.y));
+                    break;
+                case 'C':
+                    p.curveTo(X(cmd.x1), Y(cmd.y1), X(cmd.x2), Y(cmd.y2), X(cmd.x), Y(cmd.y));
+                    break;
+                case 'Z':
+                    p.close();
+                    break;
+            }
+        }
+        return p;
+    }
+}
+
+const GLYPHS = {
+    // .notdef, a box
+    '': p => {
+        p.moveTo(50, 0);
+        p.lineTo(450, 0);
+        p.lineTo(450, 700);
+        p.lineTo(50, 700);
+        p.close();
+    },
+    A: p => {
+        p.moveTo(0, 0);
+        p.lineTo(300, 700);
+        p.lineTo(600, 0);
+        p.close();
+        p.moveTo(150, 250);
+        p.lineTo(450, 250);
+    },
+    V: p => {
+        p.moveTo(0, 700);
+        p.lineTo(300, 0);
+        p.lineTo(600, 700);
+    },
+    o: p => {
+        p.moveTo(250, 0);
+        p.quadraticCurveTo(450, 0, 450, 250);
+        p.quadraticCurveTo(450, 500, 250, 500);
+        p.quadraticCurveTo(50, 500, 50, 250);
+        p.quadraticCurveTo(50, 0, 250, 0);
+        p.close();
+    },
+    S: p => {
+        p.moveTo(500, 600);
+        p.curveTo(400, 750, 50, 700, 80, 500);
+        p.curveTo(100, 350, 500, 400, 500, 200);
+        p.curveTo(500, 0, 100, -50, 30, 100);
+    },
+    ' ': () => {},
+};
+
+const ADVANCE = { '': 500, A: 600, V: 600, o: 500, S: 550, ' ': 250 };
+// kerning pairs, in font units
+const KERN = { AV: -80, VA: -80, Vo: -40 };
+
+export class FixtureFont {
+    unitsPerEm = 1000;
+    glyphs = new Map();
+    constructor() {
+        Object.keys(GLYPHS).forEach((c, i) => this.glyphs.set(c, new Glyph(i, ADVANCE[c], GLYPHS[c])));
+    }
+    charToGlyph(c) {
+        return this.glyphs.get(c) ?? this.glyphs.get('');
+    }
+    getKerningValue(a, b) {
+        const [l] = [...this.glyphs].find(([, g]) => g === a) ?? [];
+        const [r] = [...this.glyphs].find(([, g]) => g === b) ?? [];
+        return KERN[`${l}${r}`] ?? 0;
+    }
+    // as opentype.js Font.forEachGlyph
+    forEachGlyph(text, x, y, fontSize, options, callback) {
+        x = x ?? 0;
+        y = y ?? 0;
+        fontSize = fontSize ?? 72;
+        const { kerning = true, letterSpacing, tracking } = options ?? {};
+        const fontScale = (1 / this.unitsPerEm) * fontSize;
+        const glyphs = [...text].map(c => this.charToGlyph(c));
+        for (let i = 0; i < glyphs.length; i += 1) {
+            const glyph = glyphs[i];
+            callback.call(this, glyph, x, y, fontSize, options);
+            x += glyph.advanceWidth * fontScale;
+            if (kerning && i < glyphs.length - 1) {
+                x += this.getKerningValue(glyph, glyphs[i + 1]) * fontScale;
+            }
+            if (letterSpacing) {
+                x += letterSpacing * fontSize;
+            } else if (tracking) {
+                x += (tracking / 1000) * fontSize;
+            }
+        }
+        return x;
+    }
+    getPath(text, x, y, fontSize, options) {
+        const path = new Path();
+        this.forEachGlyph(text, x, y, fontSize, options, (glyph, gX, gY, gFontSize) => {
+            path.extend(glyph.getPath(gX, gY, gFontSize));
+        });
+        return path;
+    }
+    getAdvanceWidth(text, fontSize, options) {
+        return this.forEachGlyph(text, 0, 0, fontSize, options, () => {});
+    }
+}
@@ -0,0 +1,105 @@
+'uses strict';
+import test from 'tap';
+import { Matrix, SVGTransformList } from 'svggeom';
+import './utils.js';
+const CI = !!process.env.CI;
+
+const TRANSFORMS = [
+    'translate(10,20) rotate(30) scale(1.5,0.5)',
+    ' skewY(60) matrix(1, 0, 0, 1, 3, 4) skewX(30)',
+    'rotate(90 10 12),translateX(-3)translateY(4e-1)',
+    'scale(2)translate(-.5-1.5)',
+    'matrix(1 2 3 4 5 6)',
+    '',
+];
+
+// as parse did, a Matrix per function
+function folded(d) {
+    const m = Matrix.identity();
+    for (const str of d.split(/\)\s*,?\s*/).slice(0, -1)) {
+        const [name, args] = str.trim().split('(');
+        const v = args.match(/[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?/g).map(parseFloat);
+        m._cat_self(name.trim() == 'matrix' ? Matrix.fromArray(v) : Matrix[name.trim()](...v));
+    }
+    return m.dump_hexad();
+}
+
+test.test(`compile`, { bail: !CI }, function (t) {
+    for (const d of TRANSFORMS) {
+        t.strictSame(Matrix.parse(d).dump_hexad(), folded(d), d);
+        const c = Matrix.compile(d);
+        t.equal(Matrix.compile(d), c, 'cached');
+        t.ok(Object.isFrozen(c.hexad) && Object.isFrozen(c.ops), 'frozen');
+        t.strictSame([...c.hexad], folded(d));
+        t.ok(SVGTransformList._parse(d).combine().equals(Matrix.parse(d), 1e-12), `list ${d}`);
+        const node = { nodeType: 1, getAttribute: () => d };
+        t.strictSame(Matrix.fromElement(node).dump_hexad(), folded(d));
+    }
+    t.strictSame(Matrix.compile('scale(2)translate(-.5-1.5)').ops, [
+        ['scale', [2]],
+        ['translate', [-0.5, -1.5]],
+    ]);
+    const m = Matrix.parse('scale(2)');
+    m.a = 7;
+    t.equal(Matrix.parse('scale(2)').a, 2, 'not shared');
+    t.throws(() => Matrix.parse('translateX(-12) translateQ(-10)'), { message: /Unexpected transform/ });
+    t.throws(() => Matrix.parse('translate(1 x)'), TypeError);
+    t.throws(() => Matrix.parse('rotate()'), TypeError);
+    t.end();
+});
+
+test.test(`parse_into`, { bail: !CI }, function (t) {
+    const out = new Float64Array(6 * TRANSFORMS.length);
+    TRANSFORMS.forEach((d, i) => Matrix.parse_into(d, out, i * 6));
+    t.strictSame([...out], TRANSFORMS.flatMap(folded));
+    t.end();
+});
+
+test.test(`cache limit`, { bail: !CI }, function (t) {
+    const { cache_limit } = Matrix;
+    Matrix.cache_limit = 4;
+    const first = Matrix.compile('rotate(1)');
+    for (let i = 2; i < 5; ++i) Matrix.compile(`rotate(${i})`);
+    t.equal(Matrix.compile('rotate(1)'), first, 'kept');
+    for (let i = 5; i < 10; ++i) Matrix.compile(`rotate(${i})`);
+    t.not(Matrix.compile('rotate(1)'), first, 'dropped');
+    t.strictSame(Matrix.compile('rotate(1)').hexad, first.hexad);
+    Matrix.cache_limit = cache_limit;
+    t.end();
+});
+
+test.test(`sample`, { bail: !CI }, function (t) {
+    const keys = ['rotate(10)', 'translate(10,20) rotate(170) scale(2)', [1, 2, 3, 4, 5, 6]];
+    const times = [-1, 0, 0.1, 0.25, 0.5, 0.6, 0.3, 1, 2];
+    const out = Matrix.sample(keys, times);
+    const [f, g] = [Matrix.interpolate(keys[0], keys[1]), Matrix.interpolate(keys[1], keys[2])];
+    times.forEach((T, i) => {
+        const t1 = Math.min(Math.max(T, 0), 1);
+        const want = t1 <= 0.5 ? f(t1 * 2) : g(t1 * 2 - 1);
+        t.ok(want.equals(Matrix.fromArray([...out.subarray(i * 6, i * 6 + 6)]), 1e-12), `at ${T}`);
+    });
+    const at = Matrix.sample(keys, [0.5], { offsets: [0, 0.25, 1] });
+    t.ok(g(1 / 3).equals(Matrix.fromArray([...at]), 1e-12), 'offsets');
+    t.throws(() => Matrix.sample(keys, [0], { offsets: [0, 1] }));
+    t.end();
+});
+
+test.test(`decompose`, { bail: !CI }, function (t) {
+    for (const d of TRANSFORMS.slice(0, 4)) {
+        const M = Matrix.parse(d);
+        t.ok(Matrix.interpolate(M, M, { decompose: true })(0.3).equals(M, 1e-9), `recomposed ${d}`);
+    }
+    const [A, B] = ['rotate(10) scale(2)', 'translate(5,6) rotate(170) scale(2)'];
+    const n = 9;
+    const out = Matrix.sample([A, B], Array.from({ length: n }, (_, i) => i / (n - 1)), { decompose: true });
+    for (let i = 0; i < n; ++i) {
+        const M = Matrix.fromArray([...out.subarray(i * 6, i * 6 + 6)]);
+        const { rotate, skewX, scaleX, scaleY } = M.decompose();
+        t.ok(Math.abs(rotate - (10 + (160 * i) / (n - 1))) < 1e-9, `rotate ${i}`);
+        t.ok(Math.abs(skewX) < 1e-9 && Math.abs(scaleX - 2) < 1e-9 && Math.abs(scaleY - 2) < 1e-9, `no shear ${i}`);
+    }
+    // the short way round
+    const h = Matrix.interpolate('rotate(170)', 'rotate(-170)', { decompose: true })(0.5);
+    t.ok(h.equals(Matrix.rotate(180), 1e-12));
+    t.end();
+});
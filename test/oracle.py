@@ -0,0 +1,218 @@
+"""Long-lived reference oracle, so the tap files share one interpreter.
+
+Requests and responses are JSON lines, one request at a time per
+connection:
+
+    {"env": {"DATA": "Arc", "POINTS": "10"}}
+        the records test/path.py would print with that environment, one
+        per line, then {"$done": count}
+    {"query": "length", "d": "M0,0L10,0", "t": [0, 0.5]}
+        {"$result": ...}; queries are listed in QUERIES
+    {"shutdown": true}
+
+A failed request answers {"$error": message} and the connection stays
+usable.  Mode requests go through the oracle_cache entries shared with
+``python3 test/path.py``.
+
+    python3 test/oracle.py                  serve stdin/stdout
+    python3 test/oracle.py --socket PATH    serve a Unix socket until shutdown
+    python3 test/oracle.py length 'M0,0L10,0' 0 0.5
+                                            one query, printed
+"""
+
+from os import environ, path, makedirs, replace, remove, getpid
+from json import dumps, loads
+from threading import Lock
+from io import TextIOWrapper
+import sys
+
+sys.path.insert(0, path.dirname(path.abspath(__file__)))
+
+import oracle_cache
+import path as oracle
+
+SCRIPT = oracle.__file__
+# path.py keeps per-mode state in module globals
+_generating = Lock()
+
+
+def _path(d):
+    return oracle.parse_path(d)
+
+
+def _ts(q):
+    t = q.get("t", 0.5)
+    return t if isinstance(t, list) else [t]
+
+
+def q_length(q):
+    # optional [t0, t1]
+    t0, t1 = q.get("t", [0, 1])
+    return _path(q["d"]).length(t0, t1)
+
+
+def q_point(q):
+    p = _path(q["d"])
+    return [oracle.brpt(p.point(t)) for t in _ts(q)]
+
+
+def q_tangent(q):
+    p = _path(q["d"])
+    return [oracle.brpt(p.unit_tangent(t)) for t in _ts(q)]
+
+
+def q_bbox(q):
+    return _path(q["d"]).bbox()
+
+
+def q_crop(q):
+    # [t0, t1] -> tokens of the cropped path
+    t0, t1 = q.get("t", [0, 1])
+    c = _path(q["d"]).cropped(t0, t1)
+    return list(oracle._tokenize_path(c.d(use_closed_attrib=False, rel=False)))
+
+
+def q_split(q):
+    return [oracle.crops(_path(q["d"]), t) for t in _ts(q)]
+
+
+def q_transform(q):
+    from svgelements import Path, Matrix
+
+    dT = (Path(q["d"]) * Matrix(q["transform"])).d(relative=False, smooth=None)
+    return list(oracle._tokenize_path(dT))
+
+
+def q_parse(q):
+    return oracle.sepaths_record(q["d"])
+
+
+QUERIES = dict(
+    length=q_length,
+    point=q_point,
+    tangent=q_tangent,
+    bbox=q_bbox,
+    crop=q_crop,
+    split=q_split,
+    transform=q_transform,
+    parse=q_parse,
+)
+
+
+def _replay(file, env, out):
+    if env.get("ORACLE_CACHE") == "refresh" or not path.exists(file):
+        return None
+    n = 0
+    with open(file) as f:
+        for line in f:
+            out.write(line)
+            n += 1
+    return n
+
+
+def records(env, out):
+    """Write the records of a mode request to ``out``, via the cache."""
+    if not oracle_cache.enabled(env):
+        with _generating:
+            n = 0
+            for v in oracle.generate(env):
+                out.write(dumps(v) + "\n")
+                n += 1
+            return n
+    key = oracle_cache.cache_key(SCRIPT, [*oracle.ENV_NAMES, "ORACLE_FORMAT"], files=oracle.HELPERS, env=env)
+    file = oracle_cache.cache_file(key)
+    n = _replay(file, env, out)
+    if n is not None:
+        return n
+    with _generating:
+        # another connection may have made it meanwhile
+        n = _replay(file, env, out)
+        if n is not None:
+            return n
+        makedirs(path.dirname(file), exist_ok=True)
+        tmp = f"{file}.{getpid()}.tmp"
+        n = 0
+        try:
+            with open(tmp, "w") as rec:
+                for v in oracle.generate(env):
+                    line = dumps(v) + "\n"
+                    out.write(line)
+                    rec.write(line)
+                    n += 1
+        except BaseException:
+            remove(tmp)
+            raise
+        replace(tmp, file)
+    oracle_cache.prune()
+    return n
+
+
+def handle(req, out):
+    """Answer one request; returns False on shutdown."""
+    if req.get("shutdown"):
+        return False
+    try:
+        if "query" in req:
+            fn = QUERIES.get(req["query"])
+            if fn is None:
+                raise ValueError(f"Unknown query {req['query']!r}")
+            out.write(dumps({"$result": fn(req)}) + "\n")
+        else:
+            n = records({**environ, **req.get("env", {})}, out)
+            out.write(dumps({"$done": n}) + "\n")
+    except Exception as ex:
+        sys.stderr.write(f"Oracle: {type(ex).__name__}: {ex}\n")
+        out.write(dumps({"$error": f"{type(ex).__name__}: {ex}"}) + "\n")
+    out.flush()
+    return True
+
+
+def serve(inp, out):
+    for line in inp:
+        if line.strip() and not handle(loads(line), out):
+            return False
+    return True
+
+
+def serve_socket(file):
+    from socketserver import ThreadingUnixStreamServer, StreamRequestHandler
+    from threading import Thread
+    from signal import signal, SIGTERM
+
+    class Handler(StreamRequestHandler):
+        wbufsize = 1 << 16
+
+        def handle(self):
+            inp = TextIOWrapper(self.rfile, encoding="utf-8")
+            out = TextIOWrapper(self.wfile, encoding="utf-8")
+            if not serve(inp, out):
+                Thread(target=server.shutdown).start()
+
+    signal(SIGTERM, lambda *_: sys.exit(0))
+    if path.exists(file):
+        remove(file)
+    with ThreadingUnixStreamServer(file, Handler) as server:
+        server.daemon_threads = True
+        sys.stderr.write(f"Oracle: Listening {file}\n")
+        try:
+            server.serve_forever()
+        finally:
+            remove(file)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args:
+        serve(sys.stdin, sys.stdout)
+    elif args[0] == "--socket":
+        serve_socket(args[1])
+    elif args[0] in QUERIES:
+        q = dict(query=args[0], d=args[1])
+        if args[0] == "transform":
+            q["transform"] = args[2]
+        elif args[2:]:
+            q["t"] = [float(v) for v in args[2:]]
+        print(dumps(QUERIES[args[0]](q)))
+    else:
+        sys.stderr.write(f"usage: oracle.py [--socket PATH | {'|'.join(QUERIES)} d [t...]]\n")
+        sys.exit(2)
@@ -0,0 +1,262 @@
+"""Batched affine oracle for the ``transforms`` mode of path.py.
+
+Each path is parsed once by svgelements and flattened into a point table
+(arcs contribute their center and the two conjugate radius points, which
+is how svgelements itself transforms them).  All transform strings are
+compiled into one (N, 3, 3) stack and applied with a single matmul; arc
+radii, rotation and sweep are then recovered for every matrix at once.
+
+The records match ``p * Matrix(s)`` followed by ``d(relative=False,
+smooth=None)``.  Arc radii and rotation are rounded like svgelements'
+``%G``; other numbers are not rounded to its ``%.12G`` text form.
+"""
+
+import re
+from math import tau
+import numpy as np
+from svgelements import (
+    Path,
+    Matrix,
+    Move,
+    Line,
+    Close,
+    CubicBezier,
+    QuadraticBezier,
+    Arc,
+)
+
+ERROR = 1e-12  # svgelements Point equality tolerance
+_FN_RE = re.compile(r"(\w+)\s*\(([^)]*)\)")
+
+
+def _op(name, args):
+    n = len(args)
+    if name == "translate":
+        return "translate", (args[0], args[1] if n > 1 else 0.0)
+    elif name == "scale":
+        return "scale", (args[0], args[1] if n > 1 else args[0])
+    elif name == "rotate":
+        return "rotate", (args[0], args[1] if n > 1 else 0.0, args[2] if n > 2 else 0.0)
+    elif name == "matrix":
+        return "matrix", tuple(args)
+    elif name == "skewX":
+        return "skewX", (args[0],)
+    elif name == "skewY":
+        return "skewY", (args[0],)
+    raise ValueError(f"Unexpected transform {name!r}")
+
+
+def _stack(name, P):
+    N = P.shape[0]
+    M = np.zeros((N, 3, 3))
+    M[:, 0, 0] = M[:, 1, 1] = M[:, 2, 2] = 1
+    if name == "translate":
+        M[:, 0, 2], M[:, 1, 2] = P[:, 0], P[:, 1]
+    elif name == "scale":
+        M[:, 0, 0], M[:, 1, 1] = P[:, 0], P[:, 1]
+    elif name == "rotate":
+        r = np.radians(P[:, 0])
+        c, s = np.cos(r), np.sin(r)
+        cx, cy = P[:, 1], P[:, 2]
+        M[:, 0, 0], M[:, 0, 1], M[:, 1, 0], M[:, 1, 1] = c, -s, s, c
+        M[:, 0, 2] = cx - c * cx + s * cy
+        M[:, 1, 2] = cy - s * cx - c * cy
+    elif name == "matrix":
+        M[:, 0, 0], M[:, 1, 0], M[:, 0, 1] = P[:, 0], P[:, 1], P[:, 2]
+        M[:, 1, 1], M[:, 0, 2], M[:, 1, 2] = P[:, 3], P[:, 4], P[:, 5]
+    elif name == "skewX":
+        M[:, 0, 1] = np.tan(np.radians(P[:, 0]))
+    elif name == "skewY":
+        M[:, 1, 0] = np.tan(np.radians(P[:, 0]))
+    return M
+
+
+def matrix_stack(ms):
+    """Compile transform strings into an (N, 3, 3) array.
+
+    Strings sharing the same function sequence (all of ``matrixes()`` do)
+    are composed with one batched product per function.
+    """
+    groups = {}
+    for j, s in enumerate(ms):
+        ops = [_op(n, [float(v) for v in re.split(r"[\s,]+", a.strip()) if v]) for n, a in _FN_RE.findall(s)]
+        key = tuple(n for n, _ in ops)
+        groups.setdefault(key, []).append((j, [a for _, a in ops]))
+    out = np.empty((len(ms), 3, 3))
+    for key, items in groups.items():
+        idx = np.array([j for j, _ in items], dtype=np.intp)
+        M = np.broadcast_to(np.eye(3), (len(idx), 3, 3))
+        for i, name in enumerate(key):
+            M = M @ _stack(name, np.array([a[i] for _, a in items], dtype=float))
+        out[idx] = M
+    return out
+
+
+class Compiled:
+    """A path flattened to a point table plus per-segment descriptors."""
+
+    def __init__(self, d):
+        p = Path(d)
+        pts = []
+        segs = []
+        prev = None
+
+        def add(*ps):
+            i = len(pts)
+            pts.extend((complex(v[0], v[1]) for v in ps))
+            return list(range(i, len(pts)))
+
+        for seg in p.segments():
+            if isinstance(seg, Move):
+                segs.append(("M", add(seg.end), None))
+            elif isinstance(seg, Close):
+                segs.append(("Z", [], None))
+            elif isinstance(seg, Line):
+                segs.append(("L", add(seg.end), None))
+            elif isinstance(seg, CubicBezier):
+                ix = add(seg.start, seg.control1, seg.control2, seg.end)
+                # smooth test needs the previous segment's end and last control
+                ref = _smooth_ref(prev, CubicBezier) if seg.smooth else False
+                segs.append(("C", ix, ref))
+            elif isinstance(seg, QuadraticBezier):
+                ix = add(seg.start, seg.control, seg.end)
+                ref = _smooth_ref(prev, QuadraticBezier) if seg.smooth else False
+                segs.append(("Q", ix, ref))
+            elif isinstance(seg, Arc):
+                if seg.center is None or seg.prx is None or seg.pry is None:
+                    raise ValueError(f"Degenerate arc in {d!r}")
+                ix = add(seg.center, seg.prx, seg.pry, seg.end)
+                segs.append(("A", ix, (int(abs(seg.sweep) > tau / 2), 1 if seg.sweep >= 0 else -1)))
+            else:
+                raise TypeError(f"Unsupported segment {seg!r}")
+            prev = (segs[-1], seg)
+        z = np.array(pts, dtype=complex)
+        self.d = d
+        self.H = np.stack([z.real, z.imag, np.ones(len(z))])  # (3, P)
+        self.segs = segs
+        self.abs = list(_tokenize(p.d(relative=False)))
+
+    def apply(self, M):
+        """Transform by an (N, 3, 3) stack; yields token lists in stack order."""
+        N = M.shape[0]
+        T = np.matmul(M[:, :2, :], self.H)  # (N, 2, P)
+        X, Y = T[:, 0, :], T[:, 1, :]
+        det = M[:, 0, 0] * M[:, 1, 1] - M[:, 0, 1] * M[:, 1, 0]
+        cols = []  # per segment: list of N token lists, or callables
+        for seg in self.segs:
+            kind, ix = seg[0], seg[1]
+            if kind == "M" or kind == "L":
+                (i,) = ix
+                cols.append(_fixed(kind, np.stack([X[:, i], Y[:, i]], 1)))
+            elif kind == "Z":
+                cols.append(None)
+            elif kind == "A":
+                c, rx_, ry_, e = ix
+                large, sweep = seg[2]
+                rx = np.hypot(X[:, rx_] - X[:, c], Y[:, rx_] - Y[:, c])
+                ry = np.hypot(X[:, ry_] - X[:, c], Y[:, ry_] - Y[:, c])
+                rot = np.degrees(np.arctan2(Y[:, rx_] - Y[:, c], X[:, rx_] - X[:, c]))
+                flag = ((sweep * np.sign(det)) >= 0).astype(float)
+                v = np.stack([rx, ry, rot, np.full(N, float(large)), flag, X[:, e], Y[:, e]], 1)
+                cols.append([[c[0], *_g(c[1:4]), *c[4:]] for c in _fixed("A", v)])
+            else:
+                v = np.stack([a for i in ix for a in (X[:, i], Y[:, i])], 1)
+                cols.append(_curve(kind, v, seg[2], X, Y))
+        for n in range(N):
+            tokens = []
+            for col in cols:
+                if col is None:
+                    tokens.append("Z")
+                else:
+                    tokens.extend(col[n])
+            yield tokens
+
+
+def _smooth_ref(prev, klass):
+    if prev is None:
+        return ("start",)
+    desc, seg = prev
+    if isinstance(seg, klass):
+        return ("reflect", desc[1])
+    return ("start",)
+
+
+def _g(vs):
+    # svgelements prints these with %G; the JS side compares rotations mod 360
+    return [float("%G" % v) for v in vs]
+
+
+def _fixed(cmd, v):
+    return [[cmd, *row] for row in v.tolist()]
+
+
+def _curve(kind, v, ref, X, Y):
+    # v columns: start, controls..., end as x,y pairs
+    full = [[kind, *row[2:]] for row in v.tolist()]
+    if not ref:
+        return full
+    if ref[0] == "start":
+        # control1 == start
+        ok = (abs(v[:, 2] - v[:, 0]) <= ERROR) & (abs(v[:, 3] - v[:, 1]) <= ERROR)
+    else:
+        pix = ref[1]
+        pe, pc = pix[-1], pix[-2]
+        pex, pey = X[:, pe], Y[:, pe]
+        ok = (
+            (abs(v[:, 0] - pex) <= ERROR)
+            & (abs(v[:, 1] - pey) <= ERROR)
+            & (abs((v[:, 2] - v[:, 0]) - (pex - X[:, pc])) <= ERROR)
+            & (abs((v[:, 3] - v[:, 1]) - (pey - Y[:, pc])) <= ERROR)
+        )
+    for n in np.nonzero(ok)[0].tolist():
+        full[n] = ["S", *full[n][3:]] if kind == "C" else ["T", *full[n][-2:]]
+    return full
+
+
+COMMANDS = set("MmZzLlHhVvCcSsQqTtAa")
+COMMAND_RE = re.compile("([MmZzLlHhVvCcSsQqTtAa])")
+FLOAT_RE = re.compile(r"[-+]?[0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?")
+
+
+def _tokenize(d):
+    for x in COMMAND_RE.split(d):
+        if x in COMMANDS:
+            yield x
+        for token in FLOAT_RE.findall(x):
+            yield float(token)
+
+
+def reference(d, s):
+    dT = (Path(d) * Matrix(s)).d(relative=False, smooth=None)
+    return list(_tokenize(dT))
+
+
+def compare(a, b, rel=1e-9, arc_rel=1e-5):
+    """Return None when token lists agree, else a description of the first mismatch.
+
+    svgelements prints arc radii and rotation with ``%G`` so those get a
+    looser tolerance; rotation is irrelevant for circles and taken mod 180.
+    """
+    if len(a) != len(b):
+        return f"length {len(a)} != {len(b)}"
+    cmd = None
+    j = 0
+    for i, (x, y) in enumerate(zip(a, b)):
+        if isinstance(x, str) or isinstance(y, str):
+            if x != y:
+                return f"#{i} command {x!r} != {y!r}"
+            cmd, j = x, 0
+            continue
+        j += 1
+        tol = rel
+        if cmd == "A" and j <= 3:
+            tol = arc_rel
+            if j == 3:
+                if abs(a[i - 2] - a[i - 1]) <= arc_rel * max(abs(a[i - 2]), 1):
+                    continue
+                dx = (x - y) % 180
+                if min(dx, 180 - dx) <= 1e-3:
+                    continue
+        if abs(x - y) > tol * max(abs(x), abs(y), 1):
+            return f"#{i} {cmd} {x!r} != {y!r}"
+    return None
@@ -0,0 +1,211 @@
+"""Framed binary form of the oracle JSON-lines stream.
+
+    stream := MAGIC frame*
+    frame  := u32 size, u32 head, head bytes (space padded), float64 * n
+
+``size`` counts everything after itself and every frame is a multiple of 8
+bytes, so the float64 block of each frame is 8-byte aligned and can be
+viewed in place by a Float64Array.  All integers and floats are little
+endian.  The head is the JSON record with its numeric payload moved into
+the float block (offsets and counts in float64 units):
+
+    [1.0, 2.0, ...]              ->  {"$f": [offset, count]}
+    ["M", 1.0, 2.0, "Z"]         ->  {"$d": [offset, count, "MZ"]}
+    [[a, b], [c, d], ...]        ->  {"$c": [column_0, column_1]}
+    column of "MZ" token lists   ->  {"$D": [offset, items, "MZ"]}
+    ["s0", "s1", ...]            ->  {"$s": [...]}, later {"$r": index}
+
+Token lists must give each command its full arity, so the letters alone
+put them back together.  ``$c`` transposes a list of equal length lists,
+which turns ``transforms`` into one string column and one ``$D`` block.
+String columns are numbered per stream in order of their ``$s``; a
+repeat is sent as ``$r``.
+
+    ORACLE_FORMAT=bin python3 test/path.py > out.bin
+    python3 test/oracle_binary.py tojson < out.bin > out.jsonl
+    python3 test/oracle_binary.py tobin < out.jsonl > out.bin
+"""
+
+from array import array
+from json import dumps, loads
+from struct import pack, unpack_from
+import sys
+
+MAGIC = b"SVGORB1\n"
+COMMANDS = frozenset("MmZzLlHhVvCcSsQqTtAa")
+ARITY = dict(M=2, Z=0, L=2, H=1, V=1, C=6, S=4, Q=4, T=2, A=7)
+_BIG = sys.byteorder == "big"
+
+
+def _is_num(v):
+    return (isinstance(v, float) or isinstance(v, int)) and not isinstance(v, bool)
+
+
+def _cmds(v):
+    # command letters of a well formed token list, else None
+    if not v or not isinstance(v[0], str):
+        return None
+    cmds = []
+    i, n = 0, len(v)
+    while i < n:
+        c = v[i]
+        if not isinstance(c, str) or c not in COMMANDS:
+            return None
+        j = i + 1 + ARITY[c.upper()]
+        if j > n or not all(_is_num(x) for x in v[i + 1 : j]):
+            return None
+        cmds.append(c)
+        i = j
+    return "".join(cmds)
+
+
+class Encoder:
+    """Stateful: string columns already sent are referenced by number."""
+
+    def __init__(self):
+        self.columns = {}
+
+    def _pack(self, v, block):
+        if isinstance(v, dict):
+            return {k: self._pack(x, block) for k, x in v.items()}
+        elif isinstance(v, (list, tuple)):
+            n = len(v)
+            if n == 0:
+                return []
+            x = v[0]
+            if isinstance(x, str):
+                cmds = _cmds(v)
+                if cmds is not None:
+                    i = len(block)
+                    block.extend(x for x in v if not isinstance(x, str))
+                    return {"$d": [i, len(block) - i, cmds]}
+                if n > 1 and all(isinstance(x, str) for x in v):
+                    key = tuple(v)
+                    j = self.columns.get(key)
+                    if j is None:
+                        self.columns[key] = len(self.columns)
+                        return {"$s": list(v)}
+                    return {"$r": j}
+            elif _is_num(x) and all(_is_num(x) for x in v):
+                i = len(block)
+                block.extend(v)
+                return {"$f": [i, n]}
+            elif n > 1 and isinstance(x, (list, tuple)):
+                m = len(x)
+                if m and all(isinstance(y, (list, tuple)) and len(y) == m for y in v):
+                    return {"$c": [self._column([y[j] for y in v], block) for j in range(m)]}
+            return [self._pack(x, block) for x in v]
+        return v
+
+    def _column(self, col, block):
+        cmds = _cmds(col[0]) if isinstance(col[0], (list, tuple)) else None
+        if cmds and all(_cmds(y) == cmds for y in col):
+            i = len(block)
+            for y in col:
+                block.extend(x for x in y if not isinstance(x, str))
+            return {"$D": [i, len(col), cmds]}
+        return self._pack(col, block)
+
+    def encode(self, record):
+        block = array("d")
+        head = dumps(self._pack(record, block), separators=(",", ":")).encode()
+        head += b" " * (-len(head) % 8)
+        if _BIG:
+            block.byteswap()
+        return pack("<II", 4 + len(head) + 8 * len(block), len(head)) + head + block.tobytes()
+
+
+class Decoder:
+    def __init__(self):
+        self.columns = []
+
+    def _tokens(self, block, i, cmds):
+        out = []
+        for c in cmds:
+            out.append(c)
+            k = ARITY[c.upper()]
+            out.extend(block[i : i + k].tolist())
+            i += k
+        return out, i
+
+    def _unpack(self, v, block):
+        if isinstance(v, dict):
+            if "$f" in v:
+                i, n = v["$f"]
+                return block[i : i + n].tolist()
+            elif "$d" in v:
+                i, _, cmds = v["$d"]
+                return self._tokens(block, i, cmds)[0]
+            elif "$D" in v:
+                i, n, cmds = v["$D"]
+                out = []
+                for _ in range(n):
+                    t, i = self._tokens(block, i, cmds)
+                    out.append(t)
+                return out
+            elif "$c" in v:
+                return [list(x) for x in zip(*(self._unpack(c, block) for c in v["$c"]))]
+            elif "$s" in v:
+                self.columns.append(v["$s"])
+                return list(v["$s"])
+            elif "$r" in v:
+                return list(self.columns[v["$r"]])
+            return {k: self._unpack(x, block) for k, x in v.items()}
+        elif isinstance(v, list):
+            return [self._unpack(x, block) for x in v]
+        return v
+
+    def decode(self, frame):
+        """Decode one frame (bytes, including its size field)."""
+        size, head = unpack_from("<II", frame)
+        block = array("d", frame[8 + head : 4 + size])
+        if _BIG:
+            block.byteswap()
+        return self._unpack(loads(frame[8 : 8 + head]), block)
+
+
+def read(f):
+    magic = f.read(len(MAGIC))
+    if magic != MAGIC:
+        raise ValueError(f"Not an oracle binary stream: {magic!r}")
+    dec = Decoder()
+    while True:
+        b = f.read(4)
+        if not b:
+            break
+        (size,) = unpack_from("<I", b)
+        yield dec.decode(b + f.read(size))
+
+
+class Writer:
+    def __init__(self, out):
+        self.out = out
+        self.enc = Encoder()
+        out.write(MAGIC)
+
+    def __call__(self, record):
+        self.out.write(self.enc.encode(record))
+
+
+def writer(format=None, out=None):
+    """Return a ``write(record)`` for the given ORACLE_FORMAT ("json" or "bin")."""
+    if format == "bin":
+        return Writer(out or sys.stdout.buffer)
+    elif format in (None, "", "json", "jsonl"):
+        out = out or sys.stdout
+        return lambda record: print(dumps(record), file=out)
+    raise ValueError(f"Unexpected ORACLE_FORMAT={format!r}")
+
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else ""
+    if cmd == "tojson":
+        for record in read(sys.stdin.buffer):
+            print(dumps(record))
+    elif cmd == "tobin":
+        write = Writer(sys.stdout.buffer)
+        for line in sys.stdin:
+            line.strip() and write(loads(line))
+    else:
+        sys.stderr.write("usage: oracle_binary.py tojson|tobin < input > output\n")
+        sys.exit(2)
@@ -0,0 +1,176 @@
+"""Content-addressed on-disk cache for the oracle scripts (path.py, data.box.py).
+
+The key covers the script source, the selected environment variables and the
+installed versions of the reference libraries, so editing ``data1`` or
+upgrading svgpathtools gives a new key.  On a hit the stored records are
+streamed to stdout before the reference libraries are imported.
+
+    ORACLE_CACHE=0          disable
+    ORACLE_CACHE=refresh    regenerate, overwriting the stored entry
+    ORACLE_CACHE_DIR=...    location (default ~/.cache/svggeom.oracle)
+    ORACLE_CACHE_MAX=256    size cap in MiB, oldest entries evicted first
+
+    python3 test/oracle_cache.py clear|list|prune
+"""
+
+from os import environ, path, makedirs, replace, remove, walk, utime, getpid
+from hashlib import sha1
+from functools import lru_cache
+from json import dumps
+import sys
+import atexit
+
+LIBS = ("svgpathtools", "svgelements", "inkex", "numpy")
+
+
+def cache_dir():
+    d = environ.get("ORACLE_CACHE_DIR")
+    return d or path.join(path.expanduser("~"), ".cache", "svggeom.oracle")
+
+
+@lru_cache(None)
+def lib_versions(libs=LIBS):
+    from importlib.metadata import version, PackageNotFoundError
+
+    v = {}
+    for name in libs:
+        try:
+            v[name] = version(name)
+        except PackageNotFoundError:
+            v[name] = None
+    return v
+
+
+def cache_key(script, names, extra=None, files=(), env=None):
+    if env is None:
+        env = environ
+    h = sha1()
+    here = path.dirname(path.abspath(script))
+    for file in (script, __file__, *(path.join(here, f) for f in files)):
+        with open(file, "rb") as f:
+            h.update(f.read())
+    env = {k: env.get(k) for k in sorted(names)}
+    h.update(dumps([path.basename(script), env, lib_versions(), extra]).encode())
+    return h.hexdigest()
+
+
+def cache_file(key, suffix=".jsonl"):
+    return path.join(cache_dir(), key[:2], key[2:] + suffix)
+
+
+def enabled(env=None):
+    return (environ if env is None else env).get("ORACLE_CACHE", "1") not in ("0", "no", "off")
+
+
+def entries(dir=None):
+    dir = dir or cache_dir()
+    for root, _, files in walk(dir):
+        for name in files:
+            if name.endswith(".jsonl") or name.endswith(".bin"):
+                file = path.join(root, name)
+                st = path.getsize(file), path.getmtime(file)
+                yield file, *st
+
+
+def prune(limit=None, dir=None):
+    if limit is None:
+        limit = float(environ.get("ORACLE_CACHE_MAX", 256)) * 1024 * 1024
+    items = sorted(entries(dir), key=lambda v: v[2], reverse=True)
+    total = 0
+    for file, size, _ in items:
+        total += size
+        if total > limit:
+            remove(file)
+            sys.stderr.write(f"Cache: Evict {file}\n")
+
+
+def clear(dir=None):
+    n = 0
+    for file, _, _ in list(entries(dir)):
+        remove(file)
+        n += 1
+    sys.stderr.write(f"Cache: {n} entries removed\n")
+
+
+class _Tee:
+    def __init__(self, out, file):
+        self.out = out
+        self.file = file
+
+    def write(self, s):
+        self.file.write(s.encode() if isinstance(s, str) else s)
+        return self.out.write(s)
+
+    @property
+    def buffer(self):
+        return _Tee(self.out.buffer, self.file)
+
+    def flush(self):
+        self.out.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.out, name)
+
+
+def cached(script, names, extra=None, suffix=".jsonl", files=()):
+    """Replay a stored run of ``script`` and exit, or record the current run.
+
+    ``files`` are helper modules, relative to the script, that also go into
+    the key.  Must be called before the reference libraries are imported.
+    """
+    mode = environ.get("ORACLE_CACHE", "1")
+    if not enabled():
+        return
+    key = cache_key(script, names, extra, files)
+    file = cache_file(key, suffix)
+    dir = path.dirname(file)
+    if mode != "refresh" and path.exists(file):
+        sys.stderr.write(f"Cache: Hit {path.basename(script)} {key}\n")
+        utime(file)
+        out = sys.stdout.buffer
+        with open(file, "rb") as f:
+            while True:
+                b = f.read(1 << 16)
+                if not b:
+                    break
+                out.write(b)
+        out.flush()
+        sys.exit(0)
+    makedirs(dir, exist_ok=True)
+    tmp = f"{file}.{getpid()}.tmp"
+    rec = open(tmp, "wb")
+    failed = []
+    hook = sys.excepthook
+
+    def excepthook(*args):
+        failed.append(args)
+        hook(*args)
+
+    def commit():
+        rec.close()
+        if failed:
+            remove(tmp)
+        else:
+            replace(tmp, file)
+            prune()
+
+    sys.excepthook = excepthook
+    sys.stdout = _Tee(sys.stdout, rec)
+    atexit.register(commit)
+
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "list"
+    if cmd == "clear":
+        clear()
+    elif cmd == "prune":
+        prune()
+    elif cmd == "list":
+        total = 0
+        for file, size, _ in entries():
+            total += size
+            print(f"{size:>12} {file}")
+        print(f"{total:>12} total")
+    else:
+        sys.stderr.write(f"Unknown command {cmd!r}\n")
+        sys.exit(2)
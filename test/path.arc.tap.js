@@ -40,6 +40,11 @@ for await (const item of enum_path_data({ SEGMENTS: 'Arc' })) {
     test.test(`PathU<${item.d}>`, { bail: CI }, function (t) {
         const cur = PathUnit.move_to(start).A(radius[0], radius[1], rotation, large_arc, sweep, [ex, ey]);
         testSegment(t, cur, item, deltp);
+        for (const [k, { length }] of Object.entries(item.at)) {
+            const T = parseFloat(k);
+            t.almostEqual(cur.length_at(T), length, deltp.len_epsilon, `length_at(${k})`, [item]);
+            t.almostEqual(cur.t_at_length(length), T, 1e-7, `t_at_length(${length})`, [item]);
+        }
         testSegment(t, new PathChain(cur.as_curve()), item, {
             ...deltp,
             test_descs: false,
@@ -0,0 +1,120 @@
+'uses strict';
+import test from 'tap';
+import { PathLC, PathBatch } from 'svggeom';
+import { enum_path_data } from './path.utils.js';
+import './utils.js';
+const CI = !!process.env.CI;
+
+const paths = [];
+for await (const { d } of enum_path_data({ DATA: 'synthetic', N: '40', SEGS: '30', DEGEN: '0' })) {
+    paths.push(d);
+}
+// uneven sizes, and some broken ones
+const inputs = [];
+for (let i = 0; i < 2000; ++i) {
+    inputs.push(i % 97 == 5 ? 'M1,2 L' : i % 11 ? paths[i % paths.length] : paths.slice(0, 1 + (i % 7)).join(' '));
+}
+
+function expected(d) {
+    try {
+        const p = PathLC.parse(d);
+        const b = p.bbox();
+        const segs = [];
+        for (let cur = p._tail; cur; cur = cur._prev) segs.unshift(cur);
+        const [[x0, y0], [x1, y1]] = [segs[0].to, p._tail.to];
+        const drawn = segs.filter(s => s.constructor.name != 'MoveLC').length;
+        return [p.length, b.min_x, b.min_y, b.max_x, b.max_y, drawn, x0, y0, x1, y1];
+    } catch (err) {
+        return Array(PathBatch.FIELDS).fill(NaN);
+    }
+}
+
+function check(t, batch, list) {
+    const { results } = batch;
+    const F = PathBatch.FIELDS;
+    t.equal(batch.size, list.length);
+    let bad = 0;
+    list.forEach((d, i) => {
+        const want = expected(d);
+        const got = [...results.subarray(i * F, i * F + F)];
+        const ok = want.every((v, j) =>
+            Number.isNaN(v) ? Number.isNaN(got[j]) : Math.abs(v - got[j]) <= 1e-9 * (1 + Math.abs(v))
+        );
+        ok || bad++ || t.same(got, want, `${i} ${d.slice(0, 60)}`);
+    });
+    t.equal(bad, 0, 'rows as PathLC has them');
+}
+
+test.test(`in thread`, { bail: !CI }, async function (t) {
+    const batch = await PathBatch.measure(inputs, { threads: 1 });
+    check(t, batch, inputs);
+    t.end();
+});
+
+test.test(`workers`, { bail: !CI }, async function (t) {
+    const batch = new PathBatch(inputs);
+    t.ok(batch.paths.data.buffer instanceof SharedArrayBuffer);
+    t.ok(batch.results.buffer instanceof SharedArrayBuffer);
+    let next = 0;
+    for await (const [from, to] of batch.run({ threads: 3, inline_below: 0 })) {
+        t.equal(from, next, 'in order');
+        t.ok(to > from);
+        next = to;
+    }
+    t.equal(next, inputs.length);
+    check(t, batch, inputs);
+    // packed input, and a pool already running
+    const again = await PathBatch.measure(PathBatch.pack(inputs.slice(0, 500)), { threads: 3, inline_below: 0 });
+    check(t, again, inputs.slice(0, 500));
+    t.equal(PathBatch.pool_size, 3);
+    // the pool follows what each batch asks for
+    check(t, await PathBatch.measure(inputs, { threads: 4, inline_below: 0 }), inputs);
+    t.equal(PathBatch.pool_size, 4);
+    check(t, await PathBatch.measure(inputs, { threads: 2, inline_below: 0 }), inputs);
+    t.equal(PathBatch.pool_size, 2);
+    await PathBatch.close();
+    t.equal(PathBatch.pool_size, 0);
+    t.end();
+});
+
+test.test(`stats`, { bail: !CI }, async function (t) {
+    const list = ['M1,2L4,6', 'M0,0 L3,4', '', 'M1,2 L'];
+    const stats = [];
+    for await (const s of new PathBatch(list)) {
+        stats.push(s);
+    }
+    t.same(stats[0], { length: 5, bbox: [1, 2, 4, 6], segments: 1, start: [1, 2], end: [4, 6] });
+    t.same(stats.length, 4);
+    t.ok(Number.isNaN(stats[3].length));
+    const packed = PathBatch.pack(list);
+    t.equal(packed.ends[1] - packed.ends[0], 'M0,0 L3,4'.length + 2, 'UTF-8');
+    t.end();
+});
+
+test.test(`packed input`, { bail: !CI }, async function (t) {
+    const list = inputs.slice(0, 300);
+    const { data, ends } = PathBatch.pack(list);
+    // not shared, copied to shared memory once
+    const batch = new PathBatch({ data: data.slice(), ends: ends.slice() });
+    t.ok(batch.paths.data.buffer instanceof SharedArrayBuffer);
+    t.ok(batch.paths.ends.buffer instanceof SharedArrayBuffer);
+    for await (const _ of batch.run({ threads: 1 }));
+    check(t, batch, list);
+    const shared = { data, ends };
+    t.equal(new PathBatch(shared).paths.data, data, 'shared as is');
+    t.throws(() => new PathBatch('M1,2L3,4'), TypeError);
+    t.throws(() => new PathBatch({ data: [1, 2], ends: [2] }), TypeError);
+    t.end();
+});
+
+test.test(`chunks`, { bail: !CI }, function (t) {
+    const batch = new PathBatch(inputs);
+    const ranges = batch.chunks(16);
+    t.equal(ranges[0][0], 0);
+    t.equal(ranges[ranges.length - 1][1], inputs.length);
+    const { ends } = batch.paths;
+    const bytes = ranges.map(([a, b]) => ends[b - 1] - (a > 0 ? ends[a - 1] : 0));
+    t.ok(Math.max(...bytes) <= ends[ends.length - 1] / 16 + Math.max(...inputs.map(d => d.length)));
+    t.same(new PathBatch([]).chunks(4), []);
+    t.end();
+});
@@ -0,0 +1,107 @@
+'uses strict';
+import test from 'tap';
+import { PathLC, Matrix } from 'svggeom';
+import { enum_path_data } from './path.utils.js';
+import './utils.js';
+const CI = !!process.env.CI;
+
+const paths = [];
+for await (const { d } of enum_path_data({ DATA: 'synthetic', N: '12', SEGS: '30', DEGEN: '0' })) {
+    paths.push(d);
+}
+const MATRICES = [
+    'translate(10,20) rotate(30) scale(1.5,0.5)',
+    'rotate(45)',
+    'scale(2)',
+    'scale(-1,3) translate(5)',
+    'skewX(20) rotate(-45)',
+].map(T => Matrix.parse(T));
+
+// the box as merged segment by segment
+function merged(p) {
+    let b;
+    for (let cur = p._tail; cur; cur = cur._prev) {
+        b = b ? b.merge(cur.bbox()) : cur.bbox();
+    }
+    return [...(b ?? [])].map(v => [...v]);
+}
+
+function dump(b) {
+    return [...b].map(v => [...v]);
+}
+
+test.test(`cached`, { bail: !CI }, function (t) {
+    for (const d of paths) {
+        const p = PathLC.parse(d);
+        t.strictSame(dump(p.bbox()), merged(p), d.slice(0, 60));
+        t.strictSame(dump(p.bbox()), merged(p), 'again');
+        p.bbox()[0][0] = 1e9;
+        t.strictSame(dump(p.bbox()), merged(p), 'copy');
+    }
+    const p = PathLC.move_to([0, 0]);
+    for (let i = 1; i < 100; ++i) {
+        p.line_to([i, (i * 37) % 11]);
+        i % 10 || p.quad_to([i, -i], [i + 1, 0]);
+        t.strictSame(dump(p.bbox()), merged(p), `append ${i}`);
+    }
+    t.end();
+});
+
+test.test(`bbox_under`, { bail: !CI }, function (t) {
+    for (const M of MATRICES) {
+        for (const d of paths) {
+            const p = PathLC.parse(d);
+            const b = p.bbox_under(M);
+            if (!/[Aa]/.test(d)) {
+                t.strictSame(dump(b), dump(p.transform(M).bbox()), `${M} ${d.slice(0, 60)}`);
+                continue;
+            }
+            // inside the box, and reached, by points on the transformed segments
+            const [[x0, x1], [y0, y1]] = b;
+            const eps = 1e-9 * (1 + Math.abs(x0) + Math.abs(x1) + Math.abs(y0) + Math.abs(y1));
+            const far = 1e-4 * (x1 - x0 + y1 - y0);
+            let [a0, a1, b0, b1] = [Infinity, -Infinity, Infinity, -Infinity];
+            for (let cur = p._tail; cur; cur = cur._prev) {
+                if (!cur._prev) continue;
+                for (let i = 0; i <= 400; ++i) {
+                    const [x, y] = cur.point_at(i / 400).transform(M);
+                    [a0, a1, b0, b1] = [Math.min(a0, x), Math.max(a1, x), Math.min(b0, y), Math.max(b1, y)];
+                }
+                const [s0, s1] = cur.from.transform(M);
+                [a0, a1, b0, b1] = [Math.min(a0, s0), Math.max(a1, s0), Math.min(b0, s1), Math.max(b1, s1)];
+            }
+            t.ok(x0 <= a0 + eps && a1 <= x1 + eps && y0 <= b0 + eps && b1 <= y1 + eps, `inside ${M} ${d.slice(0, 60)}`);
+            t.ok(a0 - x0 < far && x1 - a1 < far && b0 - y0 < far && y1 - b1 < far, `tight ${M} ${d.slice(0, 60)}`);
+        }
+    }
+    const arc = PathLC.parse('M0,0A10,5,0,0,1,20,0');
+    const [[x0, x1], [y0, y1]] = arc.bbox_under(Matrix.parse('rotate(90)'));
+    t.same([x0, x1, y0, y1].map(v => +v.toFixed(9)), [0, 5, 0, 20], 'rotated arc');
+    const R = Matrix.parse('rotate(30)');
+    const [tight, loose] = [arc.bbox_under(R), arc.bbox().transform(R)];
+    t.ok(tight.width < loose.width && tight.height < loose.height, 'tighter than the transformed box');
+    t.end();
+});
+
+test.test(`bbox_all`, { bail: !CI }, function (t) {
+    const list = paths.map(d => PathLC.parse(d)).concat([new PathLC(undefined)]);
+    const flat = b => [b.min_x, b.min_y, b.max_x, b.max_y];
+    t.strictSame([...PathLC.bbox_all(list)], list.flatMap(p => flat(p.bbox())));
+    const M = MATRICES[0];
+    t.strictSame([...PathLC.bbox_all(list, M)], list.flatMap(p => flat(p.bbox_under(M))));
+    const out = new Float64Array(list.length * 4);
+    t.equal(PathLC.bbox_all(list, undefined, out), out);
+    t.end();
+});
+
+test.test(`rotated arc`, { bail: !CI }, function (t) {
+    // phi is in degrees
+    const p = PathLC.parse('M340.752,755.259164A142.926,121,-243.807,1,1,415.201,733.880793');
+    const [[x0, x1], [y0, y1]] = p.bbox();
+    const seg = p._tail;
+    for (let i = 0; i <= 100; ++i) {
+        const [x, y] = seg.point_at(i / 100);
+        t.ok(x0 - 1e-9 <= x && x <= x1 + 1e-9 && y0 - 1e-9 <= y && y <= y1 + 1e-9, `${i}`);
+    }
+    t.end();
+});
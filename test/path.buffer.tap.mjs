@@ -0,0 +1,72 @@
+'uses strict';
+import test from 'tap';
+import { PathLC, PathBuffer, Matrix } from 'svggeom';
+import { enum_path_data } from './path.utils.js';
+import './utils.js';
+const CI = !!process.env.CI;
+const T = [-0.25, 0, 1e-9, 0.1, 0.25, 1 / 3, 0.5, 0.75, 0.9, 1 - 1e-9, 1, 1.25];
+const OPTS = [undefined, { relative: true }, { relative: true, smooth: true, short: true }, { smooth: true, short: true }, { close: false }];
+const M = Matrix.parse('translate(10,20) rotate(30) scale(1.5,0.5)');
+
+function attempt(f) {
+    try {
+        return [...(f() ?? [])];
+    } catch (err) {
+        return err.constructor.name;
+    }
+}
+
+function same_as_path(t, buf, p) {
+    for (const opt of OPTS) {
+        t.equal(buf.describe(opt), p.describe(opt), `describe ${JSON.stringify(opt)}`);
+    }
+    t.strictSame(buf.length, p.length, 'length');
+    t.strictSame([...buf.bbox()], [...p.bbox()], 'bbox');
+    for (const v of T) {
+        t.strictSame(attempt(() => buf.point_at(v)), attempt(() => p.point_at(v)), `point_at ${v}`);
+        t.strictSame(attempt(() => buf.point_at_length(v * 10, true)), attempt(() => p.point_at_length(v * 10, true)));
+    }
+}
+
+async function* paths() {
+    for await (const { d } of enum_path_data({ SEGMENTS: '' })) {
+        yield d;
+    }
+    for await (const { d } of enum_path_data({ DATA: 'synthetic', N: '4', SEGS: '50', DEGEN: '0' })) {
+        yield d;
+    }
+}
+
+for await (const d of paths()) {
+    test.test(`<${d.length > 80 ? d.slice(0, 80) + '...' : d}>`, { bail: !CI }, function (t) {
+        const p = PathLC.parse(d);
+        const buf = PathBuffer.parse(d);
+        same_as_path(t, buf, p);
+        same_as_path(t, PathBuffer.from(p), p);
+        t.equal(buf.to_path().describe(), p.describe(), 'to_path');
+        t.equal(buf.reversed().describe(), p.reversed().describe(), 'reversed');
+        t.equal(buf.transform(M).describe(), p.transform(M).describe(), 'transform');
+        t.end();
+    });
+}
+
+test.test(`layout`, { bail: !CI }, function (t) {
+    const buf = PathBuffer.parse('M1,2L3,4Q5,6,7,8C9,10,11,12,13,14A5,5,0,0,1,20,14Z');
+    t.same(Array.from(buf.codes), [
+        PathBuffer.MOVE,
+        PathBuffer.LINE,
+        PathBuffer.QUAD,
+        PathBuffer.CUBIC,
+        PathBuffer.ARC,
+        PathBuffer.CLOSE,
+    ]);
+    t.same(Array.from(buf.coords), [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 20, 14, 1, 2]);
+    t.equal(buf.arcs.length, 11);
+    t.same(Array.from(buf.arcs.subarray(9)), [0, 1]);
+    t.equal(buf.size, 6);
+    t.same([...buf.to], [1, 2, 0]);
+    t.equal(PathBuffer.parse('').describe(), PathLC.parse('').describe());
+    t.equal(PathBuffer.parse('L10,0').describe(), 'M0,0L10,0');
+    t.throws(() => PathBuffer.parse('M1,2L3'));
+    t.end();
+});
@@ -1,12 +1,12 @@
 'uses strict';
 import { enum_path_data, test_segment, testSegment } from './path.utils.js';
 import './utils.js';
-import { PathLC as PathChain } from 'svggeom';
+import { PathLC as PathChain, Probe } from 'svggeom';
 import test from 'tap';
 const { Unit: PathUnit } = PathChain
 const CI = !!process.env.CI;
 
-const deltp = { len_epsilon: 0.189, point_epsilon: 1e-10, slope_epsilon: 1e-8 };
+const deltp = { len_epsilon: 1e-6, point_epsilon: 1e-10, slope_epsilon: 1e-8 };
 
 for await (const item of enum_path_data({ SEGMENTS: 'CubicBezier' })) {
     test.test(`PathUnit<${item.d}>`, { bail: CI }, function (t) {
@@ -20,7 +20,19 @@ for await (const item of enum_path_data({ SEGMENTS: 'CubicBezier' })) {
         }
         // if (CI)
         {
-            testSegment(t, PathUnit.parse(`M ${sx},${sy} C ${x1},${y1} ${x2},${y2} ${ex},${ey}`), item, deltp);
+            const cur = PathUnit.parse(`M ${sx},${sy} C ${x1},${y1} ${x2},${y2} ${ex},${ey}`);
+            testSegment(t, cur, item, deltp);
+            for (const [k, { length }] of Object.entries(item.at)) {
+                t.almostEqual(cur.length_at(parseFloat(k)), length, deltp.len_epsilon, `length_at(${k})`, [item]);
+                t.almostEqual(cur.t_at_length(length), parseFloat(k), 1e-7, `t_at_length(${length})`, [item]);
+            }
+            const len = cur.length;
+            const probe = new Probe();
+            t.equal(probe.scope(() => cur.length), len, 'cached length');
+            t.equal(probe.op('length').steps, 0, 'no quadrature again');
+            const box = cur.bbox();
+            box.merge_self(cur.bbox().resize(100));
+            t.notSame(cur.bbox().dump(), box.dump(), 'cached bbox is not shared');
             testSegment(
                 t,
                 PathUnit.parse(`m ${sx},${sy} c ${x1 - sx},${y1 - sy} ${x2 - sx},${y2 - sy} ${ex - sx},${ey - sy}`),
@@ -0,0 +1,101 @@
+'uses strict';
+import test from 'tap';
+import { PathLC, Polyline, parse_stream } from 'svggeom';
+import { enum_path_data } from './path.utils.js';
+import './utils.js';
+const CI = !!process.env.CI;
+
+const items = [];
+for await (const { d } of enum_path_data({ DATA: 'synthetic', N: '6', SEGS: '20', DEGEN: '0' })) {
+    items.push(d);
+}
+
+function to_run(x, y, ax, ay, bx, by) {
+    const [dx, dy] = [bx - ax, by - ay];
+    const L = dx * dx + dy * dy;
+    const t = L > 0 ? Math.max(0, Math.min(1, ((x - ax) * dx + (y - ay) * dy) / L)) : 0;
+    return Math.hypot(ax + t * dx - x, ay + t * dy - y);
+}
+
+// farthest a point on the path is from the polyline
+function deviation(p, poly) {
+    const pts = poly.points;
+    const starts = new Set(poly.breaks);
+    let worst = 0;
+    for (let cur = p._tail; cur; cur = cur._prev) {
+        if (!cur._prev || cur.constructor.name == 'MoveLC') continue;
+        for (let i = 0; i <= 50; ++i) {
+            const [x, y] = cur.point_at(i / 50);
+            let best = Infinity;
+            for (let k = 1; k < poly.size; ++k) {
+                starts.has(k) || (best = Math.min(best, to_run(x, y, pts[2 * k - 2], pts[2 * k - 1], pts[2 * k], pts[2 * k + 1])));
+            }
+            worst = Math.max(worst, best);
+        }
+    }
+    return worst;
+}
+
+for (const tolerance of [2, 0.05]) {
+    test.test(`tolerance ${tolerance}`, { bail: !CI }, function (t) {
+        for (const d of items) {
+            const p = PathLC.parse(d);
+            const poly = p.flatten(tolerance);
+            t.ok(deviation(p, poly) <= tolerance * (1 + 1e-9), `${d.slice(0, 60)}`);
+            t.equal(poly.breaks.length, (d.match(/[Mm]/g) ?? []).length, 'breaks');
+        }
+        t.end();
+    });
+}
+
+test.test(`fewer points where flat`, { bail: !CI }, function (t) {
+    const p = PathLC.parse('M0,0C10,0,20,0,30,0L40,0Q45,50,50,0A25,25,0,0,1,100,0');
+    const [coarse, fine] = [p.flatten(1), p.flatten(0.01)];
+    t.equal(coarse.breaks.length, 1);
+    t.same([...coarse.points.slice(0, 4)], [0, 0, 30, 0], 'straight cubic in one run');
+    t.ok(fine.size > coarse.size * 5, `${fine.size} ${coarse.size}`);
+    t.same([...fine.points.slice(-2)], [100, 0], 'ends at the end');
+    t.end();
+});
+
+test.test(`buffers`, { bail: !CI }, function (t) {
+    const d = items.join(' ');
+    const p = PathLC.parse(d);
+    const whole = p.flatten(0.1);
+    const given = new Float64Array(whole.size * 2);
+    t.equal(p.flatten(0.1, given).coords, given, 'fills the buffer given');
+    t.not(p.flatten(0.1, new Float64Array(8)).coords.length, 8, 'grows a small one');
+    // in chunks of 100 points, handed over as each fills
+    const chunks = [];
+    const poly = new Polyline(0.1, 100, { write: (coords, breaks) => chunks.push([[...coords], breaks]) });
+    poly.segments(p._tail).end();
+    t.ok(chunks.length > 1 && chunks.every(([c]) => c.length <= 200), 'chunks');
+    const offsets = chunks.map((_, i) => chunks.slice(0, i).reduce((n, [c]) => n + c.length / 2, 0));
+    t.same(
+        chunks.flatMap(([c]) => c),
+        [...whole.points],
+        'same points'
+    );
+    t.same(
+        chunks.flatMap(([, b], i) => b.map(k => k + offsets[i])),
+        whole.breaks,
+        'same breaks'
+    );
+    // a buffer given too small for a point grows, even with out
+    const ones = [];
+    const tiny = new Polyline(0.1, new Float64Array(1), { write: coords => ones.push([...coords]) });
+    tiny.move_to(0, 0);
+    tiny.line_to(1, 2);
+    tiny.end();
+    t.same(ones, [[0, 0, 1, 2]]);
+    t.end();
+});
+
+test.test(`parse_stream`, { bail: !CI }, async function (t) {
+    const d = items.join(' ');
+    const chunks = d.match(/[^]{1,37}/g);
+    const poly = await parse_stream(chunks, new Polyline(0.1));
+    t.same([...poly.end().points], [...PathLC.parse(d).flatten(0.1).points]);
+    t.throws(() => new Polyline(0));
+    t.end();
+});
@@ -0,0 +1,62 @@
+'uses strict';
+import test from 'tap';
+import { PathLC } from 'svggeom';
+import { enum_path_data } from './path.utils.js';
+import './utils.js';
+const CI = !!process.env.CI;
+const T = [-0.25, 0, 1e-9, 0.1, 0.25, 1 / 3, 0.5, 0.75, 0.9, 1 - 1e-9, 1, 1.25];
+
+for await (const item of enum_path_data({ DATA: 'synthetic', N: '4', SEGS: '50', DEGEN: '0' })) {
+    // two subpaths, the first closed
+    const d = `${item.d}Z${item.d}`;
+    const { i } = item;
+    test.test(`indexed synthetic #${i}`, { bail: !CI }, function (t) {
+        const a = PathLC.parse(d);
+        const b = PathLC.parse(d).indexed();
+        t.ok(b.is_indexed);
+        t.notOk(a.is_indexed);
+        t.strictSame(b.length, a.length);
+        const pts = b.points_at(T);
+        T.forEach((v, j) => {
+            t.strictSame(b.segment_at(v), a.segment_at(v), `segment_at ${v}`);
+            t.strictSame([...b.point_at(v)], [...a.point_at(v)], `point_at ${v}`);
+            t.strictSame([...b.tangent_at(v)], [...a.tangent_at(v)], `tangent_at ${v}`);
+            t.strictSame(b.slope_at(v), a.slope_at(v), `slope_at ${v}`);
+            t.strictSame([...b.point_at_length(v * a.length, true)], [...a.point_at_length(v * a.length, true)]);
+            t.strictSame([pts[2 * j], pts[2 * j + 1]], [...a.point_at(v)].slice(0, 2), `points_at ${v}`);
+            if (v >= 0 && v < 1) {
+                t.strictSame(b.split_at(v).map(p => p.describe()), a.split_at(v).map(p => p.describe()), `split_at ${v}`);
+            }
+        });
+        t.end();
+    });
+}
+
+test.test(`index follows appends`, { bail: !CI }, function (t) {
+    const p = PathLC.move_to([0, 0]).indexed();
+    p.line_to([10, 0]);
+    t.same([...p.point_at(0.5)], [5, 0, 0]);
+    p.line_to([10, 10]);
+    t.same([...p.point_at(0.5)], [10, 0, 0]);
+    t.same(Array.from(p.points_at([0, 0.25, 1])), [0, 0, 5, 0, 10, 10]);
+    p.move_to([20, 20]).line_to([20, 30]);
+    t.same([...p.point_at(1)], [20, 30, 0]);
+    t.same([...p.point_at_length(25)], [20, 25, 0]);
+    t.same(Array.from(new PathLC(undefined).points_at([0.5])), [NaN, NaN]);
+    t.end();
+});
+
+test.test(`long path`, { bail: !CI }, function (t) {
+    const n = 200000;
+    let p = PathLC.move_to([0, 0]);
+    for (let i = 1; i <= n; ++i) {
+        p.line_to([i, 0]);
+    }
+    t.equal(p.length, n);
+    t.same([...p.point_at(0.5)], [n / 2, 0, 0]);
+    p.indexed();
+    t.same([...p.point_at(0.25)], [n / 4, 0, 0]);
+    const out = p.points_at(Float64Array.of(0, 0.5, 1), new Float64Array(6));
+    t.same(Array.from(out), [0, 0, n / 2, 0, n, 0]);
+    t.end();
+});
@@ -0,0 +1,80 @@
+'uses strict';
+import test from 'tap';
+import { PathLC, PathBuffer, LazyPath, Matrix, Vector } from 'svggeom';
+import { enum_path_data } from './path.utils.js';
+import './utils.js';
+const CI = !!process.env.CI;
+
+const paths = [];
+for await (const { d } of enum_path_data({ DATA: 'synthetic', N: '60', SEGS: '12', DEGEN: '0' })) {
+    paths.push(d);
+}
+
+function close(a, b, eps = 1e-9) {
+    return Math.abs(a - b) <= eps * (1 + Math.abs(a));
+}
+
+test.test(`cheap queries`, { bail: !CI }, function (t) {
+    for (const d of paths) {
+        const lazy = new LazyPath(d);
+        const buf = PathBuffer.parse(d);
+        t.equal(lazy.size, buf.size);
+        t.ok(lazy.to.equals(buf.to), 'to');
+        t.ok(lazy.from.equals(Vector.pos(buf.coords[0], buf.coords[1])), 'from');
+        const [h, b] = [lazy.hull(), buf.bbox()];
+        t.ok(
+            h.min_x <= b.min_x + 1e-9 && h.min_y <= b.min_y + 1e-9 && h.max_x >= b.max_x - 1e-9 && h.max_y >= b.max_y - 1e-9,
+            `hull holds the bbox ${d}`
+        );
+        lazy.arcs == 0 && t.notOk(lazy.is_solved, 'nothing solved');
+    }
+    t.equal(new LazyPath('M1,2 L3,4 M5,6 Z').subpaths, 2);
+    t.ok(new LazyPath('').hull().is_valid() === false || new LazyPath('').size == 1);
+    t.end();
+});
+
+test.test(`exact geometry`, { bail: !CI }, function (t) {
+    for (const d of paths) {
+        const lazy = new LazyPath(d);
+        const p = PathLC.parse(d);
+        t.ok(close(lazy.length, p.length), 'length');
+        t.ok(lazy.bbox().equals(p.bbox(), 1e-9), 'bbox');
+        t.ok(lazy.point_at(0.3).equals(p.point_at(0.3), 1e-9), 'point_at');
+        t.equal(lazy.describe(), p.describe());
+        t.equal(lazy.to_path().describe(), p.describe());
+    }
+    t.end();
+});
+
+test.test(`segments and slices`, { bail: !CI }, function (t) {
+    for (const d of paths) {
+        const lazy = new LazyPath(d);
+        const p = PathLC.parse(d);
+        const segs = [];
+        for (let cur = p._tail; cur; cur = cur._prev) segs.unshift(cur);
+        const i = segs.length >> 1;
+        const seg = lazy.segment(i);
+        t.ok(seg.to.equals(segs[i].to), 'segment end');
+        t.ok(seg.from.equals(segs[i].from), 'segment start');
+        t.ok(close(seg.length, segs[i].length), 'segment length');
+        const part = lazy.slice(0, i + 1);
+        t.ok(part._tail.to.equals(segs[i].to), 'slice end');
+        t.ok(close(lazy.slice().length, p.length), 'whole slice');
+    }
+    t.throws(() => new LazyPath('M1,2 L3,4').segment(2), RangeError);
+    t.end();
+});
+
+test.test(`from and transform`, { bail: !CI }, function (t) {
+    const M = Matrix.parse('rotate(30) scale(2, 0.5) translate(3, -1)');
+    for (const d of paths) {
+        const p = PathLC.parse(d);
+        const lazy = LazyPath.from(p);
+        t.ok(lazy.is_solved);
+        t.equal(lazy.describe(), p.describe());
+        t.ok(close(new LazyPath(lazy.describe()).length, PathLC.parse(lazy.describe()).length), 'round trip');
+        const q = new LazyPath(d).transform(M);
+        t.ok(q.bbox().equals(p.transform(M).bbox(), 1e-6), 'transformed bbox');
+    }
+    t.end();
+});
@@ -0,0 +1,172 @@
+'uses strict';
+import test from 'tap';
+import { PathLC, SegmentTree, Vector } from 'svggeom';
+import { enum_path_data } from './path.utils.js';
+import './utils.js';
+const CI = !!process.env.CI;
+
+const paths = [];
+for await (const { d } of enum_path_data({ DATA: 'synthetic', N: '40', SEGS: '10', DEGEN: '0' })) {
+    paths.push(d);
+}
+
+function segments(p) {
+    const segs = [];
+    for (let cur = p._tail; cur; cur = cur._prev) segs.unshift(cur);
+    return segs;
+}
+
+let seed = 7;
+function random() {
+    seed = (seed * 16807) % 2147483647;
+    return seed / 2147483647;
+}
+
+function queries(p, n) {
+    const [[x0, x1], [y0, y1]] = p.bbox();
+    const [w, h] = [x1 - x0, y1 - y0];
+    const out = new Float64Array(2 * n);
+    for (let i = 0; i < n; ++i) {
+        out[2 * i] = x0 - w / 4 + random() * w * 1.5;
+        out[2 * i + 1] = y0 - h / 4 + random() * h * 1.5;
+    }
+    return out;
+}
+
+// by sampling each segment
+function sampled(seg, x, y, n = 400) {
+    let best = Infinity;
+    for (let i = 0; i <= n; ++i) {
+        const [px, py] = seg.point_at(i / n);
+        best = Math.min(best, Math.hypot(px - x, py - y));
+    }
+    return best;
+}
+
+test.test(`segments`, { bail: !CI }, function (t) {
+    for (const d of paths.slice(0, 20)) {
+        const p = PathLC.parse(d);
+        const q = queries(p, 4);
+        for (const seg of segments(p)) {
+            if (!seg._prev || seg.constructor.name == 'MoveLC') continue;
+            for (let i = 0; i < q.length; i += 2) {
+                const [x, y] = [q[i], q[i + 1]];
+                const [u, point, dist] = seg.nearest([x, y]);
+                t.ok(u >= 0 && u <= 1);
+                t.ok(point.equals(seg.point_at(u), 1e-9), 'point at t');
+                t.ok(Math.abs(Math.hypot(point[0] - x, point[1] - y) - dist) < 1e-9, 'distance');
+                t.ok(dist <= sampled(seg, x, y) + 1e-9, `${seg.constructor.name} no worse than sampling`);
+            }
+        }
+    }
+    t.end();
+});
+
+test.test(`closed forms`, { bail: !CI }, function (t) {
+    const line = PathLC.parse('M0,0 L10,0')._tail;
+    t.same(line.nearest([4, 3]), [0.4, line.point_at(0.4), 3]);
+    t.equal(line.t_at_point([-5, 1]), 0);
+    t.equal(line.t_at_point([15, 1]), 1);
+    // quarter circle from (10, 0) to (0, 10) about the origin
+    const arc = PathLC.parse('M10,0 A10,10 0 0,1 0,10')._tail;
+    const [u, point, dist] = arc.nearest([20, 20]);
+    t.ok(Math.abs(u - 0.5) < 1e-12);
+    t.ok(point.equals(Vector.pos(10 / Math.SQRT2, 10 / Math.SQRT2), 1e-9));
+    t.ok(Math.abs(dist - (20 * Math.SQRT2 - 10)) < 1e-9);
+    t.equal(arc.t_at_point([-3, -4]) % 1, 0, 'an end when off the arc');
+    const move = PathLC.parse('M3,4')._tail;
+    t.same(move.nearest([0, 0]), [1, move.to, 5]);
+    t.end();
+});
+
+test.test(`paths`, { bail: !CI }, function (t) {
+    for (const d of paths) {
+        const p = PathLC.parse(d);
+        const segs = segments(p);
+        const q = queries(p, 25);
+        const { distance, segment, t: ts } = p.nearest_all(q);
+        let bad = 0;
+        for (let i = 0; i < q.length; i += 2) {
+            const [x, y] = [q[i], q[i + 1]];
+            // every segment solved, nothing skipped
+            let want = Infinity;
+            for (const seg of segs) {
+                if (seg._prev && seg.constructor.name != 'MoveLC') {
+                    want = Math.min(want, seg.nearest([x, y])[2]);
+                }
+            }
+            const k = i / 2;
+            const seg = segs[segment[k]];
+            const [px, py] = seg.point_at(ts[k]);
+            Math.abs(distance[k] - want) < 1e-9 && Math.abs(Math.hypot(px - x, py - y) - want) < 1e-9 ||
+                bad++ ||
+                t.same([distance[k], segment[k], ts[k]], [want], d);
+            const [one, u, point, dist] = p.nearest([x, y]);
+            t.equal(one, seg);
+            t.equal(u, ts[k]);
+            t.equal(dist, distance[k]);
+            t.ok(point.equals(Vector.pos(px, py)));
+        }
+        t.equal(bad, 0, 'as solving every segment');
+    }
+    t.end();
+});
+
+test.test(`T at point`, { bail: !CI }, function (t) {
+    for (const d of paths.slice(0, 20)) {
+        const p = PathLC.parse(d);
+        for (const T of [0.1, 0.37, 0.8]) {
+            const point = p.point_at(T);
+            const U = p.t_at_point(point);
+            t.ok(p.point_at(U).equals(point, 1e-6), `${T} ${U}`);
+        }
+    }
+    const p = PathLC.parse('M0,0 L10,0 M20,0 L30,0');
+    t.ok(Math.abs(p.t_at_point([15, 1]) - 0.5) < 1e-12, 'not across the move');
+    const { segment, t: ts, distance } = p.nearest_all([25, 2, 9, -1]);
+    t.same([...segment], [3, 1]);
+    t.same([...ts], [0.5, 0.9]);
+    t.same([...distance], [2, 1]);
+    const empty = new PathLC(undefined).nearest_all([1, 2]);
+    t.same([...empty.segment], [-1]);
+    t.ok(Number.isNaN(empty.distance[0]));
+    t.ok(Number.isNaN(new PathLC(undefined).t_at_point([1, 2])));
+    t.end();
+});
+
+test.test(`segment tree agrees`, { bail: !CI }, function (t) {
+    for (const d of paths.slice(0, 20)) {
+        const p = PathLC.parse(d);
+        const tree = SegmentTree.from_paths([p]);
+        const q = queries(p, 10);
+        const { distance } = p.nearest_all(q);
+        for (let i = 0; i < q.length; i += 2) {
+            const hit = tree.nearest([q[i], q[i + 1]]);
+            t.ok(Math.abs(hit.distance - distance[i / 2]) < 1e-9);
+        }
+    }
+    t.end();
+});
+
+test.test(`long path`, { bail: !CI }, function (t) {
+    let d = 'M0,0';
+    for (let i = 1; i < 3000; ++i) d += ` L${i},${(i * 7919) % 13}`;
+    const p = PathLC.parse(d);
+    const segs = segments(p);
+    const q = queries(p, 40);
+    const { distance, segment } = p.nearest_all(q);
+    for (let i = 0; i < q.length; i += 2) {
+        let [want, at] = [Infinity, -1];
+        segs.forEach((seg, k) => {
+            if (k > 0) {
+                const e = seg.nearest([q[i], q[i + 1]])[2];
+                e < want && ([want, at] = [e, k]);
+            }
+        });
+        t.ok(Math.abs(distance[i / 2] - want) < 1e-9);
+        t.equal(segment[i / 2], at, 'the first as close');
+    }
+    const U = p.t_at_point([1500.5, 20]);
+    t.ok(Math.abs(U * p.length - PathLC.parse(d.slice(0, d.indexOf(' L1501,'))).length) < p.length / 2000);
+    t.end();
+});
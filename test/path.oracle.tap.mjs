@@ -0,0 +1,86 @@
+'uses strict';
+import test from 'tap';
+import { Readable } from 'stream';
+import { spawnSync } from 'child_process';
+import { enum_path_data, enum_oracle_bin, OracleClient } from './path.utils.js';
+
+async function collect(it) {
+    const items = [];
+    for await (const item of it) {
+        items.push(item);
+    }
+    return items;
+}
+
+for (const env of [
+    { DATA: 'Arc' },
+    { DATA: 'transforms', ARCS: 'only', SCALE: 'no' },
+]) {
+    test.test(`ORACLE_FORMAT=bin ${JSON.stringify(env)}`, async function (t) {
+        const a = await collect(enum_path_data({ ...env, ORACLE_FORMAT: 'json' }));
+        const b = await collect(enum_path_data({ ...env, ORACLE_FORMAT: 'bin' }));
+        t.ok(a.length > 0);
+        t.strictSame(b, a);
+        t.end();
+    });
+}
+
+test.test(`views`, async function (t) {
+    const [item] = await collect(enum_path_data({ DATA: 'Arc', ORACLE_FORMAT: 'bin' }, { views: true }));
+    t.ok(item.bbox instanceof Float64Array);
+    t.equal(item.bbox.byteOffset % 8, 0);
+    const { cmds, values } = item.at['0.5'].pathA;
+    t.equal(cmds[0], 'M');
+    t.ok(values instanceof Float64Array);
+    // columns back to rows
+    const cubics = await collect(enum_path_data({ DATA: 'CubicBezier', ORACLE_FORMAT: 'bin' }, { views: true }));
+    const plain = await collect(enum_path_data({ DATA: 'CubicBezier', ORACLE_FORMAT: 'bin' }));
+    t.ok(cubics.length > 0);
+    cubics.forEach(({ points }, i) => {
+        t.ok(Array.isArray(points), 'rows in an Array');
+        t.strictSame(points.map(p => [...p]), plain[i].points);
+        t.ok(points.flat().every(Number.isFinite));
+    });
+    t.end();
+});
+
+test.test(`frames split across chunks`, async function (t) {
+    const env = { ...process.env, DATA: 'Line', ORACLE_FORMAT: 'bin' };
+    const buf = spawnSync('python3', ['test/path.py'], { env, stdio: ['ignore', 'pipe', 'ignore'] }).stdout;
+    const whole = await collect(enum_oracle_bin(Readable.from([buf])));
+    t.ok(whole.length > 0);
+    // odd sized chunks misalign every frame
+    const chunks = [];
+    for (let i = 0; i < buf.length; i += 13) {
+        chunks.push(buf.subarray(i, i + 13));
+    }
+    t.strictSame(await collect(enum_oracle_bin(Readable.from(chunks))), whole);
+    await t.rejects(collect(enum_oracle_bin(Readable.from([buf.subarray(0, buf.length - 3)]))), /Truncated/);
+    await t.rejects(collect(enum_oracle_bin(Readable.from([Buffer.from('{"d":1}\n')]))), /Not an oracle/);
+    t.end();
+});
+
+test.test(`oracle.py`, async function (t) {
+    const client = OracleClient.spawn();
+    try {
+        const env = { ...process.env, DATA: 'Arc' };
+        const a = await collect(client.records(env));
+        t.strictSame(a, await collect(enum_path_data({ DATA: 'Arc', ORACLE_FORMAT: 'json' })));
+        // stopping early leaves the connection usable
+        for await (const item of client.records(env)) {
+            break;
+        }
+        t.equal(await client.query('length', 'M0,0L10,0', { t: [0, 0.5] }), 5);
+        t.strictSame(await client.query('point', 'M0,0L10,0', { t: [0.25, 1] }), [
+            [2.5, 0],
+            [10, 0],
+        ]);
+        t.strictSame(await client.query('bbox', 'M0,0L10,5'), [0, 10, 0, 5]);
+        await t.rejects(client.query('nope', 'M0,0'), /Unknown query/);
+        await t.rejects(collect(client.records({ ...env, TRANSFORM_ENGINE: 'nope', DATA: 'transforms' })), /TRANSFORM_ENGINE/);
+        t.equal((await collect(client.records(env))).length, a.length);
+    } finally {
+        client.close();
+    }
+    t.end();
+});
@@ -2,7 +2,7 @@
 import test from 'tap';
 import { enum_path_data } from './path.utils.js';
 // import { SegmentLS as PCX } from 'svggeom';
-import { PathLC as PathXL } from 'svggeom';
+import { PathLC as PathXL, PathBuffer, PathParser } from 'svggeom';
 import './utils.js';
 const { Unit: PCX } = PathXL;
 
@@ -73,3 +73,39 @@ for await (const item of enum_path_data({ SEGMENTS: 'SEPaths' })) {
         t.end();
     });
 }
+
+test.test(`PathParser chunks`, { bail: 1 }, async function (t) {
+    const d = 'M10,20l1.5e1-2.5.5.5H-3v7C1,2,3,4,5,6s1,1,2,2Q0,0,1,1t3-3A5,5,30,0,1,20,14z';
+    const whole = PathXL.parse(d).describe();
+    for (let i = 0; i <= d.length; ++i) {
+        const p = await PathXL.parse_stream([d.slice(0, i), d.slice(i)]);
+        t.equal(p.describe(), whole, `split at ${i}`);
+    }
+    const chars = await PathXL.parse_stream(d.split(''));
+    t.equal(chars.describe(), whole);
+    const bytes = await PathXL.parse_stream(new TextEncoder().encode(d).map(c => c).reduce((a, c) => [...a, Uint8Array.of(c)], []));
+    t.equal(bytes.describe(), whole);
+    const buf = await PathBuffer.parse_stream([d.slice(0, 7), d.slice(7)]);
+    t.equal(buf.describe(), whole);
+
+    const seen = [];
+    const sink = new Proxy({}, { get: (_, name) => (...args) => seen.push([name, ...args]) });
+    const parser = new PathParser(sink);
+    parser.write('M1 2 L3');
+    t.same(seen, [['move_to', 1, 2]]);
+    parser.write(' 4 ');
+    t.same(seen.pop(), ['line_to', 3, 4]);
+    parser.write('5 6');
+    t.same(seen, [['move_to', 1, 2]], 'a number at the end of a chunk may go on');
+    parser.write('z');
+    t.same(seen.splice(0), [['move_to', 1, 2], ['line_to', 5, 6], ['close_to', 1, 2]]);
+    parser.end();
+    t.same(seen, []);
+
+    t.throwsRE(() => PathXL.parse('M10,20L30'), /Number expected at offset 9$/);
+    t.throwsRE(() => PathXL.parse('M10,20L30 Z'), /Number expected at offset 10$/);
+    t.throwsRE(() => PathXL.parse('M10,20Z 5'), /Command expected at offset 8$/);
+    t.throwsRE(() => new PathParser(sink).write('M10,').write('20Z 3').end(), /Command expected at offset 8$/);
+    t.equal(PathXL.parse('M10,20L30,40 # L50,60').describe(), 'M10,20L30,40');
+    t.end();
+});
@@ -141,6 +141,25 @@ data3 = [
 ]
 
 #  Array.from(document.querySelectorAll(".pl-s")).map(e=>e.textContent).map(x=>x.match(/^"(.+)"$/)[1]).filter(x=>x.indexOf(',')>0)
+from os import environ
+
+# everything the output depends on, for the result cache and oracle.py
+ENV_NAMES = [
+    *("DATA", "SEGMENTS", "POINTS", "PATH_POINTS", "ARCS", "SCALE", "CI", "TRANSFORM_ENGINE", "VERIFY", "SEED"),
+    *("N", "SEGS", "MIX", "DEGEN", "REFS"),
+]
+HELPERS = ["oracle_affine.py", "oracle_binary.py"]
+
+if __name__ == "__main__":
+    from oracle_cache import cached
+
+    cached(
+        __file__,
+        [*ENV_NAMES, "ORACLE_FORMAT"],
+        files=HELPERS,
+        suffix=".bin" if environ.get("ORACLE_FORMAT") == "bin" else ".jsonl",
+    )
+
 from svgpathtools import (
     parse_path,
     path,
@@ -150,9 +169,7 @@ from svgpathtools import (
     Line,
     Path as SPTPath,
 )
-from json import dumps
 from sys import stderr
-from os import environ
 import re
 
 if 1:
@@ -177,7 +194,7 @@ def brpt(c):
     return c.real, c.imag
 
 
-def paths(*args, parser=parse_path):
+def unique(*args):
     seen = {}
     for ds in args:
         for i, d in enumerate(ds):
@@ -186,406 +203,697 @@ def paths(*args, parser=parse_path):
                 stderr.write(f"Seen : {i} {d}\n")
             else:
                 seen[d] = True
-                yield parser(d), d
+                yield d
+
 
+def paths(*args, parser=parse_path):
+    for d in unique(*args):
+        yield parser(d), d
 
-DATA = environ.get("DATA") or environ.get("SEGMENTS")
-if not DATA:
-    r = int(environ.get("PATH_POINTS", 0)) or int(environ.get("POINTS", 0)) or 10
 
-    k = [i / r for i in range(r)] + [1]
+JOBS = int(environ.get("JOBS", 0) or 0)
+k = [i / 10 for i in range(10)] + [1]
 
-    # tf = [i / r for i in range(r)] + [1]
-    # stderr.write(f"t {k}\n")
-    for i, (p, d) in enumerate(paths(data1)):
-        v = dict(d=d)
-        t = None
-        try:
 
-            v["length"] = p.length()
-            v["bbox"] = p.bbox()
-            v["start"] = [p[0].start.real, p[0].start.imag]
-            v["end"] = [p[-1].end.real, p[-1].end.imag]
-            # pts = v["points"] = []
-            # for t in k:
-            #     # stderr.write(f"t={t}\n")
-            #     assert t >= 0
-            #     assert t <= 1
-            #     pts.append([t, *brpt(p.point(t))])
-            # pts = v["tangents"] = []
-            # for t in tf:
-            #     # stderr.write(f"t={t}\n")
-            #     assert t >= 0
-            #     assert t <= 1
-            #     try:
-            #         pts.append([t, *brpt(p.derivative(t))])
-            #     except AssertionError:
-            #         stderr.write(f"AssertionError {t} {p!r}\n")
-            #         break
+def run(fn, items, chunksize=1):
+    # results come back in input order so the stream is the same for any JOBS
+    if JOBS > 1:
+        from multiprocessing import get_context
+
+        with get_context("fork").Pool(JOBS) as pool:
+            yield from pool.imap(fn, items, chunksize)
+    else:
+        yield from map(fn, items)
+
+
+def crops(s, t):
+    if t < 1 and t > 0:
+        a = s.cropped(0, t)
+        b = s.cropped(t, 1)
+        a = a.d(use_closed_attrib=False, rel=False)
+        b = b.d(use_closed_attrib=False, rel=False)
+        return list(_tokenize_path(a)), list(_tokenize_path(b))
+    return 0, 0
+
+
+# DATA=all: parsed paths and per-segment results shared by every mode
+MEMO = None
+PARSED = None
+
+
+def parse(d):
+    if PARSED is None:
+        return parse_path(d)
+    p = PARSED.get(d)
+    if p is None:
+        p = PARSED[d] = parse_path(d)
+    return p
+
+
+def seg_key(seg):
+    if isinstance(seg, Arc):
+        return (Arc, seg.start, seg.radius, seg.rotation, seg.large_arc, seg.sweep, seg.end)
+    return (type(seg), *seg.bpoints())
+
+
+def memo(seg, op, fn):
+    if MEMO is None:
+        return fn()
+    e = MEMO.setdefault(seg_key(seg), {})
+    if op not in e:
+        e[op] = fn()
+    return e[op]
+
+
+def path_record(d):
+    p = parse(d)
+    v = dict(d=d)
+    t = None
+    try:
+
+        v["length"] = p.length()
+        v["bbox"] = p.bbox()
+        v["start"] = [p[0].start.real, p[0].start.imag]
+        v["end"] = [p[-1].end.real, p[-1].end.imag]
+
+        pts = v["at"] = {}
+        for t in k:
+            assert t >= 0
+            assert t <= 1
+            pAt = dict(zip(["x", "y"], brpt(p.point(t))))
+            try:
+                tAt = dict(zip(["tx", "ty"], brpt(p.unit_tangent(t))))
+            except AssertionError:
+                tAt = dict(tx=0, ty=0)
+                stderr.write(f"AssertionError {t} {p!r}\n")
+                # break
+            a, b = crops(p, t)
+            pts[t] = {**pAt, **tAt, "pathA": a, "pathB": b}
+
+    except:
+        stderr.write(f"err on {t} {v} {p}\n")
+        raise
+    return v
+
+
+def cubic_records(d):
+    out = []
+    for seg in parse(d):
+        if isinstance(seg, CubicBezier):
+            pts = tuple(
+                brpt(im) for im in (seg.start, seg.control1, seg.control2, seg.end)
+            )
+            v = dict(
+                points=pts,
+                bbox=memo(seg, "bbox", seg.bbox),
+                length=memo(seg, "length", seg.length),
+                d=d,
+                start=pts[0],
+                end=pts[-1],
+            )
+
+            pts = v["at"] = {}
+            for t in k:
+                assert t >= 0
+                assert t <= 1
+                pAt = dict(zip(["x", "y"], brpt(seg.point(t))))
+                tAt = dict(zip(["tx", "ty"], brpt(seg.unit_tangent(t))))
+                a, b = memo(seg, t, lambda: crops(SPTPath(seg), t))
+                sAt = memo(seg, ("length", t), lambda: seg.length(0, t))
+                pts[t] = {**pAt, **tAt, "pathA": a, "pathB": b, "length": sAt}
+            out.append(v)
+    return out
+
+
+def quadratic_records(d):
+    out = []
+    for seg in parse(d):
+        if isinstance(seg, QuadraticBezier):
+            pts = tuple(brpt(im) for im in (seg.start, seg.control, seg.end))
+            v = dict(
+                points=pts,
+                bbox=memo(seg, "bbox", seg.bbox),
+                length=memo(seg, "length", seg.length),
+                d=d,
+                start=pts[0],
+                end=pts[-1],
+            )
 
             pts = v["at"] = {}
             for t in k:
                 assert t >= 0
                 assert t <= 1
-                pAt = dict(zip(["x", "y"], brpt(p.point(t))))
+                pAt = dict(zip(["x", "y"], brpt(seg.point(t))))
+                tAt = dict(zip(["tx", "ty"], brpt(seg.unit_tangent(t))))
+                a, b = memo(seg, t, lambda: crops(SPTPath(seg), t))
+                sAt = memo(seg, ("length", t), lambda: seg.length(0, t))
+                pts[t] = {**pAt, **tAt, "pathA": a, "pathB": b, "length": sAt}
+            out.append(v)
+    return out
+
+
+def arc_key(v):
+    return (v["start"], v["radius"], v["rotation"], v["sweep"], v["large_arc"], v["end"])
+
+
+def arc_records(d):
+    out = []
+    keys = set()
+    for seg in parse(d):
+        if isinstance(seg, Arc):
+            v = dict(d=d)
+
+            v["start"] = tuple(brpt(seg.start))
+            v["end"] = tuple(brpt(seg.end))
+            v["large_arc"] = int(seg.large_arc)
+            v["sweep"] = int(seg.sweep)
+            v["rotation"] = seg.rotation
+            v["radius"] = tuple(brpt(seg.radius))
+            v["center"] = tuple(brpt(seg.center))
+            v["theta"] = tuple(brpt(seg.theta))
+            v["delta"] = tuple(brpt(seg.delta))
+            out.append(v)
+            key = arc_key(v)
+            if key in keys:
+                # the caller reports and drops it
+                continue
+            keys.add(key)
+
+            v["bbox"] = memo(seg, "bbox", seg.bbox)
+            v["length"] = memo(seg, "length", seg.length)
+            v["repr"] = repr(seg)
+            pts = v["at"] = {}
+            for t in k:
+                assert t >= 0
+                assert t <= 1
+                pAt = dict(zip(["x", "y"], brpt(seg.point(t))))
+                tAt = dict(zip(["tx", "ty"], brpt(seg.derivative(t))))
+                a, b = memo(seg, t, lambda: crops(SPTPath(seg), t))
+                sAt = memo(seg, ("length", t), lambda: seg.length(0, t))
+                pts[t] = {**pAt, **tAt, "pathA": a, "pathB": b, "length": sAt}
+    return out
+
+
+def line_records(_d):
+    out = []
+    for seg in parse(_d):
+        if isinstance(seg, Line):
+            v = dict(
+                start=brpt(seg.start),
+                end=brpt(seg.end),
+                bbox=memo(seg, "bbox", seg.bbox),
+                length=memo(seg, "length", seg.length),
+                d=_d,
+            )
+            v["repr"] = repr(seg)
+            pts = v["at"] = {}
+            tAt = 0
+            for t in k:
+                assert t >= 0
+                assert t <= 1
+                pAt = dict(zip(["x", "y"], brpt(seg.point(t))))
                 try:
-                    tAt = dict(zip(["tx", "ty"], brpt(p.unit_tangent(t))))
+                    tAt = dict(zip(["tx", "ty"], brpt(seg.derivative(t))))
                 except AssertionError:
-                    tAt = dict(tx=0, ty=0)
-                    stderr.write(f"AssertionError {t} {p!r}\n")
-                    # break
-                if t < 1 and t > 0:
-                    a = p.cropped(0, t)
-                    b = p.cropped(t, 1)
-                    a = a.d(use_closed_attrib=False, rel=False)
-                    b = b.d(use_closed_attrib=False, rel=False)
-                    a = list(_tokenize_path(a))
-                    b = list(_tokenize_path(b))
-                else:
-                    a = b = 0
+                    break
+                a, b = memo(seg, t, lambda: crops(SPTPath(seg), t))
                 pts[t] = {**pAt, **tAt, "pathA": a, "pathB": b}
+            if tAt == 0:
+                continue
+            out.append(v)
+    return out
 
-        except:
-            stderr.write(f"err on {t} {v} {p}\n")
-            raise
-
-        print(dumps(v))
-
-    stderr.write(f"{i} Paths, {r} Points\n")
-elif DATA.startswith("CubicBezier"):
-
-    r = int(environ.get("POINTS", 10))
-    k = [i / r for i in range(r)] + [1]
-    for i, (p, d) in enumerate(paths(data1, data2)):
-        for seg in p:
-            if isinstance(seg, CubicBezier):
-                pts = tuple(
-                    brpt(im) for im in (seg.start, seg.control1, seg.control2, seg.end)
-                )
-                d = dict(
-                    points=pts,
-                    bbox=seg.bbox(),
-                    length=seg.length(),
-                    d=d,
-                    start=pts[0],
-                    end=pts[-1],
-                )
-
-                pts = d["at"] = {}
-                for t in k:
-                    assert t >= 0
-                    assert t <= 1
-                    pAt = dict(zip(["x", "y"], brpt(seg.point(t))))
-                    # tAt = dict(zip(["tx", "ty"], brpt(seg.derivative(t))))
-                    tAt = dict(zip(["tx", "ty"], brpt(seg.unit_tangent(t))))
-                    if t < 1 and t > 0:
-                        s = SPTPath(seg)
-                        a = s.cropped(0, t)
-                        b = s.cropped(t, 1)
-                        a = a.d(use_closed_attrib=False, rel=False)
-                        b = b.d(use_closed_attrib=False, rel=False)
-                        a = list(_tokenize_path(a))
-                        b = list(_tokenize_path(b))
-                    else:
-                        a = b = 0
-                    pts[t] = {**pAt, **tAt, "pathA": a, "pathB": b}
-
-                print(dumps(d))
-elif DATA.startswith("QuadraticBezier"):
-    r = int(environ.get("POINTS", 10))
-    k = [i / r for i in range(r)] + [1]
-    for i, (p, d) in enumerate(paths(data1)):
-        for seg in p:
-            if isinstance(seg, QuadraticBezier):
-                pts = tuple(brpt(im) for im in (seg.start, seg.control, seg.end))
-                d = dict(
-                    points=pts,
-                    bbox=seg.bbox(),
-                    length=seg.length(),
-                    d=d,
-                    start=pts[0],
-                    end=pts[-1],
-                )
-
-                pts = d["at"] = {}
-                for t in k:
-                    assert t >= 0
-                    assert t <= 1
-                    pAt = dict(zip(["x", "y"], brpt(seg.point(t))))
-                    tAt = dict(zip(["tx", "ty"], brpt(seg.unit_tangent(t))))
-
-                    if t < 1 and t > 0:
-                        s = SPTPath(seg)
-                        a = s.cropped(0, t)
-                        b = s.cropped(t, 1)
-                        a = a.d(use_closed_attrib=False, rel=False)
-                        b = b.d(use_closed_attrib=False, rel=False)
-                        a = list(_tokenize_path(a))
-                        b = list(_tokenize_path(b))
-                    else:
-                        a = b = 0
-                    pts[t] = {**pAt, **tAt, "pathA": a, "pathB": b}
-                print(dumps(d))
-elif DATA.startswith("Arc"):
-    seen = {}
-    dataA1 = [
-        "m 182.94048,133.3363 a 71.059525,34.395832 0 0 1 -57.74432,33.78659 71.059525,34.395832 0 0 1 -79.384695,-21.12465 71.059525,34.395832 0 0 1 27.993926,-41.70331 71.059525,34.395832 0 0 1 89.875769,5.49583"
-    ]
-    r = int(environ.get("POINTS", 10))
-    k = [i / r for i in range(r)] + [1]
-    for i, (p, d) in enumerate(paths(data1, data3, dataA1)):
-        for seg in p:
-            if isinstance(seg, Arc):
-                d = dict(d=d)
-
-                d["start"] = tuple(brpt(seg.start))
-                d["end"] = tuple(brpt(seg.end))
-                d["large_arc"] = int(seg.large_arc)
-                d["sweep"] = int(seg.sweep)
-                d["rotation"] = seg.rotation
-                d["radius"] = tuple(brpt(seg.radius))
-                d["center"] = tuple(brpt(seg.center))
-                d["theta"] = tuple(brpt(seg.theta))
-                d["delta"] = tuple(brpt(seg.delta))
-                key = (
-                    d["start"],
-                    d["radius"],
-                    d["rotation"],
-                    d["sweep"],
-                    d["large_arc"],
-                    d["end"],
-                )
-                if key in seen:
-                    stderr.write(f"Seen: {key}\n")
-                    continue
-                else:
-                    seen[key] = True
 
-                d["bbox"] = seg.bbox()
-                d["length"] = seg.length()
-                d["repr"] = repr(seg)
-                pts = d["at"] = {}
-                for t in k:
-                    assert t >= 0
-                    assert t <= 1
-                    pAt = dict(zip(["x", "y"], brpt(seg.point(t))))
-                    tAt = dict(zip(["tx", "ty"], brpt(seg.derivative(t))))
-                    # pts[t] = {**pAt, **tAt}
-                    if t < 1 and t > 0:
-                        s = SPTPath(seg)
-                        a = s.cropped(0, t)
-                        b = s.cropped(t, 1)
-                        a = a.d(use_closed_attrib=False, rel=False)
-                        b = b.d(use_closed_attrib=False, rel=False)
-                        a = list(_tokenize_path(a))
-                        b = list(_tokenize_path(b))
-                    else:
-                        a = b = 0
-                    pts[t] = {**pAt, **tAt, "pathA": a, "pathB": b}
-
-                print(dumps(d))
-elif DATA.startswith("Line"):
-    r = int(environ.get("POINTS", 10))
-    k = [i / r for i in range(r)] + [1]
-    for i, (p, _d) in enumerate(paths(data1)):
-        for seg in p:
-            if isinstance(seg, Line):
-                d = dict(
-                    start=brpt(seg.start),
-                    end=brpt(seg.end),
-                    bbox=seg.bbox(),
-                    length=seg.length(),
-                    d=_d,
-                )
-                d["repr"] = repr(seg)
-                pts = d["at"] = {}
-                tAt = 0
-                for t in k:
-                    assert t >= 0
-                    assert t <= 1
-                    pAt = dict(zip(["x", "y"], brpt(seg.point(t))))
-                    try:
-                        tAt = dict(zip(["tx", "ty"], brpt(seg.derivative(t))))
-                    except AssertionError:
-                        break
-
-                    if t < 1 and t > 0:
-                        s = SPTPath(seg)
-                        a = s.cropped(0, t)
-                        b = s.cropped(t, 1)
-                        a = a.d(use_closed_attrib=False, rel=False)
-                        b = b.d(use_closed_attrib=False, rel=False)
-                        a = list(_tokenize_path(a))
-                        b = list(_tokenize_path(b))
-                    else:
-                        a = b = 0
-
-                    pts[t] = {**pAt, **tAt, "pathA": a, "pathB": b}
-                if tAt == 0:
-                    continue
-                print(dumps(d))
-    stderr.write(f"{i} Items\n")
-elif DATA.startswith("Parsed"):
-    from sys import path
-    from os.path import exists
+def parsed_record(d):
     from svgelements import Path as PathSE
+    from inkex import Path as PathIX
 
-    d = "/usr/share/inkscape/extensions"
-    exists(d) and path.append(d)
-    from inkex import Path as PathIX, Line
-    from inkex.paths import PathCommand
-
-    PathCommand.number_template = "{}"
-
-    skip = 0
-
-    for i, (p, d) in enumerate(paths(data1, data2, data3, parser=PathIX)):
-        # p = PathSE(d)
-        # D = p.d()
-        D = str(p.to_non_shorthand())
-        if "A" in D:
-            p = PathSE(d)
-            rel = p.d(relative=True, smooth=False)
-            abs = p.d(relative=False, smooth=False)
-            # p = parse_path(d)
-            # rel = p.d(use_closed_attrib=False, rel=True)
-            # abs = p.d(use_closed_attrib=False, rel=False)
-        else:
-            abs = str(p.to_non_shorthand())
-            rel = str(p.to_non_shorthand().to_relative())
-        abs = list(_tokenize_path(abs))
-        rel = list(_tokenize_path(rel))
-        rev = list(
-            _tokenize_path(SPTPath(d).reversed().d(use_closed_attrib=False, rel=False))
-        )
-        revr = list(
-            _tokenize_path(SPTPath(d).reversed().d(use_closed_attrib=False, rel=True))
-        )
-        # if "Q" in D:
-        #     skip += 1
-        #     continue
-        # if "A" in D:
-        #     skip += 1
-        #     continue
-        d = dict(
-            abs=abs,
-            rel=rel,
-            rev=rev,
-            revr=revr,
-            d=d,
-            D=D,
-        )
-        print(dumps(d))
-    stderr.write(f"{i-skip} Items\n")
-    skip and stderr.write(f"{skip} Skipped\n")
-elif DATA.startswith("SEPaths"):
+    p = PathIX(d)
+    D = str(p.to_non_shorthand())
+    if "A" in D:
+        p = PathSE(d)
+        rel = p.d(relative=True, smooth=False)
+        abs = p.d(relative=False, smooth=False)
+    else:
+        abs = str(p.to_non_shorthand())
+        rel = str(p.to_non_shorthand().to_relative())
+    abs = list(_tokenize_path(abs))
+    rel = list(_tokenize_path(rel))
+    rev = list(
+        _tokenize_path(SPTPath(d).reversed().d(use_closed_attrib=False, rel=False))
+    )
+    revr = list(
+        _tokenize_path(SPTPath(d).reversed().d(use_closed_attrib=False, rel=True))
+    )
+    return dict(
+        abs=abs,
+        rel=rel,
+        rev=rev,
+        revr=revr,
+        d=d,
+        D=D,
+    )
+
+
+def sepaths_record(d):
     from svgelements import Path
 
-    skip = 0
+    p = Path(d)
+    rel = p.d(relative=True, smooth=False)
+    abs = p.d(relative=False, smooth=False)
+    abs = list(_tokenize_path(abs))
+    rel = list(_tokenize_path(rel))
+    return dict(
+        abs=abs,
+        rel=rel,
+        d=d,
+        D=p.d(),
+    )
 
-    for i, (p, d) in enumerate(paths(data1, data2, data3, parser=Path)):
-        # p = PathSE(d)
-        rel = p.d(relative=True, smooth=False)
-        abs = p.d(relative=False, smooth=False)
-        # rev = p.reversed()
-        # rel = p.d(use_closed_attrib=False, rel=True)
-        # abs = p.d(use_closed_attrib=False, rel=False)
-        abs = list(_tokenize_path(abs))
-        rel = list(_tokenize_path(rel))
-        # if "Q" in D:
-        #     skip += 1
-        #     continue
-        # if "A" in D:
-        #     skip += 1
-        #     continue
-        d = dict(
-            abs=abs,
-            rel=rel,
-            d=d,
-            D=p.d(),
-        )
-        print(dumps(d))
-    stderr.write(f"{i-skip} Items\n")
-    skip and stderr.write(f"{skip} Skipped\n")
-elif DATA.startswith("transforms"):
+
+def transform_chunk(item):
     from svgelements import Path, Matrix
 
-    ARCS = environ.get("ARCS")
-    SCALE = environ.get("SCALE")
-    CI = environ.get("CI")
+    i, d, ms = item
+    p = Path(d)
+    out = []
+    for s in ms:
+        pT = p * Matrix(s)
+        dT = pT.d(relative=False, smooth=None)
+        out.append([s, list(_tokenize_path(dT))])
+    return i, d, out
+
+
+def affine_chunk(item):
+    # TRANSFORM_ENGINE=numpy: one matmul per path instead of one Path per matrix
+    from oracle_affine import Compiled, reference, compare
+    from random import Random
+
+    i, d, ms = item
+    try:
+        c = Compiled(d)
+    except (ValueError, TypeError) as ex:
+        stderr.write(f"Fallback {d!r}: {ex}\n")
+        return transform_chunk(item)
+    out = [[s, t] for s, t in zip(ms, c.apply(STACK[[STACK_INDEX[s] for s in ms]]))]
+    if VERIFY > 0:
+        for s, t in Random(f"{SEED}:{i}:{ms[0]}").sample(out, min(VERIFY, len(out))):
+            e = compare(t, reference(d, s))
+            if e:
+                raise AssertionError(f"{d!r} * {s!r}: {e}")
+    return i, d, out
+
+
+class Synthetic:
+    """Reproducible random path data for DATA=synthetic.
+
+    ``mix`` weights the segment kinds, e.g. "line:cubic" or "line=3:arc=1";
+    ``degen`` is the chance that a segment is degenerate: zero length,
+    coincident control points, a zero radius arc, or a jump to huge or
+    tiny magnitudes.  Arcs never end where they start (svgpathtools
+    rejects those); they get a zero radius instead.
+    """
+
+    KINDS = ("line", "cubic", "quad", "arc")
+
+    def __init__(self, seed=0, segs=1000, mix="line:cubic:quad:arc", degen=0.05):
+        from random import Random
+
+        self.rnd = Random(seed)
+        self.segs = segs
+        self.degen = degen
+        kinds, weights = [], []
+        for item in mix.split(":"):
+            name, _, w = item.partition("=")
+            if name not in self.KINDS:
+                raise ValueError(f"Unexpected MIX kind {name!r}")
+            kinds.append(name)
+            weights.append(float(w or 1))
+        self.kinds, self.weights = kinds, weights
+
+    def num(self, v):
+        # vary the spelling the parsers have to cope with
+        rnd = self.rnd
+        x = rnd.random()
+        if x < 0.1:
+            return f"{v:.6E}"
+        elif x < 0.2 and v == int(v) and abs(v) < 1e15:
+            return str(int(v))
+        elif x < 0.3 and -1 < v < 1:
+            return f"{v:.4f}".replace("0.", ".", 1)
+        return repr(round(v, rnd.choice((0, 2, 3, 6, 12))))
+
+    def pt(self, x, y):
+        return f"{self.num(x)},{self.num(y)}"
+
+    def path(self):
+        rnd = self.rnd
+        out = []
+        cx, cy = rnd.uniform(0, 1000), rnd.uniform(0, 1000)
+        sx, sy = cx, cy
+        out.append(f"M{self.pt(cx, cy)}")
+        for kind in rnd.choices(self.kinds, self.weights, k=self.segs):
+            degen = rnd.random() < self.degen
+            if rnd.random() < 0.02:
+                # new subpath, closing the last one now and then
+                if rnd.random() < 0.5:
+                    out.append("Z")
+                    cx, cy = sx, sy
+                cx, cy = sx, sy = rnd.uniform(0, 1000), rnd.uniform(0, 1000)
+                out.append(f"M{self.pt(cx, cy)}")
+            ex, ey = cx + rnd.uniform(-100, 100), cy + rnd.uniform(-100, 100)
+            if degen:
+                how = rnd.random()
+                if how < 0.3:
+                    ex, ey = cx, cy
+                elif how < 0.4:
+                    m = rnd.choice((3.4e38, 1e30, 1e-30, 3.4e-38))
+                    ex, ey = rnd.choice((-m, m)), rnd.choice((-m, m))
+            rel = rnd.random() < 0.5
+            ox, oy = (cx, cy) if rel else (0, 0)
+
+            def P(x, y):
+                return self.pt(x - ox, y - oy)
+
+            if kind == "line":
+                if rnd.random() < 0.2:
+                    out.append(f"{'h' if rel else 'H'}{self.num(ex - ox)}")
+                    ey = cy
+                elif rnd.random() < 0.2:
+                    out.append(f"{'v' if rel else 'V'}{self.num(ey - oy)}")
+                    ex = cx
+                else:
+                    out.append(f"{'l' if rel else 'L'}{P(ex, ey)}")
+            elif kind == "cubic":
+                c1 = cx + rnd.uniform(-100, 100), cy + rnd.uniform(-100, 100)
+                c2 = ex + rnd.uniform(-100, 100), ey + rnd.uniform(-100, 100)
+                if degen:
+                    c1, c2 = rnd.choice(((cx, cy), c2)), rnd.choice(((ex, ey), c1, c2))
+                if rnd.random() < 0.2:
+                    out.append(f"{'s' if rel else 'S'}{P(*c2)} {P(ex, ey)}")
+                else:
+                    out.append(f"{'c' if rel else 'C'}{P(*c1)} {P(*c2)} {P(ex, ey)}")
+            elif kind == "quad":
+                c = cx + rnd.uniform(-100, 100), cy + rnd.uniform(-100, 100)
+                if degen:
+                    c = rnd.choice(((cx, cy), (ex, ey)))
+                if rnd.random() < 0.2:
+                    out.append(f"{'t' if rel else 'T'}{P(ex, ey)}")
+                else:
+                    out.append(f"{'q' if rel else 'Q'}{P(*c)} {P(ex, ey)}")
+            else:
+                rx, ry = rnd.uniform(1, 200), rnd.uniform(1, 200)
+                if degen or (ex, ey) == (cx, cy):
+                    rx, ry = rnd.choice(((0, ry), (rx, 0)))
+                rot = rnd.choice((0, rnd.uniform(-360, 360)))
+                flags = f"{rnd.randint(0, 1)},{rnd.randint(0, 1)}"
+                out.append(f"{'a' if rel else 'A'}{self.num(rx)},{self.num(ry)} {self.num(rot)} {flags} {P(ex, ey)}")
+            cx, cy = ex, ey
+        return " ".join(out)
+
+
+def synthetic_record(item):
+    # reference answers only for the REFS asked, computed as the stream is read
+    i, d, refs = item
+    v = dict(i=i, d=d)
+    errors = {}
+    p = None
+    try:
+        p = parse_path(d)
+        v["segments"] = len(p)
+    except Exception as ex:
+        errors["parse"] = f"{type(ex).__name__}: {ex}"
+    for name in refs if p is not None else ():
+        try:
+            if name == "length":
+                v["length"] = p.length()
+            elif name == "bbox":
+                v["bbox"] = p.bbox()
+            elif name == "end":
+                v["end"] = brpt(p[-1].end)
+            elif name == "points":
+                v["at"] = {t: brpt(p.point(t)) for t in k}
+            else:
+                raise ValueError(f"Unexpected REFS item {name!r}")
+        except (ValueError, AssertionError, RuntimeError, ZeroDivisionError, OverflowError) as ex:
+            errors[name] = f"{type(ex).__name__}: {ex}"
+    if errors:
+        v["errors"] = errors
+    return v
 
-    ts = [100, 0, -100]
-    ss = [-2, -1, 1, 2]
-    if CI:
-        rs = set(
-            [*map(lambda v: -v, range(0, 370, 15)), *range(0, 370, 15)]
-        )  ## -360 ... 0 ... 360
-    else:
-        rs = [0, -30, 60, -90, 120, -150, 180, -210, 240, -270, 300, -330, 360]
 
-    datas = [data1, data2, data3]
-    skip = 0
-    c_transforms = 0
+def chunked(seq, n):
+    for j in range(0, len(seq), n):
+        yield seq[j : j + n]
 
-    if SCALE == "no":
 
-        def matrixes():
-            for tx in ts:
-                for ty in ts:
-                    for r in rs:
-                        yield f"translate({tx},{ty})rotate({r})"
+# DATA=all runs these in one pass, each record tagged
+ALL = [("Path", ""), ("CubicBezier", "CubicBezier"), ("QuadraticBezier", "QuadraticBezier"), ("Arc", "Arc"), ("Line", "Line")]
 
-    elif SCALE == "equal":
 
-        def matrixes():
-            for tx in ts:
-                for ty in ts:
-                    for s in ss:
+def timed(mode, records):
+    """Yield ``records``, then write a JSON line of how many and the ms spent making them to stderr.
+
+    The fields are named as in a svggeom Probe snapshot (calls, ms), so the two can be compared.
+    """
+    from json import dumps
+    from time import perf_counter
+
+    it = iter(records)
+    n, ms = 0, 0.0
+    while True:
+        t0 = perf_counter()
+        try:
+            v = next(it)
+        except StopIteration:
+            break
+        finally:
+            ms += (perf_counter() - t0) * 1e3
+        n += 1
+        yield v
+    stderr.write(dumps(dict(op=mode, calls=n, ms=ms)) + "\n")
+
+
+def generate(env=environ):
+    """Yield the records of the mode selected by ``env["DATA"]``."""
+    global k, STACK, STACK_INDEX, VERIFY, SEED, MEMO, PARSED
+    DATA = env.get("DATA") or env.get("SEGMENTS")
+    if not DATA:
+        r = int(env.get("PATH_POINTS", 0)) or int(env.get("POINTS", 0)) or 10
+
+        k = [i / r for i in range(r)] + [1]
+
+        i = -1
+        for i, v in enumerate(run(path_record, unique(data1))):
+            yield v
+
+        stderr.write(f"{i} Paths, {r} Points\n")
+    elif DATA == "all":
+        MEMO, PARSED = {}, {}
+        try:
+            for tag, mode in ALL:
+                records = generate({**env, "DATA": mode, "SEGMENTS": mode})
+                if env.get("TIMINGS"):
+                    records = timed(tag, records)
+                for v in records:
+                    yield dict(tag=tag, record=v)
+            n = sum(len(e) for e in MEMO.values())
+            stderr.write(f"{len(PARSED)} Parsed, {len(MEMO)} Segments, {n} Memoized\n")
+        finally:
+            MEMO = PARSED = None
+    elif DATA.startswith("synthetic"):
+        syn = Synthetic(
+            seed=int(env.get("SEED", 0) or 0),
+            segs=int(env.get("SEGS", 1000)),
+            mix=env.get("MIX") or "line:cubic:quad:arc",
+            degen=float(env.get("DEGEN", 0.05)),
+        )
+        refs = [v for v in (env.get("REFS") or "length,bbox,end").split(",") if v and v != "none"]
+        r = int(env.get("POINTS", 10))
+        k = [i / r for i in range(r)] + [1]
+        N = int(env.get("N", 10))
+        c_segs = 0
+        # paths are drawn here, in order, so JOBS does not change them
+        for v in run(synthetic_record, ((i, syn.path(), refs) for i in range(N))):
+            c_segs += v.get("segments", 0)
+            yield v
+        stderr.write(f"{N} Paths, {c_segs} Segments\n")
+    elif DATA.startswith("CubicBezier"):
+        r = int(env.get("POINTS", 10))
+        k = [i / r for i in range(r)] + [1]
+        for out in run(cubic_records, unique(data1, data2)):
+            for v in out:
+                yield v
+    elif DATA.startswith("QuadraticBezier"):
+        r = int(env.get("POINTS", 10))
+        k = [i / r for i in range(r)] + [1]
+        for out in run(quadratic_records, unique(data1)):
+            for v in out:
+                yield v
+    elif DATA.startswith("Arc"):
+        seen = {}
+        dataA1 = [
+            "m 182.94048,133.3363 a 71.059525,34.395832 0 0 1 -57.74432,33.78659 71.059525,34.395832 0 0 1 -79.384695,-21.12465 71.059525,34.395832 0 0 1 27.993926,-41.70331 71.059525,34.395832 0 0 1 89.875769,5.49583"
+        ]
+        r = int(env.get("POINTS", 10))
+        k = [i / r for i in range(r)] + [1]
+        for out in run(arc_records, unique(data1, data3, dataA1)):
+            for v in out:
+                key = arc_key(v)
+                if key in seen:
+                    stderr.write(f"Seen: {key}\n")
+                    continue
+                else:
+                    seen[key] = True
+                yield v
+    elif DATA.startswith("Line"):
+        r = int(env.get("POINTS", 10))
+        k = [i / r for i in range(r)] + [1]
+        i = -1
+        for i, out in enumerate(run(line_records, unique(data1))):
+            for v in out:
+                yield v
+        stderr.write(f"{i} Items\n")
+    elif DATA.startswith("Parsed"):
+        from sys import path
+        from os.path import exists
+
+        d = "/usr/share/inkscape/extensions"
+        exists(d) and path.append(d)
+        from inkex.paths import PathCommand
+
+        PathCommand.number_template = "{}"
+
+        skip = 0
+        i = -1
+        for i, v in enumerate(run(parsed_record, unique(data1, data2, data3))):
+            yield v
+        stderr.write(f"{i-skip} Items\n")
+        skip and stderr.write(f"{skip} Skipped\n")
+    elif DATA.startswith("SEPaths"):
+        skip = 0
+        i = -1
+        for i, v in enumerate(run(sepaths_record, unique(data1, data2, data3))):
+            yield v
+        stderr.write(f"{i-skip} Items\n")
+        skip and stderr.write(f"{skip} Skipped\n")
+    elif DATA.startswith("transforms"):
+        from svgelements import Path
+
+        ARCS = env.get("ARCS")
+        SCALE = env.get("SCALE")
+        CI = env.get("CI")
+
+        ts = [100, 0, -100]
+        ss = [-2, -1, 1, 2]
+        if CI:
+            rs = set(
+                [*map(lambda v: -v, range(0, 370, 15)), *range(0, 370, 15)]
+            )  ## -360 ... 0 ... 360
+        else:
+            rs = [0, -30, 60, -90, 120, -150, 180, -210, 240, -270, 300, -330, 360]
+
+        datas = [data1, data2, data3]
+        skip = 0
+        c_transforms = 0
+
+        if SCALE == "no":
+
+            def matrixes():
+                for tx in ts:
+                    for ty in ts:
                         for r in rs:
-                            yield f"translate({tx},{ty})rotate({r})scale({s},{s})"
+                            yield f"translate({tx},{ty})rotate({r})"
 
-    else:
+        elif SCALE == "equal":
 
-        def matrixes():
-            for tx in ts:
-                for ty in ts:
-                    for sx in ss:
-                        for sy in ss:
+            def matrixes():
+                for tx in ts:
+                    for ty in ts:
+                        for s in ss:
                             for r in rs:
-                                yield f"translate({tx},{ty})rotate({r})scale({sx},{sy})"
+                                yield f"translate({tx},{ty})rotate({r})scale({s},{s})"
+
+        else:
 
-    _paths = paths(*datas, parser=Path)
+            def matrixes():
+                for tx in ts:
+                    for ty in ts:
+                        for sx in ss:
+                            for sy in ss:
+                                for r in rs:
+                                    yield f"translate({tx},{ty})rotate({r})scale({sx},{sy})"
 
-    if ARCS == "no":
+        _paths = unique(*datas)
 
-        def fn(v):
-            p, d = v
-            return "A" not in d and "a" not in d
+        if ARCS == "no":
 
-        _paths = filter(fn, _paths)
-    elif ARCS == "only":
+            def fn(d):
+                return "A" not in d and "a" not in d
 
-        def fn(v):
-            p, d = v
-            return "A" in d or "a" in d
+            _paths = filter(fn, _paths)
+        elif ARCS == "only":
 
-        _paths = filter(fn, _paths)
+            def fn(d):
+                return "A" in d or "a" in d
 
-    for i, (p, d) in enumerate(_paths):
-        d_ = p.d(relative=False)
-        # print(d_, list(_tokenize_path(d_)))
-        j = dict(d=d)
-        j["abs"] = list(_tokenize_path(d_))
-        transforms = j["transforms"] = []
-        for s in matrixes():
-            m = Matrix(s)
-            pT = p * Matrix(s)
-            dT = pT.d(relative=False, smooth=None)
-            transforms.append([s, list(_tokenize_path(dT))])
-            c_transforms += 1
+            _paths = filter(fn, _paths)
 
-        print(dumps(j))
+        ms = list(matrixes())
+        ENGINE = env.get("TRANSFORM_ENGINE", "svgelements")
+        VERIFY = int(env.get("VERIFY", 0) or 0)
+        SEED = env.get("SEED", "0")
+        if ENGINE == "numpy":
+            from oracle_affine import matrix_stack
 
-    stderr.write(f"{i-skip} Path\n")
-    skip and stderr.write(f"{skip} Skipped\n")
-    stderr.write(f"{c_transforms} Transfroms\n")
+            STACK = matrix_stack(ms)
+            STACK_INDEX = {s: j for j, s in enumerate(ms)}
+            chunk_fn = affine_chunk
+        elif ENGINE == "svgelements":
+            chunk_fn = transform_chunk
+        else:
+            raise ValueError(f"Unexpected TRANSFORM_ENGINE={ENGINE!r}")
+        # path x matrix work units, big enough to amortize the parse in the worker
+        CHUNK = int(env.get("CHUNK", 0) or 0) or max(1, len(ms) // max(JOBS, 1))
+
+        def units():
+            for i, d in enumerate(_paths):
+                for c in chunked(ms, CHUNK):
+                    yield i, d, c
+
+        def emit(d, transforms):
+            d_ = Path(d).d(relative=False)
+            j = dict(d=d)
+            j["abs"] = list(_tokenize_path(d_))
+            j["transforms"] = transforms
+            return j
+
+        i = -1
+        cur = None
+        for i, d, out in run(chunk_fn, units()):
+            if cur and cur[0] != i:
+                yield emit(*cur[1:])
+                cur = None
+            if cur is None:
+                cur = [i, d, []]
+            cur[2].extend(out)
+            c_transforms += len(out)
+        if cur:
+            yield emit(*cur[1:])
+
+        stderr.write(f"{i-skip} Path\n")
+        skip and stderr.write(f"{skip} Skipped\n")
+        stderr.write(f"{c_transforms} Transfroms\n")
+
+
+if __name__ == "__main__":
+    from oracle_binary import writer
+
+    write = writer(environ.get("ORACLE_FORMAT"))
+    records = generate(environ)
+    # TIMINGS=1: per mode timings on stderr, as JSON lines (runs replayed from ORACLE_CACHE have none)
+    mode = environ.get("DATA") or environ.get("SEGMENTS") or "Path"
+    if environ.get("TIMINGS") and mode != "all":
+        records = timed(mode, records)
+    for v in records:
+        write(v)
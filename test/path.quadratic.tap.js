@@ -5,7 +5,7 @@ import { SegmentLS } from 'svggeom';
 // import { Quadratic } from '../dist/path/segment/pathse.js';
 import test from 'tap';
 const CI = !!process.env.CI;
-const deltp = { len_epsilon: 0.05 };
+const deltp = { len_epsilon: 1e-9 };
 
 for await (const item of enum_path_data({ SEGMENTS: 'QuadraticBezier' })) {
     // test.test(item.d, { bail: !CI }, function (t) {
@@ -24,6 +24,10 @@ for await (const item of enum_path_data({ SEGMENTS: 'QuadraticBezier' })) {
             testSegment(t, cur, item, deltp);
             const cur2 = SegmentLS.moveTo(sx, sy).quadraticCurveTo(x1, y1, ex, ey);
             t.same(cur.toString(), cur2.toString());
+            for (const [k, { length }] of Object.entries(item.at)) {
+                t.almostEqual(cur.length_at(parseFloat(k)), length, deltp.len_epsilon, `length_at(${k})`, [item]);
+                t.almostEqual(cur.t_at_length(length), parseFloat(k), 1e-9, `t_at_length(${length})`, [item]);
+            }
         }
         // if (CI)
         {
@@ -0,0 +1,137 @@
+'uses strict';
+import test from 'tap';
+import { PathLC, SegmentTree, Ray } from 'svggeom';
+import { enum_path_data } from './path.utils.js';
+import './utils.js';
+const CI = !!process.env.CI;
+
+const paths = [];
+for await (const { d } of enum_path_data({ DATA: 'synthetic', N: '12', SEGS: '30', DEGEN: '0' })) {
+    paths.push(PathLC.parse(d));
+}
+const segs = paths.flatMap(p => {
+    const out = [];
+    for (let cur = p._tail; cur; cur = cur._prev) {
+        cur._prev && cur.constructor.name != 'MoveLC' && out.push(cur);
+    }
+    return out;
+});
+let seed = 7;
+function random() {
+    seed = (seed * 16807) % 2147483647;
+    return seed / 2147483647;
+}
+// the farthest apart two samples of a segment can be
+const step = Math.max(...segs.map(seg => seg.length)) / 200;
+const points = Array.from({ length: 60 }, () => [random() * 1000 - 100, random() * 1000 - 100]);
+
+function box_has([x, y], seg) {
+    const [[x0, x1], [y0, y1]] = seg.bbox();
+    return x0 <= x && x <= x1 && y0 <= y && y <= y1;
+}
+
+function sampled_nearest([x, y], list) {
+    let best = Infinity;
+    for (const seg of list) {
+        for (let i = 0; i <= 200; ++i) {
+            const [px, py] = seg.point_at(i / 200);
+            best = Math.min(best, Math.hypot(px - x, py - y));
+        }
+    }
+    return best;
+}
+
+test.test(`queries`, { bail: !CI }, function (t) {
+    const tree = SegmentTree.from_paths(paths);
+    t.equal(tree.size, segs.length);
+    t.ok(tree.depth <= Math.ceil(Math.log2(segs.length)) + 1, `depth ${tree.depth}`);
+    for (const p of points) {
+        t.same(
+            tree.at_point(p).map(e => e.seg).sort(),
+            segs.filter(seg => box_has(p, seg)).sort(),
+            `at_point ${p}`
+        );
+        const hit = tree.nearest(p);
+        const far = sampled_nearest(p, segs);
+        t.ok(hit.distance <= far + 1e-9, `nearest ${p} ${hit.distance} ${far}`);
+        t.ok(far - hit.distance <= step, `close to the sampled ${p}`);
+        const q = hit.seg.point_at(hit.t);
+        t.ok(Math.hypot(q[0] - hit.point[0], q[1] - hit.point[1]) < 1e-9, 'on the segment');
+        t.ok(paths.includes(hit.owner), 'owner');
+        t.equal(tree.nearest(p, hit.distance / 2), undefined, 'max_distance');
+    }
+    t.equal(tree.timings.queries, points.length * 3);
+    t.end();
+});
+
+test.test(`ray_cast`, { bail: !CI }, function (t) {
+    const tree = SegmentTree.from_paths([PathLC.parse('M0,0H10V10H0Z'), PathLC.parse('M20,5A5,5,0,1,1,30,5A5,5,0,1,1,20,5')]);
+    // the circle is met where its two arcs join, once for each
+    t.same(
+        tree.ray_cast(Ray.pos([-5, 5])).map(h => [h.distance, h.point[0], h.point[1]]),
+        [
+            [5, 0, 5],
+            [15, 10, 5],
+            [25, 20, 5],
+            [25, 20, 5],
+            [35, 30, 5],
+            [35, 30, 5],
+        ]
+    );
+    t.same(tree.ray_cast(Ray.pos([-5, 5]), 20).length, 2, 'max_distance');
+    t.same(tree.ray_cast(Ray.pos([-5, 5]).with_dir(Math.PI)).length, 0, 'behind');
+    t.throws(() => tree.ray_cast(Ray.pos([-5, 5]).with_dir([0, 0])), TypeError, 'no direction');
+    const down = tree.ray_cast(Ray.pos([25, -10]).with_dir(Math.PI / 2));
+    t.same(
+        down.map(h => h.point.slice(0, 2).map(v => +v.toFixed(9))),
+        [
+            [25, 0],
+            [25, 10],
+        ]
+    );
+    for (const p of points) {
+        const ray = Ray.pos(p).with_dir(random() * 2 * Math.PI);
+        const [h, v] = ray.dir;
+        for (const hit of SegmentTree.from_paths(paths).ray_cast(ray)) {
+            const [x, y] = hit.point;
+            t.ok(Math.abs(h * (y - p[1]) - v * (x - p[0])) < 1e-6, 'on the ray');
+        }
+    }
+    t.end();
+});
+
+test.test(`insert remove pairs`, { bail: !CI }, function (t) {
+    const tree = new SegmentTree();
+    const ids = paths.flatMap(p => tree.insert_path(p, p));
+    t.equal(tree.size, segs.length);
+    for (let i = 0; i < ids.length; i += 2) {
+        t.ok(tree.remove(ids[i]));
+    }
+    t.notOk(tree.remove(ids[0]), 'removed already');
+    const kept = [...tree.entries()].map(e => e.seg);
+    t.equal(kept.length, ids.length >> 1);
+    const brute = [];
+    for (let i = 0; i < kept.length; ++i) {
+        for (let j = i + 1; j < kept.length; ++j) {
+            const [a, b] = [kept[i], kept[j]];
+            if (a._prev === b || b._prev === a) continue;
+            const [[ax0, ax1], [ay0, ay1]] = a.bbox();
+            const [[bx0, bx1], [by0, by1]] = b.bbox();
+            ax0 <= bx1 && bx0 <= ax1 && ay0 <= by1 && by0 <= ay1 && brute.push([a, b]);
+        }
+    }
+    const key = ([a, b]) => [kept.indexOf(a), kept.indexOf(b)].sort((x, y) => x - y).join();
+    const pairs = tree.pairs().map(([e, f]) => [e.seg, f.seg]);
+    t.same(pairs.map(key).sort(), brute.map(key).sort(), 'pairs');
+    for (const p of points) {
+        t.same(tree.at_point(p).map(e => e.seg).sort(), kept.filter(seg => box_has(p, seg)).sort());
+    }
+    const near = points.map(p => tree.nearest(p).distance);
+    tree.rebuild();
+    t.same(points.map(p => tree.nearest(p).distance), near, 'rebuild');
+    t.same(tree.pairs().map(([e, f]) => [e.seg, f.seg]).map(key).sort(), brute.map(key).sort(), 'pairs after rebuild');
+    const other = SegmentTree.from_paths(paths.slice(0, 3));
+    t.ok(tree.pairs(other).every(([e, f]) => kept.includes(e.seg) && paths.slice(0, 3).includes(f.owner)), 'pairs of two trees');
+    t.ok(tree.timings.insert >= 0 && tree.timings.remove >= 0 && tree.timings.build >= 0);
+    t.end();
+});
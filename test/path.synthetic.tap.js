@@ -0,0 +1,19 @@
+'uses strict';
+import test from 'tap';
+import { PathLC } from 'svggeom';
+import { enum_path_data } from './path.utils.js';
+import './utils.js';
+const CI = !!process.env.CI;
+
+for await (const item of enum_path_data({ DATA: 'synthetic', N: '4', SEGS: '200', MIX: 'line=2:cubic:quad:arc', DEGEN: '0' })) {
+    const { i, d } = item;
+    test.test(`synthetic #${i}`, { bail: !CI }, function (t) {
+        t.notOk(item.errors, 'oracle errors');
+        const p = PathLC.parse(d);
+        t.almostEqual(p.length, item.length, 1e-3 * item.length, 'length');
+        t.sameBox(p.bbox(), item.bbox, 1e-3);
+        t.almostEqual(p.to.x, item.end[0], 1e-9);
+        t.almostEqual(p.to.y, item.end[1], 1e-9);
+        t.end();
+    });
+}
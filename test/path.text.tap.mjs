@@ -0,0 +1,128 @@
+'uses strict';
+import test from 'tap';
+import { PathLC, GlyphCache, loadFontBuffer, parseFont } from 'svggeom';
+import { FixtureFont } from './font.fixture.js';
+import './utils.js';
+const CI = !!process.env.CI;
+
+// opentype.js is only needed for a real font, the fixture stands in without it
+const opentype = await import('opentype.js').then(
+    mod => mod.default ?? mod,
+    () => undefined
+);
+const FILE = 'test/CaviarDreams.ttf';
+const FONTS = [new FixtureFont(), ...(opentype ? [opentype.loadSync(FILE)] : [])];
+const TEXTS = ['Hello, World!', 'AVATAR WAVE', 'SoVA oS', 'Tj fi ffl 0123', ''];
+const OPTIONS = [{}, { kerning: false }, { letterSpacing: 0.1 }, { tracking: 50 }, { kerning: true, tracking: -20 }];
+
+// as PathLC.text drew before the cache
+function direct(par, s, at) {
+    const p = at ? PathLC.move_to(at) : new PathLC(undefined);
+    const [x, y] = at ?? [0, 0];
+    const { font, fontSize = 72, kerning, letterSpacing, tracking } = par;
+    font.getPath(s, x, y, fontSize, { kerning, letterSpacing, tracking }).draw(p);
+    return p.describe();
+}
+
+test.test(`same as getPath`, { bail: !CI }, function (t) {
+    for (const font of FONTS) {
+        same_as_getpath(t, font);
+    }
+    t.end();
+});
+
+function same_as_getpath(t, font) {
+    for (const opt of OPTIONS) {
+        for (const s of TEXTS) {
+            for (const fontSize of [72, 13.5]) {
+                const par = { font, fontSize, ...opt };
+                t.equal(new PathLC(undefined).text(par, s).describe(), direct(par, s), `${s} ${JSON.stringify(opt)}`);
+                t.equal(PathLC.move_to([3, 4]).text(par, s).describe(), direct(par, s, [3, 4]), `at ${s}`);
+            }
+        }
+    }
+    const par = { font, fontSize: 24 };
+    const labels = TEXTS.map((s, i) => [s, i * 10, i * 30]);
+    t.same(
+        PathLC.texts(par, labels).map(p => p.describe()),
+        labels.map(([s, x, y]) => {
+            const p = new PathLC(undefined);
+            font.getPath(s, x, y, 24, {}).draw(p);
+            return p.describe();
+        })
+    );
+}
+
+test.test(`hits`, { bail: !CI }, function (t) {
+    for (const font of FONTS) {
+        const cache = GlyphCache.of(font);
+        t.equal(GlyphCache.of(font), cache);
+        cache.clear();
+        new PathLC(undefined).text({ font, fontSize: 10 }, 'AoAo');
+        t.equal(cache.misses, 2);
+        t.equal(cache.hits, 2);
+        t.equal(cache.size, 2);
+        new PathLC(undefined).text({ font, fontSize: 30 }, 'oA');
+        t.equal(cache.misses, 2);
+        t.equal(cache.hits, 4);
+    }
+    t.end();
+});
+
+test.test(`limit`, { bail: !CI }, function (t) {
+    for (const font of FONTS) {
+        const cache = new GlyphCache(font, 3);
+        const glyph = c => font.charToGlyph(c);
+        for (const c of 'AVo') cache.outline(glyph(c));
+        cache.outline(glyph('A'));
+        cache.outline(glyph('S'));
+        t.equal(cache.size, 3);
+        t.equal(cache.misses, 4);
+        // V went, A was used since
+        cache.outline(glyph('A'));
+        t.equal(cache.hits, 2);
+        cache.outline(glyph('V'));
+        t.equal(cache.misses, 5);
+        t.equal(cache.size, 3);
+    }
+    t.end();
+});
+
+test.test(`outline`, { bail: !CI }, function (t) {
+    const font = new FixtureFont();
+    const { path, units } = new GlyphCache(font).outline(font.charToGlyph('S'));
+    t.equal(units, 1000);
+    t.equal(path.describe(), 'M500,600C400,750,50,700,80,500C100,350,500,400,500,200C500,0,100,-50,30,100');
+    const A = new GlyphCache(font).outline(font.charToGlyph('A')).path;
+    t.equal(A.describe(), 'M0,0L300,700L600,0ZM150,250L450,250');
+    t.end();
+});
+
+test.test(`pen position`, { bail: !CI }, function (t) {
+    for (const font of FONTS) {
+        for (const hinting of [false, true]) {
+            const opt = { hinting, tracking: 30 };
+            const cache = GlyphCache.of(font);
+            const at = cache.draw(new PathLC(undefined), 'AVo S', 7, 2, 20, opt);
+            t.equal(at, 7 + font.getAdvanceWidth('AVo S', 20, opt), `advanced, hinting ${hinting}`);
+            const p = new PathLC(undefined);
+            cache.draw(p, 'oS', at, 2, 20, opt);
+            t.equal(p.describe(), direct({ font, fontSize: 20, tracking: 30 }, 'oS', [at, 2]).replace(/^M[^A-Z]+/, ''));
+        }
+    }
+    t.end();
+});
+
+test.test(`shared buffer`, { bail: !CI, skip: !opentype && 'opentype.js not installed' }, async function (t) {
+    const font = FONTS[1];
+    const buffer = await loadFontBuffer(FILE);
+    t.ok(buffer instanceof SharedArrayBuffer);
+    const shared = await parseFont(buffer);
+    t.equal(shared.unitsPerEm, font.unitsPerEm);
+    const par = { fontSize: 40 };
+    t.equal(
+        new PathLC(undefined).text({ font: shared, ...par }, 'Shared').describe(),
+        new PathLC(undefined).text({ font, ...par }, 'Shared').describe()
+    );
+    t.end();
+});
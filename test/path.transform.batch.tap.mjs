@@ -0,0 +1,82 @@
+'uses strict';
+import test from 'tap';
+import { PathLC, PathBuffer, Matrix } from 'svggeom';
+import { enum_path_data } from './path.utils.js';
+import './utils.js';
+const CI = !!process.env.CI;
+
+const paths = [];
+for await (const { d } of enum_path_data({ DATA: 'synthetic', N: '8', SEGS: '40', DEGEN: '0' })) {
+    paths.push(d);
+}
+const MATRICES = [
+    'translate(10,20) rotate(30) scale(1.5,0.5)',
+    'scale(2)',
+    'scale(-1,1) translate(5)',
+    'skewX(20) rotate(-45)',
+    'matrix(1 0 0 1 0 0)',
+].map(T => [T, Matrix.parse(T)]);
+
+for (const [T, M] of MATRICES) {
+    test.test(`transform_all ${T}`, { bail: !CI }, function (t) {
+        const want = paths.map(d => PathLC.parse(d).transform(M).describe());
+        const src = paths.map(d => PathLC.parse(d));
+        const before = src.map(p => p.describe());
+        t.same(
+            PathLC.transform_all(src, M).map(p => p.describe()),
+            want,
+            'PathLC'
+        );
+        t.same(
+            src.map(p => p.describe()),
+            before,
+            'PathLC untouched'
+        );
+        const moved = PathLC.transform_all(src, M, true);
+        t.ok(moved.every((p, i) => p === src[i]), 'PathLC in place');
+        t.same(
+            src.map(p => p.describe()),
+            want,
+            'PathLC in place'
+        );
+        const bufs = paths.map(d => PathBuffer.parse(d));
+        t.same(
+            PathBuffer.transform_all(bufs, M).map(b => b.describe()),
+            want,
+            'PathBuffer'
+        );
+        t.same(
+            bufs.map(b => b.describe()),
+            before,
+            'PathBuffer untouched'
+        );
+        // lengths indexed before, so the in place transform has to drop them
+        bufs.forEach(b => b.length);
+        PathBuffer.transform_all(bufs, M, true);
+        t.same(
+            bufs.map(b => b.describe()),
+            want,
+            'PathBuffer in place'
+        );
+        t.same(
+            bufs.map(b => b.length),
+            paths.map(d => PathLC.parse(d).transform(M).length),
+            'PathBuffer length after in place'
+        );
+        t.end();
+    });
+}
+
+test.test(`long path`, { bail: !CI }, function (t) {
+    const n = 200000;
+    const parts = ['M0,0'];
+    for (let i = 1; i <= n; ++i) {
+        parts.push(i % 2 ? `L${i},${i % 7}` : `A5,3,0,0,1,${i},${i % 5}`);
+    }
+    const p = PathLC.parse(parts.join(''));
+    const M = Matrix.parse('translate(3,4) scale(2)');
+    const q = p.transform(M);
+    t.equal(q._tail.to.x, 2 * n + 3);
+    t.equal(q.transform(M.inverse()).describe({ digits: 3 }), p.describe({ digits: 3 }));
+    t.end();
+});
@@ -1,20 +1,281 @@
 'uses strict';
 import { spawn } from 'child_process';
-export async function* enum_path_data(env) {
+import { createInterface } from 'readline';
+import { connect } from 'net';
+
+// ORACLE_ALL=1: these modes come out of one DATA=all run, tagged
+const ALL_TAGS = { '': 'Path', CubicBezier: 'CubicBezier', QuadraticBezier: 'QuadraticBezier', Arc: 'Arc', Line: 'Line' };
+
+export async function* enum_path_data(env, opt = {}) {
+    const all = { ...process.env, ...env };
+    const tag = process.env.ORACLE_ALL && ALL_TAGS[all.DATA || all.SEGMENTS || ''];
+    if (tag) {
+        for await (const item of enum_path_data({ ...env, DATA: 'all', SEGMENTS: 'all' }, { ...opt, tag })) {
+            if (item.tag === tag) {
+                yield item.record;
+            }
+        }
+        return;
+    }
+    // other tags are skipped before JSON.parse
+    const prefix = opt.tag && `{"tag": "${opt.tag}", `;
+    const bin = (env?.ORACLE_FORMAT ?? process.env.ORACLE_FORMAT) === 'bin';
+    if (!bin && (process.env.ORACLE_SOCKET || process.env.ORACLE_DAEMON)) {
+        yield* oracle_client().records({ ...process.env, ...env }, prefix);
+        return;
+    }
     const pyproc = spawn('python3', ['test/path.py'], {
         stdio: ['ignore', 'pipe', 'inherit'],
         env: { ...process.env, ...env },
     });
+    if (bin) {
+        yield* enum_oracle_bin(pyproc.stdout, opt);
+        return;
+    }
     let last;
     for await (const chunk of pyproc.stdout) {
         const lines = ((last ?? '') + chunk.toString()).split(/\r?\n/);
         last = lines.pop();
-        for (const item of lines.map(value => JSON.parse(value))) {
+        for (const line of lines) {
+            if (prefix && !line.startsWith(prefix)) {
+                continue;
+            }
             // console.log(item.points);
-            yield item;
+            yield JSON.parse(line);
         }
     }
 }
+
+// ORACLE_FORMAT=bin stream, see test/oracle_binary.py
+const ORACLE_MAGIC = 'SVGORB1\n';
+const ARITY = { M: 2, Z: 0, L: 2, H: 1, V: 1, C: 6, S: 4, Q: 4, T: 2, A: 7 };
+
+export async function* enum_oracle_frames(stream) {
+    let buf = new Uint8Array(0);
+    let pos = 0;
+    let magic = false;
+    for await (const chunk of stream) {
+        buf = pos < buf.length ? Buffer.concat([buf.subarray(pos), chunk]) : chunk;
+        pos = 0;
+        if (!magic) {
+            if (buf.length < ORACLE_MAGIC.length) {
+                continue;
+            }
+            const m = Buffer.from(buf.subarray(0, ORACLE_MAGIC.length)).toString('latin1');
+            if (m !== ORACLE_MAGIC) {
+                throw new Error(`Not an oracle binary stream: ${JSON.stringify(m)}`);
+            }
+            pos = ORACLE_MAGIC.length;
+            magic = true;
+        }
+        while (buf.length - pos >= 4) {
+            const end = pos + 4 + new DataView(buf.buffer, buf.byteOffset + pos, 4).getUint32(0, true);
+            if (end > buf.length) {
+                break;
+            }
+            const frame = buf.subarray(pos, end);
+            // the float block is 8-byte aligned within the frame
+            yield frame.byteOffset % 8 ? new Uint8Array(frame) : frame;
+            pos = end;
+        }
+    }
+    if (pos < buf.length) {
+        throw new Error(`Truncated oracle stream: ${buf.length - pos} bytes left`);
+    }
+}
+
+export class OracleDecoder {
+    constructor(opt = {}) {
+        this.views = !!opt.views;
+        this.columns = [];
+        this._text = new TextDecoder();
+    }
+    decode(frame) {
+        const dv = new DataView(frame.buffer, frame.byteOffset, 8);
+        const size = dv.getUint32(0, true);
+        const head = dv.getUint32(4, true);
+        const block = new Float64Array(frame.buffer, frame.byteOffset + 8 + head, (size - 4 - head) / 8);
+        return this._unpack(JSON.parse(this._text.decode(frame.subarray(8, 8 + head))), block);
+    }
+    _tokens(block, i, cmds) {
+        if (this.views) {
+            let n = 0;
+            for (const c of cmds) {
+                n += ARITY[c.toUpperCase()];
+            }
+            return [{ cmds, values: block.subarray(i, i + n) }, i + n];
+        }
+        const out = [];
+        for (const c of cmds) {
+            out.push(c);
+            for (let k = ARITY[c.toUpperCase()]; k-- > 0; ) {
+                out.push(block[i++]);
+            }
+        }
+        return [out, i];
+    }
+    _unpack(v, block) {
+        if (Array.isArray(v)) {
+            return v.map(x => this._unpack(x, block));
+        } else if (v === null || typeof v !== 'object') {
+            return v;
+        }
+        let i, n, cmds;
+        if (v.$f) {
+            [i, n] = v.$f;
+            const a = block.subarray(i, i + n);
+            return this.views ? a : Array.from(a);
+        } else if (v.$d) {
+            [i, , cmds] = v.$d;
+            return this._tokens(block, i, cmds)[0];
+        } else if (v.$D) {
+            [i, n, cmds] = v.$D;
+            const out = [];
+            let t;
+            while (n-- > 0) {
+                [t, i] = this._tokens(block, i, cmds);
+                out.push(t);
+            }
+            return out;
+        } else if (v.$c) {
+            const cols = v.$c.map(c => this._unpack(c, block));
+            return Array.from({ length: cols[0].length }, (_, j) => cols.map(c => c[j]));
+        } else if (v.$s) {
+            this.columns.push(v.$s);
+            return v.$s.slice();
+        } else if (v.$r !== undefined) {
+            return this.columns[v.$r].slice();
+        }
+        const o = {};
+        for (const [k, x] of Object.entries(v)) {
+            o[k] = this._unpack(x, block);
+        }
+        return o;
+    }
+}
+
+export async function* enum_oracle_bin(stream, opt = {}) {
+    const dec = new OracleDecoder(opt);
+    for await (const frame of enum_oracle_frames(stream)) {
+        yield dec.decode(frame);
+    }
+}
+
+// test/oracle.py: one python3 for every enum_path_data of this process, or for
+// the whole suite with ORACLE_SOCKET
+export class OracleClient {
+    constructor(input, output, proc) {
+        this._input = input;
+        this._output = output;
+        this._proc = proc;
+        this._lines = createInterface({ input, crlfDelay: Infinity })[Symbol.asyncIterator]();
+        this._busy = Promise.resolve();
+        this._idle();
+    }
+    static spawn() {
+        const proc = spawn('python3', ['test/oracle.py'], { stdio: ['pipe', 'pipe', 'inherit'] });
+        return new OracleClient(proc.stdout, proc.stdin, proc);
+    }
+    static connect(file) {
+        const sock = connect(file);
+        return new OracleClient(sock, sock);
+    }
+    // nothing pending keeps the process alive between requests
+    _idle() {
+        this._proc?.unref();
+        this._input.unref?.();
+        this._output.unref?.();
+    }
+    _ref() {
+        this._proc?.ref();
+        this._input.ref?.();
+        this._output.ref?.();
+    }
+    async _acquire() {
+        let release;
+        const prev = this._busy;
+        this._busy = new Promise(resolve => (release = resolve));
+        await prev;
+        this._ref();
+        return () => {
+            this._idle();
+            release();
+        };
+    }
+    async _line() {
+        const { value, done } = await this._lines.next();
+        if (done) {
+            throw new Error('Oracle closed');
+        }
+        return value;
+    }
+    async _next() {
+        return JSON.parse(await this._line());
+    }
+    async *records(env, prefix) {
+        const release = await this._acquire();
+        let done = false;
+        try {
+            const { ORACLE_FORMAT, ...rest } = env;
+            this._output.write(JSON.stringify({ env: rest }) + '\n');
+            for (;;) {
+                const line = await this._line();
+                if (line.startsWith('{"$')) {
+                    const v = JSON.parse(line);
+                    if (v.$done !== undefined) {
+                        done = true;
+                        return;
+                    } else if (v.$error !== undefined) {
+                        done = true;
+                        throw new Error(`Oracle: ${v.$error}`);
+                    }
+                } else if (prefix && !line.startsWith(prefix)) {
+                    continue;
+                }
+                yield JSON.parse(line);
+            }
+        } finally {
+            // consumer stopped early, drain up to the end marker
+            while (!done) {
+                const line = await this._line();
+                done = line.startsWith('{"$done"') || line.startsWith('{"$error"');
+            }
+            release();
+        }
+    }
+    async query(query, d, opt = {}) {
+        const release = await this._acquire();
+        try {
+            this._output.write(JSON.stringify({ ...opt, query, d }) + '\n');
+            const v = await this._next();
+            if (v.$error !== undefined) {
+                throw new Error(`Oracle: ${v.$error}`);
+            }
+            return v.$result;
+        } finally {
+            release();
+        }
+    }
+    close() {
+        if (this._proc) {
+            this._output.end();
+            this._proc.kill();
+        } else {
+            this._output.destroy();
+        }
+    }
+}
+
+let _oracle;
+export function oracle_client() {
+    if (!_oracle) {
+        const file = process.env.ORACLE_SOCKET;
+        _oracle = file ? OracleClient.connect(file) : OracleClient.spawn();
+        process.once('exit', () => _oracle.close());
+    }
+    return _oracle;
+}
+
 // import {Cubic} from 'svggeom';
 // import { PathSE } from '../dist/path/segment/pathse.js';
 // PathSE.digits = 16;
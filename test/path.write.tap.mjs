@@ -0,0 +1,94 @@
+'uses strict';
+import test from 'tap';
+import { PathLC, PathBuffer } from 'svggeom';
+import { enum_path_data } from './path.utils.js';
+import './utils.js';
+const CI = !!process.env.CI;
+const OPTS = [undefined, { relative: true }, { relative: true, smooth: true, short: true }, { close: false }];
+
+// the regex based formatting describe() used to do
+function old_describe(p, opt) {
+    const fmt = n => {
+        const v = n.toFixed(PathLC.digits);
+        return v.indexOf('.') < 0 ? v : v.replace(/0+$/g, '').replace(/\.$/g, '');
+    };
+    const out = [];
+    for (let cur = p._tail; cur; cur = cur._prev) {
+        const [cmd, ...args] = cur.term(opt);
+        out.unshift(`${cmd}${args.map(fmt).join(',')}`);
+    }
+    return out.join('');
+}
+
+function same_shape(t, d, p, eps, msg) {
+    const q = PathLC.parse(d);
+    t.equal(q._tail ? [...q._tail.walk()].length : 0, p._tail ? [...p._tail.walk()].length : 0, `${msg} segments`);
+    for (const T of [0, 0.1, 0.5, 0.9, 1]) {
+        const [a, b] = [q.point_at(T), p.point_at(T)];
+        a && b && t.ok(a.close_to(b, eps), `${msg} point_at ${T} ${a} ${b}`);
+    }
+}
+
+async function* paths() {
+    for await (const { d } of enum_path_data({ SEGMENTS: '' })) {
+        yield d;
+    }
+    for await (const { d } of enum_path_data({ DATA: 'synthetic', N: '2', SEGS: '50', DEGEN: '0' })) {
+        yield d;
+    }
+}
+
+for await (const d of paths()) {
+    test.test(`<${d.length > 80 ? d.slice(0, 80) + '...' : d}>`, { bail: !CI }, function (t) {
+        const p = PathLC.parse(d);
+        for (const opt of OPTS) {
+            t.equal(p.describe(opt), old_describe(p, opt), `describe ${JSON.stringify(opt)}`);
+        }
+        const plain = p.describe();
+        const compact = p.describe({ compact: true, short: true });
+        const auto = p.describe({ compact: true, auto: true, short: true, smooth: true });
+        t.ok(compact.length <= plain.length);
+        t.ok(auto.length <= plain.length);
+        t.equal(PathBuffer.parse(d).describe({ compact: true, auto: true }), p.describe({ compact: true, auto: true }));
+        // compact only spells the same numbers differently
+        t.equal(PathLC.parse(compact).describe(), PathLC.parse(plain).describe());
+        same_shape(t, auto, PathLC.parse(plain), 1e-5, 'auto');
+        t.end();
+    });
+}
+
+test.test(`compact forms`, { bail: !CI }, function (t) {
+    const p = PathLC.parse('M0.5,-0.5L1.25,0.75L-0.125,0.5L0.5,0.5Z');
+    t.equal(p.describe({ compact: true }), 'M.5-.5 1.25.75-.125.5.5.5Z');
+    t.equal(p.describe({ compact: true, relative: true }), 'm.5-.5.75 1.25-1.375-.25.625 0z');
+    t.equal(PathLC.parse('M10,10h5v5h-5z').describe({ compact: true, short: true }), 'M10 10H15V15H10Z');
+    t.equal(PathLC.parse('M100,100L101,101L150,150').describe({ compact: true, auto: true }), 'M100 100l1 1 49 49');
+    t.end();
+});
+
+test.test(`no drift`, { bail: !CI }, function (t) {
+    let p = PathLC.move_to([1000.123456789, 1000]);
+    for (let i = 0; i < 20000; ++i) {
+        p.line_to([p.to.x + 0.0123456789, p.to.y + (i % 2 ? 0.333333333 : -0.333333333)]);
+    }
+    const q = PathLC.parse(p.describe({ compact: true, auto: true }));
+    t.ok(q.to.close_to(p.to, 1e-6), `${q.to} ${p.to}`);
+    t.end();
+});
+
+test.test(`write`, { bail: !CI }, function (t) {
+    const parts = ['M0,0'];
+    for (let i = 0; i < 20000; ++i) {
+        parts.push(`L${i * 0.37},${i % 7}.25`);
+    }
+    const p = PathLC.parse(parts.join(''));
+    const chunks = [];
+    const out = { write: s => chunks.push(s) };
+    t.equal(p.write(out), out);
+    t.ok(chunks.length > 1);
+    t.equal(chunks.join(''), p.describe());
+    chunks.length = 0;
+    PathBuffer.from(p).write(out, { compact: true });
+    t.equal(chunks.join(''), p.describe({ compact: true }));
+    t.end();
+});
@@ -0,0 +1,102 @@
+'uses strict';
+import test from 'tap';
+import { PathLC, PathBuffer, Probe, Matrix, Vector } from 'svggeom';
+import './utils.js';
+const CI = !!process.env.CI;
+
+const D = 'M0,0C10,20,30,40,50,0Q60,10,70,0A10,5,30,0,1,90,10L100,0';
+
+test.test(`scope`, { bail: !CI }, function (t) {
+    const probe = new Probe();
+    const p = PathLC.parse(D);
+    p.length;
+    t.same(probe.snapshot(), { ops: {}, vectors: 0 }, 'off outside');
+    const len = probe.scope(() => {
+        const q = PathLC.parse(D);
+        q.length;
+        q.point_at(0.3);
+        q.bbox();
+        q.split_at(0.5);
+        q.transform(Matrix.parse('rotate(30)')).describe();
+        PathBuffer.parse(D);
+        return q.length;
+    });
+    t.equal(len, p.length);
+    const { ops, vectors } = probe.snapshot();
+    t.same(Object.keys(ops).sort(), ['bbox', 'describe', 'length', 'parse', 'path_length', 'point_at', 'split_at', 'transform']);
+    t.equal(ops.parse.calls, 2);
+    t.equal(ops.length.calls, 2);
+    t.equal(ops.path_length.calls, 1, 'computed once');
+    t.ok(ops.length.steps > 0 && ops.length.depth >= 0, 'subdivision');
+    t.ok(ops.point_at.vectors > 0 && vectors >= ops.point_at.vectors);
+    for (const s of Object.values(ops)) {
+        t.ok(s.ms >= 0);
+    }
+    t.same(JSON.parse(JSON.stringify(probe)), probe.snapshot());
+    p.length;
+    Vector.vec(1, 2);
+    t.equal(probe.snapshot().vectors, vectors, 'off again');
+    // the Vector methods count too
+    const v = Vector.pos(1, 2);
+    const M = Matrix.parse('rotate(30)');
+    const made = new Probe();
+    made.scope(() => v.add([1, 1]).subtract([1, 1]).flip_x().with_y(3).transform(M));
+    t.equal(made.snapshot().vectors, 5);
+    t.end();
+});
+
+test.test(`nested`, { bail: !CI }, async function (t) {
+    const [outer, inner] = [new Probe(), new Probe()];
+    outer.scope(() => {
+        PathLC.parse(D);
+        inner.scope(() => PathLC.parse(D));
+        PathLC.parse(D);
+    });
+    t.equal(outer.op('parse').calls, 2);
+    t.equal(inner.op('parse').calls, 1);
+    t.throws(() => inner.scope(() => { throw new Error('x'); }));
+    const n = await outer.scope(async () => {
+        await null;
+        return Vector.vec(1, 2).length;
+    });
+    t.equal(n, 2);
+    t.equal(outer.snapshot().vectors > 0, true);
+    PathLC.parse(D);
+    t.equal(outer.op('parse').calls, 2);
+    // the same operation within itself counts its time once
+    const probe = new Probe();
+    probe.scope(() => probe.time('x', () => probe.time('x', () => 1)));
+    t.equal(probe.op('x').calls, 2);
+    t.same(probe.reset().snapshot(), { ops: {}, vectors: 0 });
+    t.end();
+});
+
+test.test(`overlapping async scopes`, { bail: !CI }, async function (t) {
+    const [a, b] = [new Probe(), new Probe()];
+    let [end_a, end_b] = [];
+    const pa = a.scope(() => new Promise(resolve => (end_a = resolve)));
+    const pb = b.scope(() => new Promise(resolve => (end_b = resolve)));
+    end_a();
+    await pa;
+    PathLC.parse(D);
+    t.equal(b.op('parse').calls, 1, 'b still in scope');
+    t.equal(a.op('parse').calls, 0);
+    end_b();
+    await pb;
+    PathLC.parse(D);
+    t.equal(a.op('parse').calls, 0, 'off once both settle');
+    t.equal(b.op('parse').calls, 1);
+    // the other way round
+    const pc = a.scope(() => new Promise(resolve => (end_a = resolve)));
+    const pd = b.scope(() => new Promise(resolve => (end_b = resolve)));
+    end_b();
+    await pd;
+    PathLC.parse(D);
+    t.equal(a.op('parse').calls, 1, 'a back in scope');
+    end_a();
+    await pc;
+    PathLC.parse(D);
+    t.equal(a.op('parse').calls, 1);
+    t.equal(b.op('parse').calls, 1);
+    t.end();
+});
@@ -77,11 +77,11 @@ test.Test.prototype.addAssert('almostEqual', 3, function (A, B, opt, message, ex
     opt = typeof opt == 'number' ? { epsilon: opt } : opt;
     const epsilon = opt?.epsilon || 1e-13;
     // console.error(Array.from(arguments));
-    if (!Array.isArray(A)) {
+    if (!Array.isArray(A) && !ArrayBuffer.isView(A)) {
         A = [A];
     }
 
-    if (!Array.isArray(B)) {
+    if (!Array.isArray(B) && !ArrayBuffer.isView(B)) {
         B = [B];
     }
     // console.error(A, B);